@@ -128,6 +128,29 @@ MEDIA_ROOT = BASE_DIR / 'media'
 EIA_MELIA_API_BASE_URL = config('EIA_MELIA_API_BASE_URL', default='https://my.eia.cgiar.org/api/v1/melia')
 EIA_MELIA_API_TOKEN = config('EIA_MELIA_API_TOKEN', default='')
 
+# Shared HTTP client (dashboard.http_client): keep-alive pools, retries on
+# 429/502/503/504 and default timeouts, overridable per host
+HTTP_CLIENT = {
+    'DEFAULT': {
+        'TIMEOUT': 30,
+        'POOL_MAXSIZE': 4,
+        'RETRIES': 3,
+        'BACKOFF_FACTOR': 2.5,
+    },
+    'HOSTS': {
+        'my.eia.cgiar.org': {'TIMEOUT': 120, 'POOL_MAXSIZE': 8},
+        'my.sfp.cgiar.org': {'TIMEOUT': 120, 'POOL_MAXSIZE': 8},
+        'api.paystack.co': {'TIMEOUT': 30, 'POOL_MAXSIZE': 4},
+    },
+    # On-disk MELIA response cache (dashboard.http_cache), revalidated with
+    # ETag/Last-Modified and trimmed least-recently-used first
+    'CACHE': {
+        'DIRECTORY': config('HTTP_CACHE_DIR', default=str(BASE_DIR / 'cache' / 'http')),
+        'MAX_SIZE': config('HTTP_CACHE_MAX_SIZE', default=256 * 1024 * 1024, cast=int),
+        'DEFAULT_MAX_AGE': 0,
+    },
+}
+
 # Paystack Configuration
 PAYSTACK_PUBLIC_KEY = config('PAYSTACK_PUBLIC_KEY', default='')
 PAYSTACK_SECRET_KEY = config('PAYSTACK_SECRET_KEY', default='')
@@ -3,13 +3,16 @@ from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import User
 from django.utils.html import format_html
 from django import forms
+from django.db.models import Count
 from decimal import Decimal
 from datetime import date, datetime
 from import_export.admin import ImportExportModelAdmin
 from .models import (
     APIConfiguration, ParticipantRecord, AkilimoParticipant, DashboardMetrics,
-    DataSyncLog, PartnerOrganization, UserProfile, Membership, Payment, MembershipPricing,
-    ANANigeriaPartner
+    DataSyncLog, SyncJob, PartnerOrganization, UserProfile, Membership, Payment, MembershipPricing,
+    ANANigeriaPartner, ParticipantPartner, ParticipantState, ParticipantLGA, ParticipantCity,
+    ParticipantCrop, ParticipantEventType, ParticipantAgeCategory, ParticipantGender, TrainingEvent,
+    ExtensionAgent, ParticipantRawData
 )
 from .resources import (
     APIConfigurationResource, PartnerOrganizationResource, UserProfileResource,
@@ -138,6 +141,7 @@ class DataSyncLogAdmin(ImportExportModelAdmin):
     list_filter = ['sync_type', 'status', 'started_at']
     search_fields = ['sync_type', 'error_message']
     readonly_fields = ['started_at', 'completed_at', 'duration_seconds']
+    raw_id_fields = ['parent']
     date_hierarchy = 'started_at'
     
     fieldsets = (
@@ -145,10 +149,16 @@ class DataSyncLogAdmin(ImportExportModelAdmin):
             'fields': ('sync_type', 'status', 'initiated_by')
         }),
         ('Results', {
-            'fields': ('records_processed', 'records_created', 'records_updated')
+            'fields': ('records_processed', 'records_created', 'records_updated', 'records_unchanged', 'records_skipped',
+                       'records_deleted')
+        }),
+        ('Sync State', {
+            'fields': ('checkpoint_page', 'checkpoint_page_size', 'watermark_external_id', 'watermark_created_on',
+                       'parent', 'partition_start_page', 'partition_end_page'),
+            'classes': ('collapse',)
         }),
         ('Timing', {
-            'fields': ('started_at', 'completed_at', 'duration_seconds')
+            'fields': ('started_at', 'completed_at', 'duration_seconds', 'stage_metrics')
         }),
         ('Error Details', {
             'fields': ('error_message', 'error_details'),
@@ -159,6 +169,32 @@ class DataSyncLogAdmin(ImportExportModelAdmin):
     def get_queryset(self, request):
         return super().get_queryset(request).select_related('initiated_by')
 
+@admin.register(SyncJob)
+class SyncJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'job_type', 'status', 'attempts', 'worker_id', 'requested_by', 'created_at', 'finished_at']
+    list_filter = ['job_type', 'status', 'created_at']
+    readonly_fields = ['sync_log', 'worker_id', 'lease_expires_at', 'attempts', 'created_at', 'started_at', 'finished_at']
+    date_hierarchy = 'created_at'
+    
+    fieldsets = (
+        ('Job', {
+            'fields': ('job_type', 'status', 'options', 'requested_by', 'sync_log')
+        }),
+        ('Worker', {
+            'fields': ('worker_id', 'lease_expires_at', 'attempts', 'max_attempts')
+        }),
+        ('Timing', {
+            'fields': ('created_at', 'started_at', 'finished_at')
+        }),
+        ('Error Details', {
+            'fields': ('error_message',),
+            'classes': ('collapse',)
+        }),
+    )
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('requested_by', 'sync_log')
+
 
 @admin.register(PartnerOrganization)
 class PartnerOrganizationAdmin(ImportExportModelAdmin):
@@ -265,13 +301,28 @@ class PartnerOrganizationAdmin(ImportExportModelAdmin):
         messages.warning(request, f'Rejected {count} organization(s). You can add rejection reasons in the individual organization details.')
 
 
+class ParticipantRawDataInline(admin.StackedInline):
+    """Raw API record, only loaded on the participant's change page"""
+    model = ParticipantRawData
+    fields = ['data', 'updated_at']
+    readonly_fields = ['data', 'updated_at']
+    can_delete = False
+    classes = ['collapse']
+    verbose_name_plural = 'Raw data'
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(AkilimoParticipant)
 class AkilimoParticipantAdmin(ImportExportModelAdmin):
     resource_class = AkilimoParticipantResource
+    inlines = [ParticipantRawDataInline]
     list_display = ['external_id', 'full_name', 'farmer_gender', 'admin_level1', 'partner', 'event_date', 'crop']
-    list_filter = ['farmer_gender', 'admin_level1', 'partner', 'crop', 'event_type', 'age_category', 'country']
+    list_filter = ['gender_code', 'admin_level1', 'partner', 'crop', 'event_type', 'age_category', 'country']
     search_fields = ['external_id', 'farmer_first_name', 'farmer_surname', 'event_city', 'partner']
-    readonly_fields = ['external_id', 'created_at', 'updated_at', 'api_created_on', 'source_submitted_on']
+    readonly_fields = ['external_id', 'created_at', 'updated_at', 'api_created_on', 'source_submitted_on', 'content_hash',
+                       'gender_code']
     date_hierarchy = 'event_date'
     
     fieldsets = (
@@ -279,7 +330,7 @@ class AkilimoParticipantAdmin(ImportExportModelAdmin):
             'fields': ('external_id', 'source_id', 'usecase', 'usecase_ref_id')
         }),
         ('Farmer Information', {
-            'fields': ('farmer_first_name', 'farmer_surname', 'farmer_gender', 'farmer_age', 'age_category', 'farmer_phone_no', 'farmer_own_phone')
+            'fields': ('farmer_first_name', 'farmer_surname', 'farmer_gender', 'gender_code', 'farmer_age', 'age_category', 'farmer_phone_no', 'farmer_own_phone')
         }),
         ('Organization Details', {
             'fields': ('farmer_organization', 'farmer_position', 'farmer_relationship', 'participants_type')
@@ -300,7 +351,7 @@ class AkilimoParticipantAdmin(ImportExportModelAdmin):
             'fields': ('data_source', 'source_submitted_on', 'api_created_on')
         }),
         ('Metadata', {
-            'fields': ('raw_data', 'created_at', 'updated_at'),
+            'fields': ('content_hash', 'created_at', 'updated_at'),
             'classes': ('collapse',)
         }),
     )
@@ -309,6 +360,46 @@ class AkilimoParticipantAdmin(ImportExportModelAdmin):
         return super().get_queryset(request)
 
 
+@admin.register(ParticipantPartner, ParticipantState, ParticipantLGA, ParticipantCity,
+                ParticipantCrop, ParticipantEventType, ParticipantAgeCategory, ParticipantGender)
+class ParticipantDimensionAdmin(admin.ModelAdmin):
+    """Lookup rows created by the sync; names may be tidied, keys are fixed"""
+    list_display = ['name', 'key', 'id']
+    search_fields = ['name', 'key']
+    readonly_fields = ['key']
+
+
+@admin.register(TrainingEvent)
+class TrainingEventAdmin(admin.ModelAdmin):
+    list_display = ['event_date', 'event_type', 'event_venue', 'attendance']
+    list_filter = ['event_type']
+    search_fields = ['event_venue', 'event_type']
+    readonly_fields = ['key', 'created_at']
+    date_hierarchy = 'event_date'
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(attendance=Count('participants'))
+
+    @admin.display(ordering='attendance')
+    def attendance(self, obj):
+        return obj.attendance
+
+
+@admin.register(ExtensionAgent)
+class ExtensionAgentAdmin(admin.ModelAdmin):
+    list_display = ['first_name', 'surname', 'phone_no', 'partner', 'farmers_reached']
+    list_filter = ['partner']
+    search_fields = ['first_name', 'surname', 'phone_no', 'partner']
+    readonly_fields = ['key', 'created_at']
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(farmers_reached=Count('participants'))
+
+    @admin.display(ordering='farmers_reached')
+    def farmers_reached(self, obj):
+        return obj.farmers_reached
+
+
 # Inline admin for UserProfile
 class UserProfileInline(admin.StackedInline):
     model = UserProfile
@@ -0,0 +1,219 @@
+import json
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import ExitStack
+from functools import wraps
+from typing import Callable, Dict, List
+from django.db import connection, transaction
+from . import sync_service
+from .http_client import get_session
+
+
+class SyncProfiler:
+    """
+    Collect throughput, query and stage timings around a sync run
+
+    Used as a context manager, it wraps the moving parts of the sync path
+    without changing them:
+
+    - ``http``: time spent in HTTP requests, summed across fetch workers
+    - ``normalize``: time spent mapping raw records to model fields
+    - ``db``: time spent executing SQL on the default connection
+
+    Whatever is left of the wall time is reported as ``other`` (command
+    bookkeeping, JSON decoding, waiting on prefetched pages). Peak memory
+    comes from tracemalloc, which slows the run down noticeably; pass
+    ``trace_memory=False`` when only throughput matters.
+    """
+
+    STAGES = ('http', 'normalize', 'db')
+
+    def __init__(self, trace_memory: bool = True):
+        self.trace_memory = trace_memory
+        self.stage_seconds: Dict[str, float] = defaultdict(float)
+        self.stage_calls: Dict[str, int] = defaultdict(int)
+        self.wall_seconds = 0.0
+        self.peak_memory_bytes = None
+        self._lock = threading.Lock()
+        self._stack = None
+
+    def __enter__(self):
+        self._stack = ExitStack()
+
+        for status_retries in (True, False):
+            session = get_session(status_retries)
+            original_send = session.send
+            session.send = self._timed('http', original_send)
+            self._stack.callback(setattr, session, 'send', original_send)
+
+        original_normalize = sync_service.normalize_participant
+        sync_service.normalize_participant = self._timed('normalize', original_normalize)
+        self._stack.callback(setattr, sync_service, 'normalize_participant', original_normalize)
+
+        self._stack.enter_context(connection.execute_wrapper(self._time_query))
+
+        if self.trace_memory:
+            tracemalloc.start()
+            self._stack.callback(tracemalloc.stop)
+
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.wall_seconds = time.perf_counter() - self._started
+        if self.trace_memory:
+            self.peak_memory_bytes = tracemalloc.get_traced_memory()[1]
+        self._stack.close()
+
+    def _timed(self, stage: str, func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                with self._lock:
+                    self.stage_seconds[stage] += elapsed
+                    self.stage_calls[stage] += 1
+        return wrapper
+
+    def _time_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.stage_seconds['db'] += time.perf_counter() - started
+            self.stage_calls['db'] += 1
+
+    @property
+    def queries(self) -> int:
+        return self.stage_calls['db']
+
+    def report(self, records: int) -> Dict:
+        """
+        Summarise the run
+
+        Args:
+            records: Number of records the sync processed
+
+        Returns:
+            Dict with throughput, queries per record, peak memory and stage timings
+        """
+        stages = {stage: round(self.stage_seconds[stage], 4) for stage in self.STAGES}
+        # HTTP overlaps the main thread when pages are prefetched, so it is left out
+        stages['other'] = round(max(self.wall_seconds - stages['normalize'] - stages['db'], 0), 4)
+        return {
+            'records': records,
+            'wall_seconds': round(self.wall_seconds, 4),
+            'records_per_second': round(records / self.wall_seconds, 1) if self.wall_seconds else None,
+            'queries': self.queries,
+            'queries_per_record': round(self.queries / records, 4) if records else None,
+            'http_requests': self.stage_calls['http'],
+            'peak_memory_mb': round(self.peak_memory_bytes / 2 ** 20, 2) if self.peak_memory_bytes else None,
+            'stage_seconds': stages,
+        }
+
+
+def sample_page_numbers(last_page: int, samples: int) -> List[int]:
+    """Spread `samples` page numbers evenly over 1..last_page, both ends included"""
+    if last_page <= 1 or samples <= 1:
+        return [1]
+    samples = min(samples, last_page)
+    return sorted({round(1 + i * (last_page - 1) / (samples - 1)) for i in range(samples)})
+
+
+class SyncCostEstimator:
+    """
+    Project the cost of a full sync from a handful of sample pages
+
+    Each sample page is fetched, decoded, normalized and written exactly as
+    the sync would do it, but the write runs in a transaction that is rolled
+    back, so nothing is saved. Fetch time is projected per page (it is
+    dominated by latency); decode, normalize and write time, queries and the
+    created/updated/unchanged/skipped split are projected per record.
+
+    Args:
+        writer: ParticipantBulkWriter configured like the real run (e.g. force_update)
+        fetch_page: Returns one page as raw JSON bytes, a response dict or a list of records
+    """
+
+    def __init__(self, writer, fetch_page: Callable):
+        self.writer = writer
+        self.fetch_page = fetch_page
+        self.samples: List[Dict] = []
+
+    def sample(self, page: int) -> Dict:
+        """Profile one page and keep the result"""
+        started = time.perf_counter()
+        payload = self.fetch_page(page)
+        fetched = time.perf_counter()
+
+        if isinstance(payload, (bytes, str)):
+            payload = json.loads(payload)
+        records = list(payload.get('data') or []) if isinstance(payload, dict) else list(payload)
+        decoded = time.perf_counter()
+
+        chunks = self.writer.normalize_page(records)
+        normalized = time.perf_counter()
+
+        queries = []
+        with connection.execute_wrapper(lambda execute, *args: queries.append(1) or execute(*args)):
+            with transaction.atomic():
+                counts = self.writer.write_normalized(chunks)
+                transaction.set_rollback(True)
+        written = time.perf_counter()
+
+        result = {
+            'page': page,
+            'records': len(records),
+            'fetch_seconds': fetched - started,
+            'decode_seconds': decoded - fetched,
+            'normalize_seconds': normalized - decoded,
+            'write_seconds': written - normalized,
+            'queries': len(queries),
+            **counts,
+        }
+        self.samples.append(result)
+        return result
+
+    def project(self, total_records: int, page_size: int, fetch_workers: int = 1) -> Dict:
+        """
+        Scale the samples up to the full dataset
+
+        Returns:
+            Dict with projected seconds (pipelined and sequential), the
+            bottleneck stage, rows written, queries and the outcome split
+        """
+        records = sum(s['records'] for s in self.samples)
+        if not self.samples or not records:
+            return {'records': total_records, 'pages': 0, 'sampled_records': 0}
+
+        pages = -(-total_records // page_size)
+        per_page_fetch = sum(s['fetch_seconds'] for s in self.samples) / len(self.samples)
+        stages = {'fetch': per_page_fetch * pages / max(fetch_workers, 1)}
+        for stage in ('decode', 'normalize', 'write'):
+            stages[stage] = sum(s[f'{stage}_seconds'] for s in self.samples) / records * total_records
+
+        split = {
+            outcome: round(sum(s[outcome] for s in self.samples) / records * total_records)
+            for outcome in ('created', 'updated', 'unchanged', 'skipped')
+        }
+        return {
+            'records': total_records,
+            'pages': pages,
+            'sampled_pages': len(self.samples),
+            'sampled_records': records,
+            'stage_seconds': {stage: round(seconds, 2) for stage, seconds in stages.items()},
+            # Stages overlap in the pipeline; --stream runs them back to back
+            'pipelined_seconds': round(max(stages.values()), 1),
+            'sequential_seconds': round(per_page_fetch * pages + sum(
+                seconds for stage, seconds in stages.items() if stage != 'fetch'
+            ), 1),
+            'bottleneck': max(stages, key=stages.get),
+            'rows_written': split['created'] + split['updated'],
+            'queries': round(sum(s['queries'] for s in self.samples) / records * total_records),
+            **split,
+        }
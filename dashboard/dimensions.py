@@ -0,0 +1,451 @@
+import hashlib
+import re
+from collections import ChainMap
+from datetime import timedelta
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from .models import (AkilimoParticipant, ExtensionAgent, ParticipantAgeCategory, ParticipantCity, ParticipantCrop,
+                     ParticipantEventType, ParticipantGender, ParticipantLGA, ParticipantPartner,
+                     ParticipantState, TrainingEvent)
+from .normalizers import gender_code
+import logging
+
+logger = logging.getLogger(__name__)
+
+# String column on AkilimoParticipant -> (dimension foreign key, dimension model)
+DIMENSIONS = {
+    'partner': ('partner_dim', ParticipantPartner),
+    'admin_level1': ('state_dim', ParticipantState),
+    'admin_level2': ('lga_dim', ParticipantLGA),
+    'event_city': ('city_dim', ParticipantCity),
+    'crop': ('crop_dim', ParticipantCrop),
+    'event_type': ('event_type_dim', ParticipantEventType),
+    'age_category': ('age_category_dim', ParticipantAgeCategory),
+    'farmer_gender': ('gender_dim', ParticipantGender),
+}
+
+# Participant columns that identify a TrainingEvent
+EVENT_COLUMNS = ('event_date', 'event_venue', 'event_type')
+# Participant columns that identify an ExtensionAgent
+AGENT_COLUMNS = ('org_first_name', 'org_surname', 'org_phone_no', 'partner')
+
+# Participant columns the keys are derived from, and the key fields assign_instance_dimensions sets
+SOURCE_COLUMNS = frozenset([*DIMENSIONS, *EVENT_COLUMNS, *AGENT_COLUMNS])
+KEY_FIELDS = (*(f'{fk}_id' for fk, _ in DIMENSIONS.values()), 'event_id', 'extension_agent_id', 'gender_code')
+
+# Keys looked up or created per query
+LOOKUP_CHUNK = 500
+
+
+def dimension_key(value) -> Optional[str]:
+    """
+    Lookup key for a column value; None and '' have no dimension row
+
+    A hex digest of the trimmed, case-folded value rather than the value
+    itself: MySQL's accent-insensitive collations would otherwise treat
+    'Ìbàdàn' and 'Ibadan' as one unique key while Python treats them as two.
+    """
+    if not value:
+        return None
+    return hashlib.sha256(str(value).strip().casefold().encode('utf-8', 'surrogatepass')).hexdigest()
+
+
+def event_identity(row: Dict) -> Optional[Tuple]:
+    """(date, venue, type) of a participant row, or None when all three are empty"""
+    identity = tuple(row.get(column) for column in EVENT_COLUMNS)
+    return identity if any(identity) else None
+
+
+def event_key(identity: Tuple) -> str:
+    """TrainingEvent.key for an identity from event_identity"""
+    event_date, venue, event_type = identity
+    canonical = '\x1f'.join([
+        str(event_date or ''),
+        str(venue or '').strip().casefold(),
+        str(event_type or '').strip().casefold(),
+    ])
+    return hashlib.sha256(canonical.encode('utf-8', 'surrogatepass')).hexdigest()
+
+
+def _normalize_name(value) -> str:
+    return ' '.join(str(value or '').split()).casefold()
+
+
+def _normalize_phone(value) -> str:
+    return re.sub(r'\D', '', str(value or ''))[-10:]
+
+
+def agent_identity(row: Dict) -> Optional[Tuple]:
+    """Org contact columns of a participant row, or None without an org_first_name"""
+    identity = tuple(row.get(column) for column in AGENT_COLUMNS)
+    return identity if identity[0] else None
+
+
+def agent_key(identity: Tuple) -> str:
+    """ExtensionAgent.key for an identity from agent_identity"""
+    first_name, surname, phone_no, partner = identity
+    canonical = '\x1f'.join([
+        _normalize_name(first_name),
+        _normalize_name(surname),
+        _normalize_phone(phone_no),
+        _normalize_name(partner),
+    ])
+    return hashlib.sha256(canonical.encode('utf-8', 'surrogatepass')).hexdigest()
+
+
+class DimensionResolver:
+    """
+    Map categorical column values to dimension ids, and participants' event
+    and org contact columns to TrainingEvent and ExtensionAgent ids,
+    creating rows as needed
+
+    Ids are cached per column, so once a sync has seen a value it costs no
+    further queries. Use one resolver per sync run, never a process-wide one:
+    the cache is not invalidated when a row is deleted. New values are inserted with ``ignore_conflicts`` and
+    read back with a locking read, which also picks up rows a concurrent
+    worker just committed. Ids read inside a transaction are only cached once
+    it commits, so a rolled-back page cannot leave ids behind that no longer
+    exist.
+    """
+
+    def __init__(self):
+        self._ids: Dict[str, Dict[str, int]] = {column: {} for column in [*DIMENSIONS, 'event', 'agent']}
+
+    def assign(self, rows: Iterable[Dict]):
+        """Set ``<fk>_id``, ``event_id`` and ``extension_agent_id`` on each normalized row"""
+        rows = list(rows)
+        for column, (fk, model) in DIMENSIONS.items():
+            names = {}
+            for row in rows:
+                value = row.get(column)
+                key = dimension_key(value)
+                if key is not None and key not in names:
+                    names[key] = value
+
+            ids = self.resolve(column, model, names, self._dimension_builder(model, names)) if names else {}
+            attname = f'{fk}_id'
+            for row in rows:
+                row[attname] = ids.get(dimension_key(row.get(column)))
+
+        self._assign_entities(rows, 'event', 'event_id', TrainingEvent, event_identity, event_key,
+                              self._event_builder)
+        self._assign_entities(rows, 'agent', 'extension_agent_id', ExtensionAgent, agent_identity, agent_key,
+                              self._agent_builder)
+
+    def _assign_entities(self, rows: List[Dict], name: str, attname: str, model,
+                         identify: Callable, make_key: Callable, builder: Callable):
+        keys = []
+        identities = {}
+        for row in rows:
+            identity = identify(row)
+            key = make_key(identity) if identity else None
+            keys.append(key)
+            if key is not None:
+                identities.setdefault(key, identity)
+
+        ids = self.resolve(name, model, identities, builder(identities)) if identities else {}
+        for row, key in zip(rows, keys):
+            row[attname] = ids.get(key) if key else None
+
+    @staticmethod
+    def _dimension_builder(model, names: Dict[str, str]) -> Callable:
+        max_length = model._meta.get_field('name').max_length
+        return lambda key: model(key=key, name=str(names[key]).strip()[:max_length] or names[key])
+
+    @staticmethod
+    def _event_builder(identities: Dict[str, Tuple]) -> Callable:
+        def build(key):
+            event_date, venue, event_type = identities[key]
+            return TrainingEvent(key=key, event_date=event_date, event_venue=venue, event_type=event_type)
+        return build
+
+    @staticmethod
+    def _agent_builder(identities: Dict[str, Tuple]) -> Callable:
+        def build(key):
+            first_name, surname, phone_no, partner = identities[key]
+            return ExtensionAgent(key=key, first_name=first_name, surname=surname, phone_no=phone_no,
+                                  partner=partner)
+        return build
+
+    def resolve(self, name: str, model, keys: Iterable[str], build: Callable) -> Mapping[str, int]:
+        """
+        Args:
+            name: Cache to use (the column, 'event' or 'agent')
+            keys: Keys to look up
+            build: Returns an unsaved row for a key that does not exist yet
+
+        Returns:
+            Row id by key
+        """
+        cache = self._ids[name]
+        missing = [key for key in keys if key not in cache]
+        if not missing:
+            return cache
+
+        found = {}
+        for start in range(0, len(missing), LOOKUP_CHUNK):
+            keys = missing[start:start + LOOKUP_CHUNK]
+            found.update(model.objects.filter(key__in=keys).values_list('key', 'id'))
+            new = [key for key in keys if key not in found]
+            if not new:
+                continue
+            with transaction.atomic():
+                model.objects.bulk_create([build(key) for key in new], ignore_conflicts=True)
+                found.update(model.objects.select_for_update().filter(key__in=new).values_list('key', 'id'))
+
+        unresolved = len(missing) - len(found)
+        if unresolved:
+            logger.warning(f'{unresolved} {name} values could not be given a {model._meta.verbose_name} row')
+
+        transaction.on_commit(lambda: cache.update(found))
+        return ChainMap(found, cache)
+
+
+def assign_instance_dimensions(participant: AkilimoParticipant):
+    """Set the dimension keys, event, agent and gender code of a single participant before it is saved"""
+    row = {column: getattr(participant, column) for column in SOURCE_COLUMNS}
+    # A fresh resolver, so ids of rows deleted since (e.g. in the admin) are never reused
+    DimensionResolver().assign([row])
+    for column, (fk, _) in DIMENSIONS.items():
+        setattr(participant, f'{fk}_id', row[f'{fk}_id'])
+    participant.event_id = row['event_id']
+    participant.extension_agent_id = row['extension_agent_id']
+    participant.gender_code = gender_code(participant.farmer_gender)
+
+
+def missing_dimensions_q() -> Q:
+    """Participants with a categorical value but no dimension key, event or agent yet, or no gender code"""
+    q = Q(gender_code__isnull=True) | (Q(event__isnull=True) & (
+        Q(event_date__isnull=False)
+        | (Q(event_venue__isnull=False) & ~Q(event_venue=''))
+        | (Q(event_type__isnull=False) & ~Q(event_type=''))
+    )) | (Q(extension_agent__isnull=True, org_first_name__isnull=False) & ~Q(org_first_name=''))
+    for column, (fk, _) in DIMENSIONS.items():
+        q |= Q(**{f'{fk}__isnull': True, f'{column}__isnull': False}) & ~Q(**{column: ''})
+    return q
+
+
+# Seconds a dimensions_ready() answer is reused, in either direction
+READY_TTL = 60
+READY_CACHE_KEY = 'dashboard:dimensions_ready'
+
+
+def dimensions_ready() -> bool:
+    """
+    True when every participant has its dimension keys, event, agent and gender code
+
+    Until backfill_participant_dimensions has run, the dashboard helpers
+    below keep grouping on the string columns. The answer is cached for
+    READY_TTL seconds, so a page calling several helpers runs the check at
+    most once, and rows that lose their keys later (a bulk ``.update()`` of
+    a categorical column, a deleted dimension row) switch the dashboards
+    back to the string columns within a minute.
+    """
+    ready = cache.get(READY_CACHE_KEY)
+    if ready is None:
+        ready = not AkilimoParticipant.objects.filter(missing_dimensions_q()).exists()
+        cache.set(READY_CACHE_KEY, ready, READY_TTL)
+    return ready
+
+
+def dimension_counts(queryset, column: str, limit: Optional[int] = None, order_by: str = '-count',
+                     include_empty: bool = False, **aggregates) -> List[Dict]:
+    """
+    Equivalent of ``queryset.values(column).annotate(...)`` grouped on the dimension key
+
+    Rows come back keyed by ``column`` with the dimension name, so templates
+    are unaffected. Unless ``include_empty`` is set, null and empty values
+    are left out.
+
+    Args:
+        aggregates: Annotations per group (default ``count=Count('id')``)
+    """
+    aggregates = aggregates or {'count': Count('id')}
+    fk, model = DIMENSIONS[column]
+
+    if not dimensions_ready():
+        if not include_empty:
+            queryset = queryset.exclude(**{f'{column}__isnull': True}).exclude(**{column: ''})
+        rows = queryset.values(column).annotate(**aggregates).order_by(order_by)
+        return list(rows[:limit] if limit else rows)
+
+    if not include_empty:
+        queryset = queryset.filter(**{f'{fk}__isnull': False})
+    rows = queryset.values(fk).annotate(**aggregates).order_by(order_by)
+    rows = list(rows[:limit] if limit else rows)
+
+    names = dict(model.objects.filter(pk__in=[row[fk] for row in rows if row[fk] is not None])
+                 .values_list('id', 'name'))
+    results = []
+    for row in rows:
+        result = {column: names.get(row.pop(fk))}
+        result.update(row)
+        results.append(result)
+    return results
+
+
+def dimension_values(queryset, column: str) -> List[str]:
+    """Distinct non-empty values of ``column`` in queryset, e.g. for filter dropdowns"""
+    fk, model = DIMENSIONS[column]
+    if not dimensions_ready():
+        return list(queryset.exclude(**{f'{column}__isnull': True}).exclude(**{column: ''})
+                    .values_list(column, flat=True).distinct())
+    return list(model.objects.filter(pk__in=queryset.values(fk)).values_list('name', flat=True))
+
+
+def distinct_count(queryset, column: str) -> int:
+    """Number of distinct non-empty values of ``column`` in queryset"""
+    fk, _ = DIMENSIONS[column]
+    if not dimensions_ready():
+        return queryset.exclude(**{f'{column}__isnull': True}).exclude(**{column: ''}).values(
+            column).distinct().count()
+    return queryset.aggregate(n=Count(fk, distinct=True))['n']
+
+
+def gender_counts(queryset) -> Dict[str, int]:
+    """Male and female participants in queryset, from one group-by on gender_code"""
+    if not dimensions_ready():
+        return {
+            'male': queryset.filter(farmer_gender__icontains='male').exclude(farmer_gender__icontains='female').count(),
+            'female': queryset.filter(farmer_gender__icontains='female').count(),
+        }
+    counts = dict(queryset.values('gender_code').annotate(count=Count('id')).values_list('gender_code', 'count'))
+    return {'male': counts.get('M', 0), 'female': counts.get('F', 0)}
+
+
+def gender_distribution(queryset, column: str = 'farmer_gender') -> List[Dict]:
+    """
+    Participants per gender, most common first, as ``[{column: label, 'count': n}]``
+
+    Groups on gender_code, so every spelling of a gender lands in one bucket
+    labelled Male, Female, Other or Unknown.
+    """
+    if not dimensions_ready():
+        rows = dimension_counts(queryset, 'farmer_gender', include_empty=True)
+        return [{column: row['farmer_gender'], 'count': row['count']} for row in rows]
+    labels = dict(AkilimoParticipant.GENDER_CODE_CHOICES)
+    rows = queryset.values('gender_code').annotate(count=Count('id')).order_by('-count')
+    return [{column: labels.get(row['gender_code']), 'count': row['count']} for row in rows]
+
+
+def gender_values(queryset) -> List[str]:
+    """Gender labels present in queryset, for filter dropdowns"""
+    if not dimensions_ready():
+        return dimension_values(queryset, 'farmer_gender')
+    codes = set(queryset.order_by().values_list('gender_code', flat=True).distinct())
+    return [label for code, label in AkilimoParticipant.GENDER_CODE_CHOICES if code in codes]
+
+
+def filter_gender(queryset, value: str):
+    """
+    Narrow queryset to one gender picked from gender_values
+
+    Labels (Male, Female, Other, Unknown) match on gender_code, so Unknown
+    also finds blank and unrecognised genders. Other values are matched as
+    free text on farmer_gender.
+    """
+    if dimensions_ready():
+        codes = {label: code for code, label in AkilimoParticipant.GENDER_CODE_CHOICES}
+        if value in codes:
+            return queryset.filter(gender_code=codes[value])
+    return queryset.filter(farmer_gender__icontains=value)
+
+
+def event_count(queryset, typed_only: bool = False) -> int:
+    """
+    Number of distinct training events attended by the participants in queryset
+
+    Args:
+        typed_only: Leave out events without an event_type
+    """
+    if not dimensions_ready():
+        if typed_only:
+            queryset = queryset.exclude(event_type__isnull=True).exclude(event_type='')
+        return queryset.values(*EVENT_COLUMNS).distinct().count()
+    if typed_only:
+        queryset = queryset.exclude(event__event_type__isnull=True).exclude(event__event_type='')
+    return queryset.aggregate(n=Count('event', distinct=True))['n']
+
+
+def agent_count(queryset) -> int:
+    """Number of distinct extension agents behind the participants in queryset"""
+    if not dimensions_ready():
+        return queryset.exclude(org_first_name__isnull=True).exclude(org_first_name='').values(
+            *AGENT_COLUMNS).distinct().count()
+    return queryset.aggregate(n=Count('extension_agent', distinct=True))['n']
+
+
+def agent_leaderboard(queryset) -> List[Dict]:
+    """
+    Per extension agent: farmers reached, event days, states and cities covered
+
+    Rows carry org_first_name, org_surname and org_phone_no, best agent first.
+    """
+    if not dimensions_ready():
+        return list(queryset.exclude(org_first_name__isnull=True).exclude(org_first_name='').values(
+            'org_first_name', 'org_surname', 'org_phone_no'
+        ).annotate(
+            farmers_reached=Count('id'),
+            events_conducted=Count('event_date', distinct=True),
+            states_covered=Count('admin_level1', distinct=True),
+            cities_covered=Count('event_city', distinct=True)
+        ).order_by('-farmers_reached'))
+
+    rows = list(queryset.filter(extension_agent__isnull=False).values('extension_agent').annotate(
+        farmers_reached=Count('id'),
+        events_conducted=Count('event_date', distinct=True),
+        states_covered=Count('state_dim', distinct=True),
+        cities_covered=Count('city_dim', distinct=True)
+    ).order_by('-farmers_reached'))
+    agents = ExtensionAgent.objects.in_bulk([row['extension_agent'] for row in rows])
+    results = []
+    for row in rows:
+        agent = agents[row.pop('extension_agent')]
+        results.append({'org_first_name': agent.first_name, 'org_surname': agent.surname,
+                        'org_phone_no': agent.phone_no, **row})
+    return results
+
+
+def monthly_agent_activity(queryset, months: int = 12) -> List[Dict]:
+    """
+    Active agents and farmers reached per calendar month, oldest first
+
+    One grouped query over the whole window instead of two per month.
+    """
+    month = timezone.now().date().replace(day=1)
+    starts = [month]
+    for _ in range(months - 1):
+        month = (month - timedelta(days=1)).replace(day=1)
+        starts.append(month)
+    starts.reverse()
+
+    window = queryset.filter(event_date__gte=starts[0])
+    if dimensions_ready():
+        counts = {
+            row['month']: row for row in window.annotate(month=TruncMonth('event_date')).values('month').annotate(
+                agents_active=Count('extension_agent', distinct=True),
+                farmers_reached=Count('id')
+            )
+        }
+    else:
+        counts = {}
+        for start in starts:
+            in_month = window.filter(event_date__gte=start,
+                                     event_date__lt=(start + timedelta(days=32)).replace(day=1))
+            counts[start] = {
+                'agents_active': agent_count(in_month),
+                'farmers_reached': in_month.count(),
+            }
+
+    return [
+        {
+            'month': start.strftime('%B %Y'),
+            'agents_active': counts.get(start, {}).get('agents_active', 0),
+            'farmers_reached': counts.get(start, {}).get('farmers_reached', 0),
+        }
+        for start in starts
+    ]
@@ -0,0 +1,265 @@
+import hashlib
+import heapq
+import math
+from collections import Counter
+from typing import Dict, List, Optional
+from django.db import models
+from .models import AkilimoParticipant
+from .normalizers import PARTICIPANT_NORMALIZER
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Values longer than this are cut before being counted as top-k candidates
+MAX_VALUE_CHARS = 200
+# Column widths suggested for CharFields; anything longer becomes a TextField
+CHAR_WIDTHS = (10, 20, 50, 100, 150, 200, 255, 500)
+
+
+class HyperLogLog:
+    """
+    Approximate distinct count in ``2 ** precision`` bytes
+
+    Values are hashed to 64 bits with BLAKE2b; the top ``precision`` bits
+    pick a register and the register keeps the longest run of leading zeros
+    seen in the remaining bits. The standard error is about
+    ``1.04 / sqrt(2 ** precision)``, 1.6% at the default precision of 12.
+    """
+
+    def __init__(self, precision: int = 12):
+        if not 4 <= precision <= 16:
+            raise ValueError('precision must be between 4 and 16')
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+        self._shift = 64 - precision
+        self._mask = (1 << self._shift) - 1
+
+    def add(self, value: str):
+        digest = hashlib.blake2b(value.encode('utf-8', 'surrogatepass'), digest_size=8).digest()
+        hashed = int.from_bytes(digest, 'big')
+        index = hashed >> self._shift
+        rank = self._shift - (hashed & self._mask).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def estimate(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * m and zeros:
+            # Linear counting is more accurate while most registers are empty
+            return round(m * math.log(m / zeros))
+        return round(raw)
+
+
+class SpaceSaving:
+    """
+    Top-k heavy hitters over a stream, holding at most ``capacity`` values
+
+    When a new value arrives with every slot taken it replaces the value with
+    the lowest count and inherits that count (recorded as its error), so a
+    reported count overestimates the true one by at most ``error``. The
+    min-heap is only repaired lazily at eviction time, which keeps the common
+    case — an already tracked value — to one dict increment.
+    """
+
+    def __init__(self, capacity: int = 100):
+        self.capacity = max(1, capacity)
+        self.counts: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self.evictions = 0
+        self._heap: List = []
+
+    def add(self, value: str):
+        counts = self.counts
+        if value in counts:
+            counts[value] += 1
+            return
+        if len(counts) < self.capacity:
+            counts[value] = 1
+            self.errors[value] = 0
+            heapq.heappush(self._heap, (1, value))
+            return
+
+        heap = self._heap
+        while True:
+            count, victim = heap[0]
+            current = counts[victim]
+            if current == count:
+                break
+            heapq.heapreplace(heap, (current, victim))
+        del counts[victim]
+        del self.errors[victim]
+        self.evictions += 1
+        counts[value] = count + 1
+        self.errors[value] = count
+        heapq.heapreplace(heap, (count + 1, value))
+
+    @property
+    def exact(self) -> bool:
+        """True while nothing has been evicted, i.e. every count is exact"""
+        return not self.evictions
+
+    def top(self, k: int) -> List[Dict]:
+        ranked = sorted(self.counts.items(), key=lambda item: (-item[1], item[0]))[:k]
+        return [{'value': value, 'count': count, 'error': self.errors[value]} for value, count in ranked]
+
+
+class FieldProfile:
+    """Streaming statistics for one API field"""
+
+    def __init__(self, name: str, top_k: int = 10, precision: int = 12):
+        self.name = name
+        self.top_k = top_k
+        self.present = 0
+        self.nulls = 0
+        self.blanks = 0
+        self.types = Counter()
+        self.min_length = None
+        self.max_length = 0
+        self.total_length = 0
+        self.distinct = HyperLogLog(precision)
+        self.heavy_hitters = SpaceSaving(top_k * 10)
+
+    def add(self, value):
+        self.present += 1
+        if value is None:
+            self.nulls += 1
+            return
+        self.types[type(value).__name__] += 1
+        text = value if value.__class__ is str else str(value)
+        if not text.strip():
+            self.blanks += 1
+
+        length = len(text)
+        self.total_length += length
+        if length > self.max_length:
+            self.max_length = length
+        if self.min_length is None or length < self.min_length:
+            self.min_length = length
+
+        self.distinct.add(text)
+        self.heavy_hitters.add(text[:MAX_VALUE_CHARS])
+
+    @property
+    def non_null(self) -> int:
+        return self.present - self.nulls
+
+    def distinct_count(self) -> int:
+        if self.heavy_hitters.exact:
+            return len(self.heavy_hitters.counts)
+        return min(self.distinct.estimate(), self.non_null)
+
+    def as_dict(self, records: int) -> Dict:
+        non_null = self.non_null
+        return {
+            'present': self.present,
+            'missing': records - self.present,
+            'nulls': self.nulls,
+            'blanks': self.blanks,
+            'null_rate': round((records - non_null) / records, 4) if records else None,
+            'types': dict(self.types.most_common()),
+            'min_length': self.min_length,
+            'max_length': self.max_length,
+            'mean_length': round(self.total_length / non_null, 1) if non_null else None,
+            'distinct': self.distinct_count(),
+            'distinct_exact': self.heavy_hitters.exact,
+            'top_values': self.heavy_hitters.top(self.top_k),
+        }
+
+
+class DatasetProfiler:
+    """
+    Profile a stream of raw API records in bounded memory
+
+    Each field keeps a fixed-size HyperLogLog for its cardinality and a
+    space-saving summary for its most frequent values, so memory depends on
+    the number of fields, not records. report() adds column suggestions for
+    AkilimoParticipant: width, enum candidates, and unique or index
+    candidates.
+    """
+
+    def __init__(self, top_k: int = 10, precision: int = 12, enum_limit: int = 32):
+        self.top_k = top_k
+        self.precision = precision
+        self.enum_limit = enum_limit
+        self.records = 0
+        self.fields: Dict[str, FieldProfile] = {}
+
+    def add(self, record: Dict):
+        self.records += 1
+        fields = self.fields
+        for key, value in record.items():
+            profile = fields.get(key)
+            if profile is None:
+                profile = fields[key] = FieldProfile(key, self.top_k, self.precision)
+            profile.add(value)
+
+    def report(self) -> Dict:
+        columns = self._columns()
+        fields = {}
+        for name in sorted(self.fields):
+            stats = self.fields[name].as_dict(self.records)
+            stats['suggestion'] = self.suggest(stats, columns.get(name))
+            fields[name] = stats
+        return {'records': self.records, 'fields': fields}
+
+    def suggest(self, stats: Dict, column: Optional[models.Field]) -> Dict:
+        """Classify a field's cardinality and compare it with its model column"""
+        non_null = stats['present'] - stats['nulls']
+        distinct = stats['distinct']
+        if not non_null:
+            kind = 'empty'
+        elif distinct <= 1:
+            kind = 'constant'
+        elif distinct <= self.enum_limit and distinct < non_null and self._is_text(stats, column):
+            kind = 'enum'
+        elif distinct >= non_null * 0.95:
+            kind = 'unique'
+        elif distinct <= non_null * 0.1:
+            kind = 'categorical'
+        else:
+            kind = 'high_cardinality'
+
+        suggestion = {
+            'column': column.name if column is not None else None,
+            'cardinality': kind,
+            'suggested_max_length': _char_width(stats['max_length']),
+            'enum_candidate': kind == 'enum',
+            'index_candidate': kind in ('enum', 'categorical') and stats['null_rate'] < 0.5,
+            'unique_candidate': kind == 'unique' and stats['null_rate'] == 0,
+        }
+        if column is not None:
+            suggestion['current_type'] = column.get_internal_type()
+            suggestion['current_max_length'] = getattr(column, 'max_length', None)
+            suggestion['indexed'] = bool(column.db_index or column.unique)
+            max_length = suggestion['current_max_length']
+            suggestion['truncated'] = bool(max_length and stats['max_length'] > max_length)
+        return suggestion
+
+    @staticmethod
+    def _is_text(stats: Dict, column: Optional[models.Field]) -> bool:
+        """Only free-text values make sense as enums, not dates or numbers"""
+        if column is not None:
+            return isinstance(column, (models.CharField, models.TextField))
+        return set(stats['types']) == {'str'}
+
+    @staticmethod
+    def _columns() -> Dict[str, models.Field]:
+        """API key -> AkilimoParticipant field, following the sync's mapping"""
+        columns = {}
+        for name, keys, *_ in PARTICIPANT_NORMALIZER.plan:
+            field = AkilimoParticipant._meta.get_field(name)
+            for key in ((keys,) if isinstance(keys, str) else keys):
+                columns.setdefault(key, field)
+        return columns
+
+
+def _char_width(max_length: int) -> Optional[int]:
+    """Smallest standard width with 25% headroom over max_length, or None for TextField"""
+    needed = math.ceil(max_length * 1.25)
+    for width in CHAR_WIDTHS:
+        if needed <= width:
+            return width
+    return None
@@ -0,0 +1,266 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlencode
+from django.conf import settings
+import requests
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Used when settings.HTTP_CLIENT['CACHE'] does not override a value
+DEFAULT_CACHE_OPTIONS = {
+    'DIRECTORY': None,  # caching is off unless a directory is configured
+    'MAX_SIZE': 256 * 1024 * 1024,
+    'DEFAULT_MAX_AGE': 0,
+}
+
+_cache = None
+_cache_pid = None
+_lock = threading.Lock()
+
+
+class HTTPDiskCache:
+    """
+    Size-bounded on-disk cache of JSON API responses with HTTP semantics
+
+    Each entry is one file: a JSON header line (URL, validators, freshness)
+    followed by the raw response body. A fresh entry (``Cache-Control:
+    max-age``, or ``default_max_age`` when the server sends none) is served
+    without a request. A stale one is revalidated with ``If-None-Match`` /
+    ``If-Modified-Since``, so an unchanged page costs a bodiless 304 instead
+    of a full download. Responses marked ``no-store``, or with neither
+    validators nor a max-age, are not stored. Once the directory grows past
+    ``max_size`` the least recently used entries are evicted.
+    """
+
+    def __init__(self, directory: str, max_size: int = DEFAULT_CACHE_OPTIONS['MAX_SIZE'],
+                 default_max_age: int = 0):
+        self.directory = str(directory)
+        self.max_size = max_size
+        self.default_max_age = default_max_age
+        self.stats = {'hits': 0, 'revalidated': 0, 'misses': 0, 'stored': 0, 'evicted': 0}
+        self._size = None
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def get_json(self, session: requests.Session, url: str, params: Optional[Dict] = None,
+                 headers: Optional[Dict] = None):
+        """
+        GET a JSON resource through the cache
+
+        Raises:
+            requests.exceptions.RequestException: on transport or HTTP errors
+        """
+        return json.loads(self.get_bytes(session, url, params=params, headers=headers))
+
+    def get_bytes(self, session: requests.Session, url: str, params: Optional[Dict] = None,
+                  headers: Optional[Dict] = None) -> bytes:
+        """
+        GET a resource through the cache, returning the undecoded body
+
+        Raises:
+            requests.exceptions.RequestException: on transport or HTTP errors
+        """
+        headers = dict(headers or {})
+        path = self._path(self._key(url, params, headers))
+        header, body = self._read(path)
+
+        if header and header['expires'] > time.time():
+            self._count('hits')
+            self._touch(path)
+            return body
+
+        if header:
+            if header.get('etag'):
+                headers['If-None-Match'] = header['etag']
+            if header.get('last_modified'):
+                headers['If-Modified-Since'] = header['last_modified']
+
+        response = session.get(url, params=params, headers=headers)
+
+        if response.status_code == 304 and header:
+            self._count('revalidated')
+            refreshed = self._header_for(response, fallback=header)
+            if refreshed and (
+                refreshed['expires'] > time.time()
+                or (refreshed['etag'], refreshed['last_modified']) != (header.get('etag'), header.get('last_modified'))
+            ):
+                self._write(path, refreshed, body)
+            else:
+                self._touch(path)
+            return body
+
+        response.raise_for_status()
+        self._count('misses')
+        header = self._header_for(response)
+        if header:
+            self._write(path, header, response.content)
+        return response.content
+
+    def clear(self):
+        """Remove every cached entry"""
+        for path, _, _ in self._entries():
+            self._remove(path)
+        with self._lock:
+            self._size = 0
+
+    def _key(self, url: str, params: Optional[Dict], headers: Dict) -> str:
+        query = urlencode(sorted((params or {}).items()))
+        # Responses depend on who asks, so the credentials are part of the key
+        auth = headers.get('Authorization', '')
+        return hashlib.sha256(f'{url}?{query}\n{auth}'.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f'{key}.page')
+
+    def _header_for(self, response: requests.Response, fallback: Optional[Dict] = None) -> Optional[Dict]:
+        """Storage header for a response, or None when it must not be cached"""
+        cache_control = response.headers.get('Cache-Control', '').lower()
+        directives = {}
+        for part in cache_control.split(','):
+            name, _, value = part.strip().partition('=')
+            directives[name] = value.strip('"')
+        if 'no-store' in directives:
+            return None
+
+        etag = response.headers.get('ETag') or (fallback or {}).get('etag')
+        last_modified = response.headers.get('Last-Modified') or (fallback or {}).get('last_modified')
+
+        max_age = self.default_max_age
+        if 'no-cache' in directives:
+            max_age = 0
+        elif directives.get('max-age', '').isdigit():
+            max_age = int(directives['max-age'])
+        elif response.headers.get('Expires'):
+            try:
+                max_age = max(parsedate_to_datetime(response.headers['Expires']).timestamp() - time.time(), 0)
+            except (TypeError, ValueError):
+                max_age = 0
+
+        if not (etag or last_modified or max_age):
+            return None
+        return {
+            'url': (fallback or {}).get('url', response.url),
+            'etag': etag,
+            'last_modified': last_modified,
+            'expires': time.time() + max_age,
+        }
+
+    def _read(self, path: str) -> Tuple[Optional[Dict], Optional[bytes]]:
+        try:
+            with open(path, 'rb') as f:
+                header = json.loads(f.readline())
+                return header, f.read()
+        except FileNotFoundError:
+            return None, None
+        except (OSError, ValueError) as e:
+            logger.warning(f'Dropping unreadable HTTP cache entry {path}: {e}')
+            self._remove(path)
+            return None, None
+
+    def _write(self, path: str, header: Dict, body: bytes):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            with open(tmp_path, 'wb') as f:
+                f.write(json.dumps(header).encode('utf-8'))
+                f.write(b'\n')
+                f.write(body)
+            new_size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f'Could not write HTTP cache entry {path}: {e}')
+            self._remove(tmp_path)
+            return
+
+        self._count('stored')
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._entries())
+            else:
+                self._size += new_size - old_size
+            over_limit = self._size > self.max_size
+        if over_limit:
+            self._evict()
+
+    def _touch(self, path: str):
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _entries(self):
+        """(path, size, last used) for every entry on disk"""
+        try:
+            shards = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return
+        for shard in shards:
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith('.page'):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    yield entry.path, stat.st_size, stat.st_mtime
+
+    def _evict(self):
+        """Drop least recently used entries until the cache is back under 90% of max_size"""
+        with self._lock:
+            entries = sorted(self._entries(), key=lambda entry: entry[2])
+            size = sum(entry[1] for entry in entries)
+            target = self.max_size * 0.9
+            for path, entry_size, _ in entries:
+                if size <= target:
+                    break
+                if self._remove(path):
+                    size -= entry_size
+                    self.stats['evicted'] += 1
+            self._size = size
+
+    def _remove(self, path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+    def _count(self, stat: str):
+        with self._lock:
+            self.stats[stat] += 1
+
+
+def get_http_cache() -> Optional[HTTPDiskCache]:
+    """
+    Return this process's response cache, or None when caching is not configured
+
+    Configured through ``settings.HTTP_CLIENT['CACHE']`` (DIRECTORY, MAX_SIZE,
+    DEFAULT_MAX_AGE).
+    """
+    global _cache, _cache_pid
+    pid = os.getpid()
+    if _cache_pid != pid:
+        with _lock:
+            if _cache_pid != pid:
+                options = dict(DEFAULT_CACHE_OPTIONS)
+                options.update(getattr(settings, 'HTTP_CLIENT', {}).get('CACHE', {}))
+                _cache = None
+                if options['DIRECTORY']:
+                    try:
+                        _cache = HTTPDiskCache(
+                            options['DIRECTORY'],
+                            max_size=options['MAX_SIZE'],
+                            default_max_age=options['DEFAULT_MAX_AGE'],
+                        )
+                    except OSError as e:
+                        logger.warning(f"HTTP cache disabled, cannot use {options['DIRECTORY']}: {e}")
+                _cache_pid = pid
+    return _cache
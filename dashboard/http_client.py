@@ -0,0 +1,148 @@
+import os
+import threading
+from typing import Dict
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from django.conf import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Used when settings.HTTP_CLIENT does not override a value
+DEFAULT_CLIENT_OPTIONS = {
+    'TIMEOUT': 30,
+    'POOL_MAXSIZE': 4,
+    'RETRIES': 3,
+    'BACKOFF_FACTOR': 2.5,
+}
+
+RETRY_STATUS_CODES = (429, 502, 503, 504)
+# Only idempotent requests are retried after a response or a read error, so a
+# POST such as a Paystack transaction initialize is never sent twice
+RETRY_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE', 'TRACE'})
+
+# Shared sessions by status_retries flag, and the pid that built them
+_sessions: Dict[bool, requests.Session] = {}
+_sessions_pid = None
+_lock = threading.Lock()
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter with a default timeout and request/connection counters"""
+
+    def __init__(self, timeout=None, **kwargs):
+        self.timeout = timeout
+        self.requests_sent = 0
+        super().__init__(**kwargs)
+
+    def send(self, request, timeout=None, **kwargs):
+        self.requests_sent += 1
+        return super().send(request, timeout=timeout or self.timeout, **kwargs)
+
+    def connections_opened(self) -> int:
+        """Number of TCP connections opened by the pools this adapter still holds"""
+        pools = self.poolmanager.pools
+        opened = 0
+        for key in pools.keys():
+            try:
+                opened += pools[key].num_connections
+            except KeyError:
+                pass  # pool evicted in the meantime
+        return opened
+
+
+def _options(host: str = None) -> Dict:
+    config = getattr(settings, 'HTTP_CLIENT', {})
+    options = dict(DEFAULT_CLIENT_OPTIONS)
+    options.update(config.get('DEFAULT', {}))
+    if host:
+        options.update(config.get('HOSTS', {}).get(host, {}))
+    return options
+
+
+def _build_adapter(host: str = None, status_retries: bool = True) -> PooledHTTPAdapter:
+    options = _options(host)
+    retry = Retry(
+        total=options['RETRIES'],
+        backoff_factor=options['BACKOFF_FACTOR'],
+        allowed_methods=RETRY_METHODS,
+        status_forcelist=RETRY_STATUS_CODES if status_retries else (),
+        # urllib3 retries a 413/429/503 carrying Retry-After whatever the forcelist says
+        respect_retry_after_header=status_retries,
+        raise_on_status=False,  # hand the last 5xx back so raise_for_status() reports it
+    )
+    return PooledHTTPAdapter(
+        timeout=options['TIMEOUT'],
+        pool_connections=1,
+        pool_maxsize=options['POOL_MAXSIZE'],
+        max_retries=retry,
+    )
+
+
+def _build_session(status_retries: bool = True) -> requests.Session:
+    session = requests.Session()
+    session.headers['Accept-Encoding'] = 'gzip, deflate'
+
+    session.mount('https://', _build_adapter(status_retries=status_retries))
+    session.mount('http://', _build_adapter(status_retries=status_retries))
+    for host in getattr(settings, 'HTTP_CLIENT', {}).get('HOSTS', {}):
+        session.mount(f'https://{host}', _build_adapter(host, status_retries))
+        session.mount(f'http://{host}', _build_adapter(host, status_retries))
+    return session
+
+
+def get_session(status_retries: bool = True) -> requests.Session:
+    """
+    Return the shared keep-alive session for this process
+
+    The sessions are rebuilt after a fork so worker processes never share
+    sockets with their parent.
+
+    Args:
+        status_retries: Retry 429/5xx responses (honouring Retry-After) inside
+            the session. Callers that react to those statuses themselves,
+            like the adaptive page fetcher, pass False to see the first one.
+    """
+    global _sessions_pid
+    pid = os.getpid()
+    session = _sessions.get(status_retries) if _sessions_pid == pid else None
+    if session is None:
+        with _lock:
+            if _sessions_pid != pid:
+                _sessions.clear()
+                _sessions_pid = pid
+            session = _sessions.get(status_retries)
+            if session is None:
+                session = _sessions[status_retries] = _build_session(status_retries)
+    return session
+
+
+def max_attempts(url: str) -> int:
+    """Total tries (first attempt plus retries) the session makes for a URL"""
+    return get_session().get_adapter(url).max_retries.total + 1
+
+
+def connection_stats() -> Dict[str, Dict[str, int]]:
+    """
+    Request and connection counters per mounted prefix
+
+    Returns:
+        Dict keyed by mount prefix with requests, connections and reused counts
+    """
+    if _sessions_pid != os.getpid():
+        return {}
+
+    stats = {}
+    seen = set()
+    for session in list(_sessions.values()):
+        for prefix, adapter in session.adapters.items():
+            if id(adapter) in seen or not isinstance(adapter, PooledHTTPAdapter) or not adapter.requests_sent:
+                continue
+            seen.add(id(adapter))
+            connections = adapter.connections_opened()
+            totals = stats.setdefault(prefix, {'requests': 0, 'connections': 0, 'reused': 0})
+            totals['requests'] += adapter.requests_sent
+            totals['connections'] += connections
+            totals['reused'] = max(totals['requests'] - totals['connections'], 0)
+    return stats
@@ -0,0 +1,116 @@
+import threading
+from typing import Callable, Dict
+from django.db import connection
+from .models import APIConfiguration, DataSyncLog, SyncJob
+from .sync_service import ParticipantRecordSync
+import logging
+
+logger = logging.getLogger(__name__)
+
+# job_type -> handler(job, lease); see job_handler
+JOB_HANDLERS: Dict[str, Callable] = {}
+
+
+class LeaseLost(Exception):
+    """Raised inside a job when another worker has taken it over"""
+
+
+def job_handler(job_type: str):
+    """Register the function that executes jobs of job_type"""
+    def register(func):
+        JOB_HANDLERS[job_type] = func
+        return func
+    return register
+
+
+class LeaseKeeper:
+    """
+    Renew a job's lease from a background thread while it runs
+
+    Handlers call check() at convenient points (e.g. on progress) so they
+    stop promptly once the lease has been lost.
+    """
+
+    def __init__(self, job: SyncJob, lease_seconds: int):
+        self.job = job
+        self.lease_seconds = lease_seconds
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._renew, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def check(self, *args):
+        if self.lost:
+            raise LeaseLost(f'Job #{self.job.pk} was taken over by another worker')
+
+    def _renew(self):
+        try:
+            while not self._stop.wait(self.lease_seconds / 3):
+                try:
+                    if not self.job.heartbeat(self.lease_seconds):
+                        self.lost = True
+                        return
+                except Exception as e:
+                    logger.warning(f'Lease renewal for job #{self.job.pk} failed: {e}')
+        finally:
+            connection.close()
+
+
+def run_job(job: SyncJob, lease_seconds: int = 300) -> bool:
+    """
+    Execute a claimed job and record its outcome
+
+    Returns:
+        True when the job succeeded
+    """
+    handler = JOB_HANDLERS.get(job.job_type)
+    if not handler:
+        job.finish('failed', f'No handler for job type {job.job_type!r}')
+        return False
+
+    try:
+        with LeaseKeeper(job, lease_seconds) as lease:
+            handler(job, lease)
+    except LeaseLost as e:
+        logger.warning(str(e))
+        return False
+    except Exception as e:
+        logger.error(f'Job #{job.pk} ({job.job_type}) failed: {e}')
+        job.finish('failed', str(e))
+        return False
+
+    job.finish('success')
+    return True
+
+
+@job_handler('participants')
+def run_participant_sync(job: SyncJob, lease: LeaseKeeper):
+    """Legacy ParticipantRecord sync, formerly run inside the api_sync_data request"""
+    api_config = APIConfiguration.objects.filter(is_active=True).first()
+    if not api_config or not api_config.token:
+        raise ValueError('API configuration not found or token missing')
+
+    sync_log = DataSyncLog.objects.create(
+        sync_type='participants',
+        status='started',
+        initiated_by=job.requested_by
+    )
+    job.sync_log = sync_log
+    job.save(update_fields=['sync_log'])
+
+    try:
+        ParticipantRecordSync(api_config.token, sync_log, base_url=api_config.base_url).run(
+            on_progress=lease.check
+        )
+    except BaseException as e:
+        sync_log.mark_completed('failed', str(e) or e.__class__.__name__)
+        raise
+
+    sync_log.mark_completed('success')
@@ -0,0 +1,130 @@
+import codecs
+import json
+from typing import Dict, Iterable, Iterator
+
+WHITESPACE = ' \t\n\r'
+
+
+class StreamedPage:
+    """
+    Incrementally decode a paginated API response of the form
+    ``{"count": .., "next": .., "previous": .., "data": [{..}, ..]}``
+
+    Iterating yields the items of the array under ``array_key`` one at a
+    time, so only the record being decoded and a small read buffer are held
+    in memory. Every other top-level key is collected into ``meta``; keys
+    that come after the array are only available once iteration finishes.
+    """
+
+    BUFFER_TRIM = 64 * 1024
+
+    def __init__(self, chunks: Iterable[bytes], array_key: str = 'data'):
+        self.array_key = array_key
+        self.meta: Dict = {}
+        self.records_seen = 0
+        self.finished = False
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._decoder = json.JSONDecoder()
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+        self._started = False
+
+    def __iter__(self) -> Iterator[Dict]:
+        if self._started:
+            raise RuntimeError('StreamedPage can only be iterated once')
+        self._started = True
+
+        self._expect('{')
+        if self._peek() == '}':
+            self._pos += 1
+            self.finished = True
+            return
+
+        while True:
+            key = self._value()
+            self._expect(':')
+            if key == self.array_key and self._peek() == '[':
+                yield from self._array()
+            else:
+                self.meta[key] = self._value()
+
+            separator = self._next_char()
+            if separator == '}':
+                break
+            if separator != ',':
+                raise ValueError(f'Malformed JSON object: unexpected {separator!r}')
+        self.finished = True
+
+    def close(self):
+        """Release the underlying stream, e.g. when the caller stops early"""
+        close = getattr(self._chunks, 'close', None)
+        if close:
+            close()
+
+    def _array(self) -> Iterator[Dict]:
+        self._expect('[')
+        if self._peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            item = self._value()
+            self.records_seen += 1
+            yield item
+            separator = self._next_char()
+            if separator == ']':
+                return
+            if separator != ',':
+                raise ValueError(f'Malformed JSON array: unexpected {separator!r}')
+
+    def _fill(self) -> bool:
+        """Read the next chunk into the buffer; False once the stream is exhausted"""
+        if self._eof:
+            return False
+        if self._pos > self.BUFFER_TRIM:
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+        for chunk in self._chunks:
+            text = self._utf8.decode(chunk)
+            if text:
+                self._buf += text
+                return True
+        self._buf += self._utf8.decode(b'', final=True)
+        self._eof = True
+        return False
+
+    def _peek(self) -> str:
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                raise ValueError('Unexpected end of JSON stream')
+
+    def _next_char(self) -> str:
+        char = self._peek()
+        self._pos += 1
+        return char
+
+    def _expect(self, expected: str):
+        char = self._next_char()
+        if char != expected:
+            raise ValueError(f'Malformed JSON: expected {expected!r}, got {char!r}')
+
+    def _value(self):
+        """Decode one complete JSON value, reading more input until it is whole"""
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number or literal ending exactly at the buffer edge may continue
+            if end == len(self._buf) and not self._eof and self._fill():
+                continue
+            self._pos = end
+            return value
@@ -1,177 +1,159 @@
 from django.core.management.base import BaseCommand
+from django.utils import timezone
+from dashboard.field_profile import DatasetProfiler
 from dashboard.models import APIConfiguration
+from dashboard.page_archive import PageArchiveError, PageArchiveReader
 from dashboard.services import EiAMeliaAPIService
 import json
+import time
+
 
 class Command(BaseCommand):
-    help = 'Analyze API data structure and suggest model updates'
+    help = 'Profile every MELIA participant field and suggest AkilimoParticipant column changes'
 
     def add_arguments(self, parser):
-        parser.add_argument('--sample-size', type=int, default=100, help='Number of records to analyze')
+        parser.add_argument('--max-records', '--sample-size', dest='max_records', type=int,
+                            help='Stop after this many records (default: the whole dataset)')
+        parser.add_argument('--page-size', type=int, default=1000, help='Records per API page')
+        parser.add_argument('--workers', type=int, default=2, help='Pages downloaded concurrently')
+        parser.add_argument('--replay', metavar='DIR',
+                            help='Profile a page archive written by sync_akilimo_data --record instead of the API')
+        parser.add_argument('--top-k', type=int, default=10, help='Most frequent values reported per field')
+        parser.add_argument('--enum-limit', type=int, default=32,
+                            help='Fields with at most this many distinct values are enum candidates')
+        parser.add_argument('--output', metavar='PATH',
+                            help='Write the JSON report to PATH ("-" for stdout)')
 
     def handle(self, *args, **options):
-        sample_size = options.get('sample_size')
-        
-        # Get API configuration
+        max_records = options.get('max_records')
+        replay_dir = options.get('replay')
+        output = options.get('output')
+        # Keep stdout clean when the JSON report goes there
+        log = self.stderr if output == '-' else self.stdout
+
+        profiler = DatasetProfiler(top_k=options['top_k'], enum_limit=options['enum_limit'])
+
         try:
-            api_config = APIConfiguration.objects.filter(is_active=True).first()
-            if not api_config:
-                self.stdout.write(self.style.ERROR('No API configuration found'))
-                return
+            if replay_dir:
+                try:
+                    archive = PageArchiveReader(replay_dir)
+                except PageArchiveError as e:
+                    log.write(self.style.ERROR(f'Cannot read archive: {e}'))
+                    return
+                source = f'archive {replay_dir}'
+                pages = archive.iter_pages()
+            else:
+                api_config = APIConfiguration.objects.filter(is_active=True).first()
+                if not api_config:
+                    log.write(self.style.ERROR('No API configuration found'))
+                    return
+                source = 'EiA MELIA API'
+                api_service = EiAMeliaAPIService(api_config.token, base_url=api_config.base_url)
+                pages = api_service.iter_participant_pages(
+                    'akilimo', page_size=options['page_size'], workers=options['workers']
+                )
+
+            limit = f'up to {max_records:,}' if max_records else 'all'
+            log.write(f'📊 Profiling {limit} records from {source}...')
+            started = time.monotonic()
+            self.profile(profiler, pages, max_records, log)
+            elapsed = time.monotonic() - started
         except Exception as e:
-            self.stdout.write(self.style.ERROR(f'Error getting API configuration: {e}'))
+            log.write(self.style.ERROR(f'Analysis failed: {e}'))
             return
 
-        self.stdout.write(f'📊 Analyzing {sample_size} records from EiA MELIA API...')
-        
+        if not profiler.records:
+            log.write(self.style.WARNING('No data returned'))
+            return
+
+        log.write(f'✅ Profiled {profiler.records:,} records in {elapsed:.1f}s')
+        report = profiler.report()
+        report.update({
+            'source': source,
+            'generated_at': timezone.now().isoformat(),
+            'seconds': round(elapsed, 2),
+        })
+
+        if output:
+            payload = json.dumps(report, indent=2, ensure_ascii=False)
+            if output == '-':
+                self.stdout.write(payload)
+            else:
+                with open(output, 'w', encoding='utf-8') as f:
+                    f.write(payload)
+                log.write(f'💾 Report written to {output}')
+
+        if output != '-':
+            self.print_summary(report)
+
+    def profile(self, profiler: DatasetProfiler, pages, max_records, log):
         try:
-            api_service = EiAMeliaAPIService(api_config.token)
-            
-            # Get sample data
-            response = api_service.get_participants_by_usecase('akilimo', page=1, page_size=sample_size)
-            data = response.get('data', [])
-            
-            if not data:
-                self.stdout.write(self.style.WARNING('No data returned from API'))
-                return
-            
-            self.stdout.write(f'✅ Retrieved {len(data)} records')
-            
-            # Analyze field usage and types
-            field_analysis = {}
-            
-            for record in data:
-                for key, value in record.items():
-                    if key not in field_analysis:
-                        field_analysis[key] = {
-                            'count': 0,
-                            'types': set(),
-                            'null_count': 0,
-                            'sample_values': set(),
-                            'max_length': 0
-                        }
-                    
-                    field_analysis[key]['count'] += 1
-                    
-                    if value is None:
-                        field_analysis[key]['null_count'] += 1
-                    else:
-                        field_analysis[key]['types'].add(type(value).__name__)
-                        str_value = str(value)
-                        field_analysis[key]['max_length'] = max(field_analysis[key]['max_length'], len(str_value))
-                        if len(field_analysis[key]['sample_values']) < 5:
-                            field_analysis[key]['sample_values'].add(str_value)
-            
-            # Print analysis
-            self.stdout.write('\n📈 FIELD ANALYSIS:')
-            self.stdout.write('=' * 80)
-            
-            for field, analysis in sorted(field_analysis.items()):
-                null_percentage = (analysis['null_count'] / analysis['count']) * 100
-                types = ', '.join(analysis['types'])
-                samples = ', '.join(list(analysis['sample_values'])[:3])
-                
-                self.stdout.write(f'\n🔍 {field}:')
-                self.stdout.write(f'   Types: {types}')
-                self.stdout.write(f'   Null: {analysis["null_count"]}/{analysis["count"]} ({null_percentage:.1f}%)')
-                self.stdout.write(f'   Max Length: {analysis["max_length"]}')
-                self.stdout.write(f'   Samples: {samples}')
-            
-            # Suggest updated model
-            self.stdout.write('\n💡 SUGGESTED MODEL UPDATES:')
-            self.stdout.write('=' * 80)
-            
-            # Map API fields to appropriate Django field types
-            field_mappings = {
-                'id': 'models.BigIntegerField(unique=True)',
-                'usecase': 'models.CharField(max_length=50)',
-                'country': 'models.CharField(max_length=50)',
-                'source_submitted_on': 'models.DateTimeField(null=True, blank=True)',
-                'usecase_stage': 'models.CharField(max_length=50, null=True, blank=True)',
-                'created_on': 'models.DateTimeField(null=True, blank=True)',
-                'source_id': 'models.CharField(max_length=100, null=True, blank=True)',
-                'data_source': 'models.CharField(max_length=50, null=True, blank=True)',
-                'event_date': 'models.DateField(null=True, blank=True)',
-                'event_year': 'models.IntegerField(null=True, blank=True)',
-                'event_month': 'models.IntegerField(null=True, blank=True)',
-                'event_type': 'models.CharField(max_length=100, null=True, blank=True)',
-                'partner': 'models.CharField(max_length=100, null=True, blank=True)',
-                'thematic_area': 'models.TextField(null=True, blank=True)',
-                'thematic_area_overall': 'models.TextField(null=True, blank=True)',
-                'event_format': 'models.CharField(max_length=50, null=True, blank=True)',
-                'crop': 'models.CharField(max_length=50, null=True, blank=True)',
-                'org_first_name': 'models.CharField(max_length=100, null=True, blank=True)',
-                'org_surname': 'models.CharField(max_length=100, null=True, blank=True)',
-                'org_phone_no': 'models.CharField(max_length=20, null=True, blank=True)',
-                'farmer_first_name': 'models.CharField(max_length=100, null=True, blank=True)',
-                'farmer_surname': 'models.CharField(max_length=100, null=True, blank=True)',
-                'farmer_id': 'models.CharField(max_length=100, null=True, blank=True)',
-                'farmer_gender': 'models.CharField(max_length=20, null=True, blank=True)',
-                'farmer_age': 'models.CharField(max_length=10, null=True, blank=True)',
-                'age_category': 'models.CharField(max_length=20, null=True, blank=True)',
-                'farmer_organization': 'models.CharField(max_length=200, null=True, blank=True)',
-                'farmer_position': 'models.CharField(max_length=100, null=True, blank=True)',
-                'farmer_phone_no': 'models.CharField(max_length=20, null=True, blank=True)',
-                'farmer_own_phone': 'models.CharField(max_length=10, null=True, blank=True)',
-                'farmer_relationship': 'models.CharField(max_length=100, null=True, blank=True)',
-                'participants_type': 'models.CharField(max_length=50, null=True, blank=True)',
-                'admin_level1': 'models.CharField(max_length=100, null=True, blank=True)',  # State
-                'admin_level2': 'models.CharField(max_length=100, null=True, blank=True)',  # LGA
-                'event_city': 'models.CharField(max_length=200, null=True, blank=True)',
-                'event_venue': 'models.CharField(max_length=500, null=True, blank=True)',
-                'event_geopoint': 'models.CharField(max_length=100, null=True, blank=True)',
-            }
-            
-            self.stdout.write('\nclass AkilimoParticipant(models.Model):')
-            self.stdout.write('    """Updated model based on actual API data"""')
-            
-            for field, django_field in field_mappings.items():
-                if field in field_analysis:
-                    self.stdout.write(f'    {field} = {django_field}')
-            
-            self.stdout.write('    raw_data = models.JSONField(default=dict)')
-            self.stdout.write('    created_at = models.DateTimeField(auto_now_add=True)')
-            self.stdout.write('    updated_at = models.DateTimeField(auto_now=True)')
-            
-            # Suggest visualizations based on actual data
-            self.stdout.write('\n🎨 VISUALIZATION OPPORTUNITIES:')
-            self.stdout.write('=' * 80)
-            
-            categorical_fields = ['farmer_gender', 'admin_level1', 'admin_level2', 'event_type', 
-                                'partner', 'age_category', 'event_format', 'crop', 'participants_type']
-            
-            geographic_fields = ['admin_level1', 'admin_level2', 'event_city', 'event_geopoint']
-            
-            time_fields = ['event_date', 'event_year', 'event_month', 'created_on']
-            
-            self.stdout.write('\n🥧 Categorical Data (Pie/Bar Charts):')
-            for field in categorical_fields:
-                if field in field_analysis:
-                    null_pct = (field_analysis[field]['null_count'] / field_analysis[field]['count']) * 100
-                    if null_pct < 50:  # Only suggest if less than 50% null
-                        self.stdout.write(f'   - {field} distribution')
-            
-            self.stdout.write('\n🗺️ Geographic Visualizations:')
-            for field in geographic_fields:
-                if field in field_analysis:
-                    null_pct = (field_analysis[field]['null_count'] / field_analysis[field]['count']) * 100
-                    if null_pct < 50:
-                        self.stdout.write(f'   - {field} distribution map')
-            
-            self.stdout.write('\n📅 Time-based Analysis:')
-            for field in time_fields:
-                if field in field_analysis:
-                    null_pct = (field_analysis[field]['null_count'] / field_analysis[field]['count']) * 100
-                    if null_pct < 50:
-                        self.stdout.write(f'   - {field} trends over time')
-            
-            self.stdout.write('\n🔗 Cross-Analysis Opportunities:')
-            self.stdout.write('   - Gender distribution by state (admin_level1)')
-            self.stdout.write('   - Event types by partner organization')
-            self.stdout.write('   - Age categories by geographic region')
-            self.stdout.write('   - Thematic areas by state/LGA')
-            self.stdout.write('   - Training events timeline by location')
-            self.stdout.write('   - Partner performance by region')
-            
-        except Exception as e:
-            self.stdout.write(self.style.ERROR(f'Analysis failed: {e}'))
\ No newline at end of file
+            for page, response in pages:
+                for record in response.get('data', []):
+                    profiler.add(record)
+                    if max_records and profiler.records >= max_records:
+                        return
+                if page % 50 == 0:
+                    log.write(f'   ...{profiler.records:,} records')
+        finally:
+            close = getattr(pages, 'close', None)
+            if close:
+                close()
+
+    def print_summary(self, report):
+        records = report['records']
+        self.stdout.write('\n📈 FIELD PROFILE:')
+        self.stdout.write('=' * 80)
+        self.stdout.write(f'{"field":<24} {"null%":>6} {"max len":>7} {"distinct":>9}  {"types":<16} column')
+        for name, stats in report['fields'].items():
+            suggestion = stats['suggestion']
+            distinct = f'{stats["distinct"]:,}' + ('' if stats['distinct_exact'] else '~')
+            types = ','.join(stats['types']) or '-'
+            self.stdout.write(
+                f'{name:<24} {stats["null_rate"] * 100:>5.1f}% {stats["max_length"]:>7} {distinct:>9}  '
+                f'{types:<16} {suggestion["column"] or "(raw_data only)"}'
+            )
+
+        fields = report['fields'].items()
+        truncated = [(n, s) for n, s in fields if s['suggestion'].get('truncated')]
+        enums = [(n, s) for n, s in fields if s['suggestion']['enum_candidate']]
+        indexes = [(n, s) for n, s in fields
+                   if s['suggestion']['index_candidate'] and s['suggestion']['column']
+                   and not s['suggestion']['indexed']]
+        unique = [(n, s) for n, s in fields if s['suggestion']['unique_candidate']]
+
+        self.stdout.write('\n💡 SUGGESTIONS:')
+        self.stdout.write('=' * 80)
+        if truncated:
+            self.stdout.write('\n✂️  Values longer than their column (truncated on sync):')
+            for name, stats in truncated:
+                width = stats['suggestion']['suggested_max_length']
+                target = f'max_length={width}' if width else 'TextField'
+                self.stdout.write(
+                    f'   - {stats["suggestion"]["column"]}: max_length={stats["suggestion"]["current_max_length"]}, '
+                    f'longest value {stats["max_length"]} → {target}'
+                )
+
+        if enums:
+            self.stdout.write('\n🏷️  Enum candidates (few distinct values):')
+            for name, stats in enums:
+                values = ', '.join(repr(v['value']) for v in stats['top_values'][:6])
+                self.stdout.write(f'   - {name} ({stats["distinct"]} values): {values}')
+
+        if indexes:
+            self.stdout.write('\n🗂️  Unindexed low-cardinality columns (filter/group-by index candidates):')
+            for name, stats in indexes:
+                self.stdout.write(
+                    f'   - {stats["suggestion"]["column"]} ({stats["distinct"]:,} values, '
+                    f'{stats["null_rate"]:.0%} null)'
+                )
+
+        if unique:
+            self.stdout.write('\n🔑 Unique in every record seen:')
+            for name, stats in unique:
+                self.stdout.write(f'   - {name}')
+
+        if records < 1000:
+            self.stdout.write(self.style.WARNING(
+                f'\n⚠️  Only {records:,} records profiled; suggestions may not hold for the full dataset'
+            ))
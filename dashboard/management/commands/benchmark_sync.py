@@ -0,0 +1,102 @@
+import json
+import shlex
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from dashboard.benchmark import SyncProfiler
+from dashboard.melia_stub import StubMeliaServer
+from dashboard.models import APIConfiguration, DataSyncLog
+
+
+class Command(BaseCommand):
+    help = 'Benchmark sync_akilimo_data against a local stub MELIA API in a throwaway database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--records', type=int, default=5000, help='Number of synthetic participants')
+        parser.add_argument('--latency', type=float, default=0.02, help='Seconds the stub adds to every page')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Share of pages the stub fails with a 502')
+        parser.add_argument('--payload-bytes', type=int, default=0, help='Extra padding bytes per record')
+        parser.add_argument('--max-page-size', type=int, default=None,
+                            help='Refuse larger pages with a 503 and Retry-After')
+        parser.add_argument('--runs', type=int, default=2,
+                            help='Consecutive syncs; the first inserts, later ones exercise the existing-row path')
+        parser.add_argument('--sync-args', type=str, default='--batch-size 100',
+                            help='Options passed through to sync_akilimo_data, e.g. "--stream --force"')
+        parser.add_argument('--no-memory', action='store_true',
+                            help='Skip tracemalloc peak memory tracking (it slows the run down)')
+        parser.add_argument('--keepdb', action='store_true', help='Keep the benchmark database between runs')
+        parser.add_argument('--json', type=str, metavar='PATH', help='Also write the report to PATH as JSON')
+        parser.add_argument('--show-output', action='store_true', help='Show sync_akilimo_data output')
+
+    def handle(self, *args, **options):
+        sync_args = shlex.split(options['sync_args'])
+
+        self.stdout.write(f'⏱️  Sync benchmark: {options["records"]:,} records, {options["runs"]} run(s)')
+        self.stdout.write(f'   Stub latency: {options["latency"]}s, error rate: {options["error_rate"]:.0%}, '
+                          f'padding: {options["payload_bytes"]} bytes/record')
+        self.stdout.write(f'   sync_akilimo_data {" ".join(sync_args)}')
+
+        # Never touch the real participant table: sync into a test database
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False, keepdb=options['keepdb']
+        )
+        stub = StubMeliaServer(
+            records=options['records'],
+            latency=options['latency'],
+            error_rate=options['error_rate'],
+            payload_bytes=options['payload_bytes'],
+            max_page_size=options['max_page_size'],
+        )
+
+        runs = []
+        try:
+            with stub:
+                APIConfiguration.objects.update(is_active=False)
+                APIConfiguration.objects.update_or_create(
+                    name='Benchmark stub',
+                    defaults={'token': 'benchmark', 'base_url': stub.base_url, 'is_active': True}
+                )
+
+                for run in range(1, options['runs'] + 1):
+                    output = None if options['show_output'] else StringIO()
+                    with SyncProfiler(trace_memory=not options['no_memory']) as profiler:
+                        call_command('sync_akilimo_data', *sync_args, stdout=output)
+
+                    sync_log = DataSyncLog.objects.filter(sync_type='akilimo_participants').first()
+                    result = profiler.report(sync_log.records_processed if sync_log else 0)
+                    result['run'] = run
+                    result['status'] = sync_log.status if sync_log else None
+                    runs.append(result)
+                    self.print_run(result)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+
+        if options['json']:
+            report = {
+                'records': options['records'],
+                'latency': options['latency'],
+                'error_rate': options['error_rate'],
+                'payload_bytes': options['payload_bytes'],
+                'sync_args': sync_args,
+                'database': connection.vendor,
+                'runs': runs,
+            }
+            with open(options['json'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f'\n💾 Report written to {options["json"]}')
+
+    def print_run(self, result):
+        stages = result['stage_seconds']
+        memory = f'{result["peak_memory_mb"]:.1f} MB' if result['peak_memory_mb'] is not None else 'n/a'
+        style = self.style.SUCCESS if result['status'] == 'success' else self.style.WARNING
+        self.stdout.write(style(f'\n🏁 Run {result["run"]} ({result["status"]})'))
+        self.stdout.write(f'   📊 Records: {result["records"]:,} in {result["wall_seconds"]:.2f}s '
+                          f'→ {result["records_per_second"] or 0:,.0f} records/s')
+        self.stdout.write(f'   🗄️  Queries: {result["queries"]:,} ({result["queries_per_record"] or 0:.3f} per record)')
+        self.stdout.write(f'   🌐 HTTP requests: {result["http_requests"]:,}')
+        self.stdout.write(f'   🧠 Peak memory: {memory}')
+        self.stdout.write(
+            f'   ⏳ Stages: http {stages["http"]:.2f}s (summed over workers), '
+            f'normalize {stages["normalize"]:.2f}s, db {stages["db"]:.2f}s, other {stages["other"]:.2f}s'
+        )
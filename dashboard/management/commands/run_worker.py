@@ -0,0 +1,69 @@
+import os
+import socket
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from dashboard.jobs import JOB_HANDLERS, run_job
+from dashboard.models import SyncJob
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Run queued background sync jobs (safe to start several workers)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Exit when the queue is empty instead of polling (for cron)')
+        parser.add_argument('--poll-interval', type=float, default=5.0,
+                            help='Seconds to wait between polls when the queue is empty')
+        parser.add_argument('--lease', type=int, default=300,
+                            help='Seconds a claimed job stays reserved without a heartbeat')
+        parser.add_argument('--max-jobs', type=int, default=None, help='Exit after running this many jobs')
+        parser.add_argument('--job-type', action='append', choices=sorted(JOB_HANDLERS),
+                            help='Only run jobs of this type (repeatable)')
+
+    def handle(self, *args, **options):
+        worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        once = options.get('once')
+        poll_interval = options.get('poll_interval')
+        lease = options.get('lease')
+        max_jobs = options.get('max_jobs')
+        job_types = options.get('job_type')
+
+        self.stdout.write(f'👷 Worker {worker_id} started (lease {lease}s)')
+
+        jobs_run = 0
+        job = None
+        try:
+            while max_jobs is None or jobs_run < max_jobs:
+                close_old_connections()
+                job = SyncJob.claim_next(worker_id, lease_seconds=lease, job_types=job_types)
+                if job is None:
+                    if once:
+                        break
+                    time.sleep(poll_interval)
+                    continue
+
+                self.stdout.write(f'\n▶️  Job #{job.pk} ({job.job_type}), attempt {job.attempts}/{job.max_attempts}')
+                started = time.monotonic()
+                succeeded = run_job(job, lease_seconds=lease)
+                elapsed = time.monotonic() - started
+                if succeeded:
+                    self.stdout.write(self.style.SUCCESS(f'✅ Job #{job.pk} finished in {elapsed:.1f}s'))
+                else:
+                    job.refresh_from_db()
+                    self.stdout.write(self.style.ERROR(
+                        f'❌ Job #{job.pk} {job.status} after {elapsed:.1f}s: {job.error_message or "lease lost"}'
+                    ))
+                job = None
+                jobs_run += 1
+        except KeyboardInterrupt:
+            if job is not None:
+                job.release()
+                self.stdout.write(self.style.WARNING(f'\n↩️  Job #{job.pk} returned to the queue'))
+            self.stdout.write('👋 Worker stopped')
+            return
+
+        self.stdout.write(f'👋 Worker {worker_id} done — {jobs_run} job(s) run')
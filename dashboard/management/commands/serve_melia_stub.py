@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from dashboard.melia_stub import StubMeliaServer
+
+
+class Command(BaseCommand):
+    help = 'Serve synthetic MELIA participant pages locally for sync testing and benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=8765, help='Port to listen on')
+        parser.add_argument('--host', type=str, default='127.0.0.1', help='Interface to bind')
+        parser.add_argument('--records', type=int, default=10000, help='Number of synthetic participants')
+        parser.add_argument('--latency', type=float, default=0.05, help='Seconds added to every page')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Share of pages answered with a 502 (0-1)')
+        parser.add_argument('--payload-bytes', type=int, default=0, help='Extra padding bytes per record')
+        parser.add_argument('--max-page-size', type=int, default=None,
+                            help='Refuse larger pages with a 503 and Retry-After')
+
+    def handle(self, *args, **options):
+        server = StubMeliaServer(
+            records=options['records'],
+            latency=options['latency'],
+            error_rate=options['error_rate'],
+            payload_bytes=options['payload_bytes'],
+            max_page_size=options['max_page_size'],
+            host=options['host'],
+            port=options['port'],
+        )
+
+        self.stdout.write(f'🧪 Stub MELIA API serving {options["records"]:,} participants')
+        self.stdout.write(f'   Base URL: {server.base_url}')
+        self.stdout.write(f'   Latency: {options["latency"]}s, error rate: {options["error_rate"]:.0%}, '
+                          f'padding: {options["payload_bytes"]} bytes/record')
+        self.stdout.write(
+            f'   Point a configuration at it with: '
+            f'python manage.py setup_api --name "Stub MELIA" --token stub --url {server.base_url}'
+        )
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            self.stdout.write('\n👋 Stub stopped')
@@ -1,12 +1,37 @@
+import json
+from itertools import islice
 from django.core.management.base import BaseCommand
-from django.utils import timezone
-from django.utils.dateparse import parse_datetime, parse_date
+from django.db import connection, transaction
+from django.db.models import Max
 from dashboard.models import APIConfiguration, AkilimoParticipant, DataSyncLog
-from dashboard.services import EiAMeliaAPIService
+from dashboard.benchmark import SyncCostEstimator, sample_page_numbers
+from dashboard.http_cache import get_http_cache
+from dashboard.http_client import connection_stats
+from dashboard.page_archive import PageArchiveError, PageArchiveReader, PageArchiveWriter
+from dashboard.partitioned_sync import PartitionedSync, plan_partitions
+from dashboard.reconciliation import DeletionReconciler, ExternalIdSet
+from dashboard.services import AdaptivePageSize, EiAMeliaAPIService, PageFetchError
+from dashboard.sync_pipeline import SyncPipeline
+from dashboard.sync_service import ParticipantBulkWriter
 import logging
 
 logger = logging.getLogger(__name__)
 
+
+class PageWork:
+    """One API page on its way through the sync pipeline"""
+
+    def __init__(self, page, records, envelope=None, page_size=None):
+        self.page = page
+        self.page_size = page_size
+        self.records = records  # raw records; a lazy iterator for streamed pages
+        self.envelope = envelope  # count/next/previous (a StreamedPage when streaming)
+        self.record_count = len(records) if isinstance(records, list) else 0
+        self.chunks = None  # normalized rows, when normalized ahead of the writer
+        self.recording = None
+        self.progress = {'reached_known': False}
+
+
 class Command(BaseCommand):
     help = 'Sync Akilimo participant data from EiA MELIA API to new model structure'
 
@@ -14,53 +39,216 @@ class Command(BaseCommand):
         parser.add_argument('--batch-size', type=int, default=50, help='Number of records per API page/batch')
         parser.add_argument('--max-records', type=int, default=None,
                             help='Maximum total records to sync (omit to sync ALL available records)')
-        parser.add_argument('--dry-run', action='store_true', help='Show what would be synced without saving')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Profile sample pages and project the full sync without saving anything')
+        parser.add_argument('--sample-pages', type=int, default=3,
+                            help='Pages fetched and test-written (then rolled back) by --dry-run')
         parser.add_argument('--force', action='store_true', help='Update existing records')
+        parser.add_argument('--incremental', action='store_true',
+                            help='Only fetch records newer than the last successful sync watermark')
+        parser.add_argument('--stream', action='store_true',
+                            help='Decode API pages incrementally to keep memory flat (disables prefetching)')
+        parser.add_argument('--resume', action='store_true',
+                            help='Continue the most recent unfinished sync from its last checkpoint')
+        parser.add_argument('--fetch-workers', type=int, default=2,
+                            help='Number of API pages to download concurrently ahead of the writer')
+        parser.add_argument('--adaptive-page-size', action='store_true',
+                            help='Start at --batch-size and let page sizes grow or shrink with API latency and errors')
+        parser.add_argument('--target-latency', type=float, default=10.0,
+                            help='Seconds per page above which --adaptive-page-size shrinks pages')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Split a full sync across N worker processes by page range')
+        parser.add_argument('--partition-retries', type=int, default=2,
+                            help='Times a failed partition is retried from its checkpoint (with --workers)')
+        parser.add_argument('--http-cache', action='store_true',
+                            help='Fetch pages through the on-disk HTTP cache, revalidating with ETag/Last-Modified')
+        parser.add_argument('--record', metavar='DIR',
+                            help='Archive every fetched page to DIR as compressed NDJSON')
+        parser.add_argument('--replay', metavar='DIR',
+                            help='Sync from pages archived with --record instead of the API')
+        parser.add_argument('--reconcile', action='store_true',
+                            help='After a complete full sync, delete local participants no longer listed upstream')
+        parser.add_argument('--max-delete-ratio', type=float, default=0.05,
+                            help='Refuse to reconcile when more than this share of participants would be deleted')
 
     def handle(self, *args, **options):
         batch_size = options.get('batch_size')
         max_records = options.get('max_records')
         dry_run = options.get('dry_run')
         force_update = options.get('force')
+        fetch_workers = options.get('fetch_workers')
+        incremental = options.get('incremental')
+        resume = options.get('resume')
+        stream = options.get('stream')
+        record_dir = options.get('record')
+        replay_dir = options.get('replay')
+        use_cache = options.get('http_cache')
+        workers = max(1, options.get('workers') or 1)
+        reconcile = options.get('reconcile')
+        adaptive = options.get('adaptive_page_size')
 
         self.stdout.write(f'🚀 Starting Akilimo data sync...')
         self.stdout.write(f'   Batch size: {batch_size}')
         self.stdout.write(f'   Max records: {max_records}')
         self.stdout.write(f'   Dry run: {dry_run}')
         self.stdout.write(f'   Force update: {force_update}')
+        self.stdout.write(f'   Fetch workers: {fetch_workers}')
+        self.stdout.write(f'   Incremental: {incremental}')
+        self.stdout.write(f'   Resume: {resume}')
+        self.stdout.write(f'   Stream: {stream}')
+        self.stdout.write(f'   HTTP cache: {use_cache}')
+        self.stdout.write(f'   Workers: {workers}')
+        self.stdout.write(f'   Adaptive page size: {adaptive}')
+        self.stdout.write(f'   Reconcile deletions: {reconcile}')
+        if record_dir:
+            self.stdout.write(f'   Record to: {record_dir}')
+        if replay_dir:
+            self.stdout.write(f'   Replay from: {replay_dir}')
 
-        # Get API configuration
-        try:
-            api_config = APIConfiguration.objects.filter(is_active=True).first()
-            if not api_config or not api_config.token:
-                self.stdout.write(
-                    self.style.ERROR('No active API configuration found. Please run setup_api command first.')
-                )
+        if use_cache and stream:
+            self.stdout.write(self.style.WARNING('   --http-cache has no effect on streamed pages'))
+
+        if workers > 1 and (incremental or resume or record_dir or replay_dir):
+            self.stdout.write(self.style.ERROR(
+                '--workers runs a full sync and cannot be combined with --incremental, --resume, --record or --replay'
+            ))
+            return
+
+        if workers > 1 and connection.vendor == 'sqlite':
+            self.stdout.write(self.style.WARNING(
+                '   SQLite allows a single writer at a time — ignoring --workers and syncing in one process'
+            ))
+            workers = 1
+
+        if reconcile and (incremental or max_records is not None or workers > 1):
+            self.stdout.write(self.style.ERROR(
+                '--reconcile needs every upstream id, so it cannot be combined with '
+                '--incremental, --max-records or --workers'
+            ))
+            return
+
+        if adaptive and (incremental or stream or record_dir or replay_dir or workers > 1):
+            self.stdout.write(self.style.ERROR(
+                '--adaptive-page-size cannot be combined with --incremental, --stream, --record, --replay or --workers'
+            ))
+            return
+
+        if record_dir and replay_dir:
+            self.stdout.write(self.style.ERROR('--record and --replay cannot be combined'))
+            return
+
+        sync_type = 'akilimo_participants'
+        archive = None
+        if replay_dir:
+            try:
+                archive = PageArchiveReader(replay_dir)
+            except PageArchiveError as e:
+                self.stdout.write(self.style.ERROR(f'Cannot replay archive: {e}'))
                 return
-        except Exception as e:
+
+            # Replays get their own sync type so they never move the API watermark
+            # or get picked up by a --resume against the live API
+            sync_type = 'akilimo_participants_replay'
+            if batch_size != archive.page_size:
+                self.stdout.write(self.style.WARNING(
+                    f'   Using archived page size {archive.page_size} instead of {batch_size}'
+                ))
+                batch_size = archive.page_size
+            if incremental:
+                self.stdout.write(self.style.WARNING('   --incremental ignored while replaying'))
+                incremental = False
+            stream = False  # archived pages are already read lazily
+
             self.stdout.write(
-                self.style.ERROR(f'Error getting API configuration: {e}')
+                f'📼 Replaying {len(archive.pages):,} archived pages '
+                f'({archive.record_count:,} records) from {replay_dir}'
             )
-            return
+        else:
+            # Get API configuration
+            try:
+                api_config = APIConfiguration.objects.filter(is_active=True).first()
+                if not api_config or not api_config.token:
+                    self.stdout.write(
+                        self.style.ERROR('No active API configuration found. Please run setup_api command first.')
+                    )
+                    return
+            except Exception as e:
+                self.stdout.write(
+                    self.style.ERROR(f'Error getting API configuration: {e}')
+                )
+                return
 
-        self.stdout.write(f'✅ Using API: {api_config.name} ({api_config.base_url})')
+            self.stdout.write(f'✅ Using API: {api_config.name} ({api_config.base_url})')
 
-        # Create sync log entry
-        if not dry_run:
+        # Pick up an interrupted sync, or create a new sync log entry
+        start_page = 1
+        resumed_log = None
+        if resume and not dry_run:
+            resumed_log = DataSyncLog.latest_resumable(sync_type)
+            if resumed_log and archive and resumed_log.checkpoint_page_size != batch_size:
+                self.stdout.write(self.style.WARNING(
+                    f'⏯️  Sync #{resumed_log.pk} used a different page size than this archive — starting from page 1'
+                ))
+                resumed_log = None
+            if resumed_log:
+                start_page = resumed_log.checkpoint_page + 1
+                if resumed_log.checkpoint_page_size != batch_size:
+                    self.stdout.write(self.style.WARNING(
+                        f'   Using checkpoint page size {resumed_log.checkpoint_page_size} instead of {batch_size}'
+                    ))
+                    batch_size = resumed_log.checkpoint_page_size
+                if incremental:
+                    self.stdout.write(self.style.WARNING('   --incremental ignored while resuming'))
+                    incremental = False
+                if reconcile:
+                    self.stdout.write(self.style.WARNING(
+                        '   --reconcile ignored while resuming: earlier pages were not seen by this run'
+                    ))
+                    reconcile = False
+                self.stdout.write(
+                    f'⏯️  Resuming sync #{resumed_log.pk} ({resumed_log.status}) from page {start_page}'
+                )
+            else:
+                self.stdout.write(self.style.WARNING('⏯️  No unfinished sync to resume — starting from page 1'))
+
+        if resumed_log:
+            sync_log = resumed_log
+            sync_log.status = 'started'
+            sync_log.error_message = None
+            sync_log.completed_at = None
+            sync_log.save(update_fields=['status', 'error_message', 'completed_at'])
+        elif not dry_run:
             sync_log = DataSyncLog.objects.create(
-                sync_type='akilimo_participants',
+                sync_type=sync_type,
                 status='started'
             )
 
         try:
-            # Initialize API service — pass base_url from database config
-            api_service = EiAMeliaAPIService(api_config.token, base_url=api_config.base_url)
-            
-            # Get first page to understand total records
-            first_response = api_service.get_participants_by_usecase('akilimo', page=1, page_size=1)
-            total_available = first_response.get('count', 0)
+            if archive:
+                api_service = None
+                total_available = archive.record_count
+            else:
+                # Initialize API service — pass base_url from database config
+                api_service = EiAMeliaAPIService(api_config.token, base_url=api_config.base_url)
+
+                # Get first page to understand total records
+                first_response = api_service.fetch_participants_page('akilimo', page=1, page_size=1)
+                total_available = first_response.get('count', 0)
             
             self.stdout.write(f'📊 Total records available: {total_available:,}')
+
+            # Incremental runs only walk pages newer than the last watermark
+            watermark_id = None
+            if incremental:
+                watermark_log = DataSyncLog.latest_watermark('akilimo_participants')
+                if watermark_log:
+                    watermark_id = watermark_log.watermark_external_id
+                    self.stdout.write(
+                        f'🔖 Watermark: external_id {watermark_id:,} '
+                        f'(created {watermark_log.watermark_created_on}, sync #{watermark_log.pk})'
+                    )
+                else:
+                    self.stdout.write(self.style.WARNING('🔖 No watermark yet — running a full sync'))
             
             if max_records is not None:
                 total_to_sync = min(max_records, total_available)
@@ -73,114 +261,260 @@ class Command(BaseCommand):
                 self.stdout.write(self.style.WARNING('🔍 DRY RUN - No data will be saved'))
                 
                 # Show sample of what would be processed
-                sample_response = api_service.get_participants_by_usecase('akilimo', page=1, page_size=3)
-                sample_data = sample_response.get('data', [])
+                if archive:
+                    sample_data = list(islice(archive.iter_records(archive.pages[0]), 3)) if archive.pages else []
+                else:
+                    sample_response = api_service.get_participants_by_usecase('akilimo', page=1, page_size=3)
+                    sample_data = sample_response.get('data', [])
                 
                 self.stdout.write(f'\n📋 Sample of {len(sample_data)} records that would be processed:')
                 for i, record in enumerate(sample_data, 1):
                     self.stdout.write(f'   {i}. ID: {record.get("id")}, Name: {record.get("farmer_first_name")} {record.get("farmer_surname")}, Location: {record.get("admin_level1")}')
+
+                self.estimate_sync(
+                    api_service, archive, total_to_sync if total_to_sync is not None else total_available,
+                    batch_size, fetch_workers, force_update, options.get('sample_pages')
+                )
+
+                if workers > 1:
+                    last_page = -(-(total_to_sync or total_available) // batch_size)
+                    ranges = plan_partitions(1, max(last_page, 1), workers * 4)
+                    self.stdout.write(f'\n🧩 {len(ranges)} partitions across {workers} workers:')
+                    for first, last in ranges:
+                        self.stdout.write(f'   pages {first}-{last}')
                 
                 return
 
-            # Sync data in batches
-            total_processed = 0
-            total_created = 0
-            total_updated = 0
-            total_skipped = 0
-            page = 1
-            has_next = True
+            if workers > 1:
+                self.run_partitioned(
+                    sync_log, api_config, total_available, total_to_sync, batch_size, workers, options
+                )
+                return
 
-            while has_next:
-                # Stop early if a record cap was requested
-                if total_to_sync is not None and total_processed >= total_to_sync:
-                    break
+            # Sync data in batches (a resumed sync carries on from its saved totals)
+            total_processed = sync_log.records_processed
+            total_created = sync_log.records_created
+            total_updated = sync_log.records_updated
+            total_unchanged = sync_log.records_unchanged
+            total_skipped = sync_log.records_skipped
+            seen_ids = ExternalIdSet() if reconcile else None
+            writer = ParticipantBulkWriter(force_update=force_update, seen_ids=seen_ids)
 
-                # Shrink last batch to honour the cap exactly
+            reached_end = True
+            stop_reason = None
+            page_sizer = None
+
+            recorder = None
+            if record_dir:
+                try:
+                    recorder = PageArchiveWriter(record_dir, batch_size, source_url=api_service.BASE_URL)
+                except (OSError, PageArchiveError) as e:
+                    raise PageArchiveError(f'Cannot record to {record_dir}: {e}')
+
+            if watermark_id is not None:
+                pages = self.get_incremental_pages(
+                    api_service, first_response, total_available, batch_size, watermark_id, fetch_workers, stream,
+                    use_cache
+                )
+            else:
+                # Keep the page size fixed so page offsets stay aligned; the cap is
+                # honoured by trimming the last page instead
+                end_page = None
                 if total_to_sync is not None:
-                    remaining = total_to_sync - total_processed
-                    current_batch_size = min(batch_size, remaining)
-                else:
-                    current_batch_size = batch_size
+                    end_page = max(1, -(-total_to_sync // batch_size))
 
-                self.stdout.write(f'\n📦 Processing batch {page} ({current_batch_size} records)...')
+                if archive:
+                    pages = archive.iter_pages(start_page=start_page, end_page=end_page)
+                elif stream:
+                    pages = api_service.iter_streamed_pages(
+                        'akilimo',
+                        page_size=batch_size,
+                        start_page=start_page,
+                        end_page=end_page
+                    )
+                elif adaptive:
+                    page_sizer = AdaptivePageSize(batch_size, target_latency=options.get('target_latency'))
+                    pages = api_service.iter_adaptive_pages(
+                        'akilimo',
+                        page_sizer,
+                        end_record=total_to_sync if total_to_sync is not None else total_available,
+                        start_record=(start_page - 1) * batch_size
+                    )
+                else:
+                    last_page = end_page or -(-total_available // batch_size)
+                    pages = api_service.iter_page_bodies(
+                        'akilimo',
+                        range(start_page, last_page + 1),
+                        page_size=batch_size,
+                        workers=fetch_workers,
+                        use_cache=use_cache
+                    )
 
-                # Retry up to 3 times on transient errors (502, 503, timeout)
-                max_retries = 3
-                retry_delay = 5  # seconds between retries
-                response = None
+            # Records still allowed through by --max-records
+            cap = {'remaining': total_to_sync - total_processed} if total_to_sync is not None else None
 
-                for attempt in range(1, max_retries + 1):
+            def decode_page(item):
+                # Adaptive sources also say which page size they used
+                page, response = item[:2]
+                page_size = item[2] if len(item) > 2 else batch_size
+                if stream:
+                    # A streamed page decodes records lazily as the writer consumes them
+                    return PageWork(page, iter(response), envelope=response, page_size=page_size)
+                if isinstance(response, bytes):
                     try:
-                        response = api_service.get_participants_by_usecase(
-                            'akilimo',
-                            page=page,
-                            page_size=current_batch_size
-                        )
-                        break  # success — exit retry loop
-                    except Exception as e:
-                        self.stdout.write(
-                            f'   ⚠️  Attempt {attempt}/{max_retries} failed: {e}'
-                        )
-                        if attempt < max_retries:
-                            import time
-                            self.stdout.write(f'   ⏳ Retrying in {retry_delay}s...')
-                            time.sleep(retry_delay)
-                            retry_delay *= 2  # exponential back-off
-                        else:
-                            self.stdout.write(f'❌ Batch {page} failed after {max_retries} attempts — stopping.')
-                            has_next = False
+                        response = json.loads(response)
+                    except ValueError as e:
+                        raise PageFetchError(page, 1, e)
+                records = list(response.pop('data', None) or [])
+                return PageWork(page, records, envelope=response, page_size=page_size)
 
-                if response is None:
-                    break
+            def normalize_page(work):
+                records = work.records
+                # Archive the full page, before the watermark and cap filters
+                if recorder:
+                    work.recording = recorder.tee(work.page, records)
+                    records = work.recording
+                if watermark_id is not None:
+                    records = self.newer_than(records, watermark_id, work.progress)
+                if cap is not None:
+                    records = self.take(records, cap)
+                if stream:
+                    work.records = records
+                else:
+                    work.chunks = writer.normalize_page(records)
+                return work
 
-                try:
-                    participants_data = response.get('data', [])
+            def discard_page(work):
+                if isinstance(work, PageWork) and work.recording:
+                    work.recording.discard()
 
-                    if not participants_data:
-                        self.stdout.write('⚠️  No more data available')
-                        break
+            # fetch → decode → normalize run on their own threads, the writer on
+            # this one; streamed pages are decoded lazily, so they run inline
+            pipeline = SyncPipeline(
+                pages,
+                [('decode', decode_page), ('normalize', normalize_page)],
+                concurrent=not stream,
+                on_discard=discard_page,
+            )
+            page_works = iter(pipeline)
 
-                    # Check if the API signals more pages
-                    has_next = bool(response.get('next'))
+            try:
+                for work in page_works:
+                    page = work.page
+                    self.stdout.write(f'\n📦 Processing batch {page}...')
 
-                    # Process each participant in the batch
-                    batch_created = 0
-                    batch_updated = 0
-                    batch_skipped = 0
+                    try:
+                        # Upsert the whole batch and its checkpoint in one transaction
+                        with transaction.atomic():
+                            if work.chunks is not None:
+                                counts = writer.write_normalized(work.chunks)
+                            else:
+                                counts = writer.write_page(work.records)
+
+                            batch_created = counts['created']
+                            batch_updated = counts['updated']
+                            batch_unchanged = counts['unchanged']
+                            batch_skipped = counts['skipped']
+                            batch_processed = batch_created + batch_updated + batch_unchanged + batch_skipped
+                            work.record_count = batch_processed
+
+                            sync_log.records_processed = total_processed + batch_processed
+                            sync_log.records_created = total_created + batch_created
+                            sync_log.records_updated = total_updated + batch_updated
+                            sync_log.records_unchanged = total_unchanged + batch_unchanged
+                            sync_log.records_skipped = total_skipped + batch_skipped
+                            if watermark_id is None and batch_processed:
+                                sync_log.save_checkpoint(page, work.page_size)
+                    except PageFetchError:
+                        discard_page(work)
+                        raise
+                    except Exception as e:
+                        discard_page(work)
+                        self.stdout.write(f'❌ Error processing batch {page}: {e}')
+                        reached_end = False
+                        stop_reason = f'Batch {page} could not be written: {e}'
+                        break
+
+                    if work.recording:
+                        # A streamed page fills its meta in place as the rest is drained
+                        meta = work.envelope.meta if stream else work.envelope
+                        work.recording.finish(meta)
 
-                    for participant_data in participants_data:
-                        result = self.process_participant(participant_data, force_update)
-                        if result == 'created':
-                            batch_created += 1
-                        elif result == 'updated':
-                            batch_updated += 1
+                    if not batch_processed:
+                        if work.progress['reached_known']:
+                            self.stdout.write('🔖 Reached records already synced — incremental sync complete')
                         else:
-                            batch_skipped += 1
+                            self.stdout.write('⚠️  No more data available')
+                        break
 
-                    total_processed += len(participants_data)
+                    total_processed += batch_processed
                     total_created += batch_created
                     total_updated += batch_updated
+                    total_unchanged += batch_unchanged
                     total_skipped += batch_skipped
 
                     progress_denom = total_to_sync if total_to_sync else total_available
                     pct = (total_processed / progress_denom * 100) if progress_denom else 0
                     self.stdout.write(
-                        f'   ✅ Batch complete: {batch_created} created, {batch_updated} updated, {batch_skipped} skipped'
+                        f'   ✅ Batch complete: {batch_processed} records — '
+                        f'{batch_created} created, {batch_updated} updated, '
+                        f'{batch_unchanged} unchanged, {batch_skipped} skipped'
                     )
                     self.stdout.write(
                         f'   📈 Progress: {total_processed:,}/{progress_denom:,} ({pct:.1f}%)'
                     )
 
-                    page += 1
+                    if work.progress['reached_known']:
+                        self.stdout.write('🔖 Reached records already synced — incremental sync complete')
+                        break
+            except PageFetchError as e:
+                self.stdout.write(f'❌ Batch {e.page} failed after {e.attempts} attempts — stopping. ({e.error})')
+                reached_end = False
+                stop_reason = str(e)
+            finally:
+                page_works.close()
+                sync_log.stage_metrics = pipeline.report()
+                if page_sizer:
+                    sync_log.stage_metrics['page_sizing'] = page_sizer.report()
 
-                except Exception as e:
-                    self.stdout.write(f'❌ Error processing batch {page}: {e}')
-                    break
-            
             # Update sync log
             sync_log.records_processed = total_processed
             sync_log.records_created = total_created
             sync_log.records_updated = total_updated
+            sync_log.records_unchanged = total_unchanged
+            sync_log.records_skipped = total_skipped
+
+            if seen_ids is not None and not stop_reason:
+                self.reconcile_deletions(sync_log, seen_ids, options.get('max_delete_ratio'))
+
+            # Only advance the watermark once everything up to it is known to be stored
+            if reached_end and total_to_sync is None:
+                watermark = AkilimoParticipant.objects.aggregate(
+                    external_id=Max('external_id'),
+                    created_on=Max('api_created_on')
+                )
+                sync_log.watermark_external_id = watermark['external_id']
+                sync_log.watermark_created_on = watermark['created_on']
+
+            if stop_reason:
+                # Keep the checkpoint so --resume can pick up from here
+                sync_log.mark_completed('partial', stop_reason)
+                self.stdout.write(
+                    self.style.WARNING(
+                        f'\n⚠️  Sync stopped early — run with --resume to continue after page {sync_log.checkpoint_page}\n'
+                        f'   📊 Records processed: {total_processed:,}\n'
+                        f'   ✨ Records created: {total_created:,}\n'
+                        f'   🔄 Records updated: {total_updated:,}\n'
+                        f'   💤 Records unchanged: {total_unchanged:,}\n'
+                        f'   ⏭️  Records skipped: {total_skipped:,}'
+                    )
+                )
+                self.report_archive(recorder)
+                self.report_http_stats()
+                self.report_stage_metrics(sync_log.stage_metrics)
+                self.report_page_sizing(sync_log.stage_metrics)
+                return
+
             sync_log.mark_completed('success')
             
             self.stdout.write(
@@ -189,9 +523,16 @@ class Command(BaseCommand):
                     f'   📊 Records processed: {total_processed:,}\n'
                     f'   ✨ Records created: {total_created:,}\n'
                     f'   🔄 Records updated: {total_updated:,}\n'
+                    f'   💤 Records unchanged: {total_unchanged:,}\n'
                     f'   ⏭️  Records skipped: {total_skipped:,}'
                 )
             )
+            if seen_ids is not None:
+                self.stdout.write(f'   🗑️  Records deleted: {sync_log.records_deleted:,}')
+            self.report_archive(recorder)
+            self.report_http_stats()
+            self.report_stage_metrics(sync_log.stage_metrics)
+            self.report_page_sizing(sync_log.stage_metrics)
             
         except Exception as e:
             logger.error(f"Data sync failed: {e}")
@@ -202,104 +543,217 @@ class Command(BaseCommand):
                 self.style.ERROR(f'❌ Sync failed: {e}')
             )
 
-    def process_participant(self, participant_data, force_update=False):
-        """Process a single participant record"""
-        try:
-            external_id = participant_data.get('id')
-            if not external_id:
-                return 'skipped'
-            
-            # Check if record already exists
-            existing = AkilimoParticipant.objects.filter(external_id=external_id).first()
-            
-            if existing and not force_update:
-                return 'skipped'
-            
-            # Parse dates
-            event_date = None
-            if participant_data.get('event_date'):
-                try:
-                    event_date = parse_date(participant_data['event_date'])
-                except:
-                    pass
-            
-            source_submitted_on = None
-            if participant_data.get('source_submitted_on'):
-                try:
-                    source_submitted_on = parse_datetime(participant_data['source_submitted_on'])
-                except:
-                    pass
-            
-            api_created_on = None
-            if participant_data.get('created_on'):
-                try:
-                    api_created_on = parse_datetime(participant_data['created_on'])
-                except:
-                    pass
-            
-            def s(val, max_len=None):
-                """Convert to string, strip non-BMP chars, and truncate for MySQL."""
-                if val is None:
-                    return val
-                val = str(val)
-                # Remove characters outside BMP (4-byte emoji/special chars)
-                # that can break MySQL even with utf8mb4 in strict mode
-                val = val.encode('utf-8', errors='ignore').decode('utf-8')
-                return val[:max_len] if max_len else val
-
-            # Prepare data for model
-            model_data = {
-                'external_id': external_id,
-                'source_id': s(participant_data.get('source_id'), 100),
-                'usecase': s(participant_data.get('usecase', 'AKILIMO'), 50),
-                'usecase_ref_id': s(participant_data.get('usecase_ref_id'), 50),
-                'usecase_stage': s(participant_data.get('usecase_stage'), 50),
-                'country': s(participant_data.get('country'), 50),
-                'event_date': event_date,
-                'event_year': participant_data.get('event_year'),
-                'event_month': participant_data.get('event_month'),
-                'event_type': s(participant_data.get('event_type'), 100),
-                'event_format': s(participant_data.get('event_format'), 50),
-                'event_city': s(participant_data.get('event_city'), 500),
-                'event_venue': s(participant_data.get('event_venue'), 500),
-                'event_geopoint': s(participant_data.get('event_geopoint'), 100),
-                'farmer_first_name': s(participant_data.get('farmer_first_name'), 100),
-                'farmer_surname': s(participant_data.get('farmer_surname'), 100),
-                'farmer_gender': s(participant_data.get('farmer_gender'), 20),
-                'farmer_age': s(participant_data.get('farmer_age'), 10),
-                'age_category': s(participant_data.get('age_category'), 20),
-                'farmer_phone_no': s(participant_data.get('farmer_phone_no'), 20),
-                'farmer_own_phone': s(participant_data.get('farmer_own_phone'), 10),
-                'farmer_organization': s(participant_data.get('farmer_organization'), 200),
-                'farmer_position': s(participant_data.get('farmer_position'), 100),
-                'farmer_relationship': s(participant_data.get('farmer_relationship'), 100),
-                'participants_type': s(participant_data.get('participants_type'), 50),
-                'admin_level1': s(participant_data.get('admin_level1'), 100),
-                'admin_level2': s(participant_data.get('admin_level2'), 100),
-                'partner': s(participant_data.get('partner'), 100),
-                'org_first_name': s(participant_data.get('org_first_name'), 100),
-                'org_surname': s(participant_data.get('org_surname'), 100),
-                'org_phone_no': s(participant_data.get('org_phone_no'), 20),
-                'crop': s(participant_data.get('crop'), 50),
-                'thematic_area': participant_data.get('thematic_area'),
-                'thematic_area_overall': participant_data.get('thematic_area_overall'),
-                'data_source': s(participant_data.get('data_source'), 100),
-                'source_submitted_on': source_submitted_on,
-                'api_created_on': api_created_on,
-                'raw_data': participant_data
-            }
-            
-            if existing:
-                # Update existing record
-                for key, value in model_data.items():
-                    setattr(existing, key, value)
-                existing.save()
-                return 'updated'
+    def estimate_sync(self, api_service, archive, total_records, batch_size, fetch_workers, force_update,
+                      sample_pages):
+        """Profile a few pages end to end (rolling back the writes) and project the full sync"""
+        if not total_records or sample_pages < 1:
+            return
+
+        if archive:
+            pages = [archive.pages[i - 1] for i in sample_page_numbers(len(archive.pages), sample_pages)]
+            fetch_page = lambda page: list(archive.iter_records(page))
+        else:
+            pages = sample_page_numbers(-(-total_records // batch_size), sample_pages)
+            fetch_page = lambda page: api_service.fetch_participants_page_body('akilimo', page, batch_size)
+
+        estimator = SyncCostEstimator(ParticipantBulkWriter(force_update=force_update), fetch_page)
+        self.stdout.write(f'\n🔬 Profiling {len(pages)} sample page(s) of {batch_size}: {", ".join(map(str, pages))}')
+        for page in pages:
+            result = estimator.sample(page)
+            self.stdout.write(
+                f"   page {page}: {result['records']} records — fetch {result['fetch_seconds']:.2f}s, "
+                f"decode {result['decode_seconds']:.3f}s, normalize {result['normalize_seconds']:.3f}s, "
+                f"write {result['write_seconds']:.3f}s (rolled back, {result['queries']} queries) — "
+                f"{result['created']} new, {result['updated']} changed, "
+                f"{result['unchanged']} unchanged, {result['skipped']} skipped"
+            )
+
+        projection = estimator.project(total_records, batch_size, fetch_workers)
+        if not projection['sampled_records']:
+            self.stdout.write(self.style.WARNING('   Sample pages were empty — nothing to project'))
+            return
+
+        def duration(seconds):
+            minutes, seconds = divmod(int(round(seconds)), 60)
+            hours, minutes = divmod(minutes, 60)
+            return f'{hours}h {minutes:02d}m' if hours else f'{minutes}m {seconds:02d}s'
+
+        self.stdout.write(
+            f"\n📐 Projected full sync: {projection['records']:,} records in {projection['pages']:,} pages\n"
+            f"   ⏱️  Runtime: ~{duration(projection['pipelined_seconds'])} "
+            f"(bottleneck: {projection['bottleneck']}), ~{duration(projection['sequential_seconds'])} with --stream\n"
+            f"   🗄️  Rows written: ~{projection['rows_written']:,} — "
+            f"{projection['created']:,} created, {projection['updated']:,} updated, "
+            f"{projection['unchanged']:,} unchanged, {projection['skipped']:,} skipped\n"
+            f"   🧮 Queries: ~{projection['queries']:,}"
+        )
+        if not force_update and projection['skipped']:
+            self.stdout.write('   ℹ️  Existing records are skipped without --force')
+
+    def run_partitioned(self, sync_log, api_config, total_available, total_to_sync, batch_size, workers, options):
+        """Run the full sync as page-range partitions on worker processes, then roll the results up"""
+        last_page = -(-(total_to_sync if total_to_sync is not None else total_available) // batch_size)
+        if last_page < 1:
+            sync_log.mark_completed('success')
+            self.stdout.write(self.style.SUCCESS('\n🎉 Nothing to sync'))
+            return
+
+        coordinator = PartitionedSync(
+            sync_log,
+            {
+                'token': api_config.token,
+                'base_url': api_config.base_url,
+                'batch_size': batch_size,
+                'force': options.get('force'),
+                'fetch_workers': options.get('fetch_workers'),
+                'use_cache': options.get('http_cache'),
+                'stream': options.get('stream'),
+            },
+            workers=workers,
+            retries=options.get('partition_retries'),
+        )
+        children = coordinator.create_partitions(1, last_page, record_limit=total_to_sync)
+        ranges = {child.pk: (child.partition_start_page, child.partition_end_page) for child in children}
+        self.stdout.write(f'\n🧩 {len(children)} partitions of pages 1-{last_page} across {workers} workers')
+
+        def on_result(result, attempt):
+            first, last = ranges[result['log_id']]
+            if result['status'] == 'success':
+                self.stdout.write(f'   ✅ Pages {first}-{last} done (attempt {attempt})')
             else:
-                # Create new record
-                AkilimoParticipant.objects.create(**model_data)
-                return 'created'
-                
-        except Exception as e:
-            logger.error(f"Error processing participant {participant_data.get('id', 'unknown')}: {e}")
-            return 'skipped'
\ No newline at end of file
+                self.stdout.write(f'   ❌ Pages {first}-{last} {result["status"]} on attempt {attempt}: {result["error"]}')
+
+        outcome = coordinator.run(children, on_result=on_result)
+        totals = outcome['totals']
+
+        if outcome['failed']:
+            failed_ranges = ', '.join(f'{ranges[pk][0]}-{ranges[pk][1]}' for pk in outcome['failed'])
+            sync_log.mark_completed('partial', f'Partitions failed after retries: pages {failed_ranges}')
+            self.stdout.write(self.style.WARNING(f'\n⚠️  Sync incomplete — pages {failed_ranges} failed after retries'))
+        else:
+            if total_to_sync is None:
+                watermark = AkilimoParticipant.objects.aggregate(
+                    external_id=Max('external_id'),
+                    created_on=Max('api_created_on')
+                )
+                sync_log.watermark_external_id = watermark['external_id']
+                sync_log.watermark_created_on = watermark['created_on']
+            sync_log.mark_completed('success')
+            self.stdout.write(self.style.SUCCESS('\n🎉 Sync completed successfully!'))
+
+        self.stdout.write(
+            f'   📊 Records processed: {totals["records_processed"]:,}\n'
+            f'   ✨ Records created: {totals["records_created"]:,}\n'
+            f'   🔄 Records updated: {totals["records_updated"]:,}\n'
+            f'   💤 Records unchanged: {totals["records_unchanged"]:,}\n'
+            f'   ⏭️  Records skipped: {totals["records_skipped"]:,}'
+        )
+
+    def reconcile_deletions(self, sync_log, seen_ids, max_delete_ratio):
+        """Delete participants missing from the upstream ids seen by this sync"""
+        self.stdout.write(
+            f'\n🧹 Reconciling against {len(seen_ids):,} upstream ids ({seen_ids.nbytes / 1024 / 1024:.1f} MB)...'
+        )
+        result = DeletionReconciler(seen_ids, max_delete_ratio=max_delete_ratio).run()
+        sync_log.records_deleted = result['deleted']
+        if result['refused']:
+            sync_log.error_details = {**sync_log.error_details, 'reconciliation': result}
+            self.stdout.write(self.style.WARNING(f"   ⚠️  {result['refused']}"))
+        else:
+            self.stdout.write(
+                f"   🗑️  {result['deleted']:,} of {result['checked']:,} local participants deleted (gone upstream)"
+            )
+
+    def get_incremental_pages(self, api_service, first_response, total_available, batch_size,
+                              watermark_id, fetch_workers, stream=False, use_cache=False):
+        """
+        Page iterator covering only records newer than the watermark
+
+        The API lists records by id, so new records sit at the tail: walk back
+        from the last page until a page contains an id at or below the watermark.
+        If even page 1 starts above the watermark the listing is newest-first,
+        so walk forward from the head instead.
+        """
+        first_data = first_response.get('data') or [{}]
+        last_page = max(1, -(-total_available // batch_size))
+        if (first_data[0].get('id') or 0) > watermark_id:
+            kwargs = {}
+            page_numbers = range(1, last_page + 1)
+        else:
+            self.stdout.write(f'🔖 Walking back from page {last_page}')
+            kwargs = {'start_page': last_page, 'descending': True}
+            page_numbers = range(last_page, 0, -1)
+
+        if stream:
+            return api_service.iter_streamed_pages('akilimo', page_size=batch_size, **kwargs)
+        return api_service.iter_page_bodies(
+            'akilimo', page_numbers, page_size=batch_size, workers=fetch_workers, use_cache=use_cache
+        )
+
+    def newer_than(self, participants_data, watermark_id, progress):
+        """Yield only records above the watermark, flagging when a known record is seen"""
+        for record in participants_data:
+            if (record.get('id') or 0) > watermark_id:
+                yield record
+            else:
+                progress['reached_known'] = True
+
+    def take(self, participants_data, cap):
+        """Yield records until the shared --max-records allowance runs out"""
+        for record in participants_data:
+            if cap['remaining'] <= 0:
+                return
+            cap['remaining'] -= 1
+            yield record
+
+    def report_archive(self, recorder):
+        """Show where fetched pages were archived by --record"""
+        if recorder:
+            pages = recorder.manifest['pages']
+            records = sum(entry['records'] for entry in pages.values())
+            self.stdout.write(f'   📼 Archive: {len(pages):,} pages ({records:,} records) in {recorder.directory}')
+
+    def report_http_stats(self):
+        """Show how well the shared HTTP client reused its keep-alive connections"""
+        for prefix, stats in connection_stats().items():
+            reuse = (stats['reused'] / stats['requests'] * 100) if stats['requests'] else 0
+            self.stdout.write(
+                f'   🔌 {prefix}: {stats["requests"]:,} requests over '
+                f'{stats["connections"]:,} connections ({reuse:.0f}% reused)'
+            )
+        http_cache = get_http_cache()
+        if http_cache and any(http_cache.stats.values()):
+            stats = http_cache.stats
+            self.stdout.write(
+                f'   🗃️  HTTP cache: {stats["hits"]:,} fresh hits, {stats["revalidated"]:,} revalidated (304), '
+                f'{stats["misses"]:,} downloaded, {stats["evicted"]:,} evicted'
+            )
+
+    def report_stage_metrics(self, report):
+        """Show where the sync spent its time, stage by stage"""
+        if not report:
+            return
+        bottleneck = f", bottleneck: {report['bottleneck']}" if report['bottleneck'] else ''
+        mode = 'concurrent' if report['concurrent'] else 'inline'
+        self.stdout.write(f"   ⏱️  Stages ({mode}, {report['wall_seconds']:.1f}s wall{bottleneck}):")
+        for name, stats in report['stages'].items():
+            rate = f"{stats['records_per_second']:,.0f} rec/s" if stats['records_per_second'] else '—'
+            self.stdout.write(
+                f"      {name:<10} busy {stats['busy_seconds']:7.2f}s  wait {stats['wait_seconds']:7.2f}s  "
+                f"blocked {stats['blocked_seconds']:7.2f}s  {rate}"
+            )
+
+    def report_page_sizing(self, report):
+        """Show which page sizes --adaptive-page-size settled on and why it changed them"""
+        sizing = (report or {}).get('page_sizing')
+        if not sizing:
+            return
+        self.stdout.write(f"   📏 Page sizes (ended at {sizing['final_size']}):")
+        for size, stats in sizing['sizes'].items():
+            rate = f"{stats['records_per_second']:,.0f} rec/s" if stats['records_per_second'] else '—'
+            self.stdout.write(
+                f"      {size:>5}: {stats['pages']:,} pages, {stats['mean_latency']:.2f}s avg, "
+                f"{stats['errors']} failed, {stats['retries']} retried, {rate}"
+            )
+        for change in sizing['changes'][-10:]:
+            self.stdout.write(f"      after page request {change['page']}: {change['from']} → {change['to']} ({change['reason']})")
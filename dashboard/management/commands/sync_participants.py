@@ -1,7 +1,7 @@
 from django.core.management.base import BaseCommand
-from django.utils import timezone
-from dashboard.models import APIConfiguration, ParticipantRecord, DataSyncLog
+from dashboard.models import APIConfiguration, DataSyncLog
 from dashboard.services import AkilimoDataService
+from dashboard.sync_service import ParticipantRecordSync
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,11 +10,9 @@ class Command(BaseCommand):
     help = 'Sync participant data from EiA MELIA API'
 
     def add_arguments(self, parser):
-        parser.add_argument('--max-pages', type=int, default=10, help='Maximum number of pages to fetch')
         parser.add_argument('--dry-run', action='store_true', help='Show what would be synced without saving')
 
     def handle(self, *args, **options):
-        max_pages = options.get('max_pages')
         dry_run = options.get('dry_run')
 
         # Get API configuration
@@ -43,70 +41,41 @@ class Command(BaseCommand):
 
         try:
             # Initialize data service
-            data_service = AkilimoDataService(api_config.token)
-            
-            self.stdout.write('Fetching participants data from API...')
-            
-            # Get all participants data
-            participants_data = data_service.get_all_akilimo_participants()
-            
-            self.stdout.write(f'Found {len(participants_data)} participants')
+            data_service = AkilimoDataService(api_config.token, base_url=api_config.base_url)
 
             if dry_run:
+                sample = data_service.get_akilimo_participants(page=1, page_size=5)
+                total = sample.get('count', 0)
+                self.stdout.write(f'Found {total} participants')
                 self.stdout.write(self.style.WARNING('DRY RUN - No data will be saved'))
-                for i, participant in enumerate(participants_data[:5]):  # Show first 5
+                for i, participant in enumerate(sample.get('data', [])):  # Show first 5
                     self.stdout.write(f'  {i+1}. ID: {participant.get("id", "N/A")}, Location: {participant.get("location", "N/A")}')
-                if len(participants_data) > 5:
-                    self.stdout.write(f'  ... and {len(participants_data) - 5} more')
+                if total > 5:
+                    self.stdout.write(f'  ... and {total - 5} more')
                 return
 
-            created_count = 0
-            updated_count = 0
-            
-            for i, participant_data in enumerate(participants_data):
-                if (i + 1) % 50 == 0:
-                    self.stdout.write(f'Processed {i + 1}/{len(participants_data)} participants...')
-                
-                external_id = participant_data.get('id', str(participant_data.get('participant_id', '')))
-                
-                if not external_id:
-                    continue
-                
-                # Extract relevant fields from API response
-                participant_record, created = ParticipantRecord.objects.update_or_create(
-                    external_id=external_id,
-                    defaults={
-                        'gender': participant_data.get('gender'),
-                        'age_group': participant_data.get('age_group'),
-                        'location': participant_data.get('location'),
-                        'state': participant_data.get('state'),
-                        'lga': participant_data.get('lga'),
-                        'event_type': participant_data.get('event_type'),
-                        'facilitator': participant_data.get('facilitator'),
-                        'farm_size': participant_data.get('farm_size'),
-                        'previous_yield': participant_data.get('previous_yield'),
-                        'expected_yield': participant_data.get('expected_yield'),
-                        'raw_data': participant_data
-                    }
-                )
-                
-                if created:
-                    created_count += 1
-                else:
-                    updated_count += 1
+            self.stdout.write('Fetching participants data from API...')
+
+            def report_progress(counts):
+                self.stdout.write(f"Processed {counts['processed']} participants...")
+
+            # Records are streamed page by page and upserted in chunks
+            counts = ParticipantRecordSync(
+                api_config.token, sync_log, base_url=api_config.base_url
+            ).run(on_progress=report_progress)
             
             # Update sync log
-            sync_log.records_processed = len(participants_data)
-            sync_log.records_created = created_count
-            sync_log.records_updated = updated_count
+            sync_log.records_processed = counts['processed']
+            sync_log.records_created = counts['created']
+            sync_log.records_updated = counts['updated']
             sync_log.mark_completed('success')
             
             self.stdout.write(
                 self.style.SUCCESS(
                     f'Sync completed successfully!\n'
-                    f'Records processed: {len(participants_data)}\n'
-                    f'Records created: {created_count}\n'
-                    f'Records updated: {updated_count}'
+                    f'Records processed: {counts["processed"]}\n'
+                    f'Records created: {counts["created"]}\n'
+                    f'Records updated: {counts["updated"]}'
                 )
             )
             
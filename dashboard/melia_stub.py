@@ -0,0 +1,195 @@
+import hashlib
+import json
+import random
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+STATES = ['Oyo', 'Ogun', 'Osun', 'Benue', 'Kogi', 'Cross River', 'Akwa Ibom', 'Enugu', 'Imo', 'Taraba']
+GENDERS = ['Male', 'Female', 'male', 'female', 'M', 'F']
+EVENT_TYPES = ['Training', 'Field day', 'Demonstration', 'Radio show']
+PARTNERS = ['IITA', 'OYSADEP', 'Notore', 'Psaltry', 'Sasakawa', 'FMARD']
+
+
+class StubMeliaServer:
+    """
+    Local stand-in for the MELIA ``data/eventsparts/usecase/<ref>/`` endpoint
+
+    Serves ``records`` synthetic participants with the same page envelope as
+    the live API (``count``, ``next``, ``previous``, ``data``). Records are
+    derived from their id only, so repeated runs return identical payloads
+    and content hashes. ``latency`` is added to every page, ``error_rate`` is
+    the share of pages answered with a 502, and ``payload_bytes`` pads each
+    record to mimic heavier production rows. Pages larger than
+    ``max_page_size`` are refused with a 503 and ``Retry-After``, like an
+    upstream buckling under big pages. Pages carry an ETag and answer a
+    matching ``If-None-Match`` with 304.
+    """
+
+    def __init__(self, records: int = 1000, latency: float = 0.0, error_rate: float = 0.0,
+                 payload_bytes: int = 0, host: str = '127.0.0.1', port: int = 0, seed: int = 0,
+                 max_page_size: Optional[int] = None, retry_after: int = 1):
+        self.records = records
+        self.latency = latency
+        self.error_rate = error_rate
+        self.payload_bytes = payload_bytes
+        self.max_page_size = max_page_size
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.requests_served = 0
+        self.errors_served = 0
+        self.not_modified_served = 0
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}/api/v1/melia'
+
+    def start(self) -> 'StubMeliaServer':
+        """Serve requests from a background thread"""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def make_record(self, external_id: int) -> Dict:
+        """Build the synthetic participant with the given id"""
+        i = external_id - 1
+        event_date = date(2023, 1, 1) + timedelta(days=i % 540)
+        record = {
+            'id': external_id,
+            'source_id': f'SRC-{external_id:08d}',
+            'usecase': 'AKILIMO',
+            'usecase_ref_id': 'akilimo',
+            'usecase_stage': 'Scaling',
+            'country': 'Nigeria',
+            'event_date': event_date.isoformat(),
+            'event_year': event_date.year,
+            'event_month': event_date.month,
+            'event_type': EVENT_TYPES[i % len(EVENT_TYPES)],
+            'event_format': 'Physical',
+            'event_city': f'Town {i % 300}',
+            'event_venue': f'Venue {i % 120}',
+            'event_geopoint': f'{7 + (i % 100) / 100:.4f} {3 + (i % 90) / 100:.4f}',
+            'farmer_first_name': f'Farmer{i}',
+            'farmer_surname': f'Surname{i % 997}',
+            'farmer_gender': GENDERS[i % len(GENDERS)],
+            'farmer_age': str(18 + i % 60),
+            'age_category': 'Youth' if i % 60 < 17 else 'Adult',
+            'farmer_phone_no': f'080{i:08d}'[:11],
+            'farmer_own_phone': 'Yes' if i % 3 else 'No',
+            'farmer_organization': f'Cooperative {i % 40}',
+            'farmer_position': 'Member',
+            'farmer_relationship': 'Self',
+            'participants_type': 'Farmer',
+            'admin_level1': STATES[i % len(STATES)],
+            'admin_level2': f'LGA {i % 77}',
+            'partner': PARTNERS[i % len(PARTNERS)],
+            'org_first_name': f'Agent{i % 150}',
+            'org_surname': f'EA{i % 150}',
+            'org_phone_no': f'070{i % 150:08d}',
+            'crop': 'Cassava',
+            'thematic_area': 'Agronomy',
+            'thematic_area_overall': 'Crop management',
+            'data_source': 'ODK',
+            'source_submitted_on': f'{event_date.isoformat()}T12:00:00Z',
+            'created_on': f'{event_date.isoformat()}T12:{i % 60:02d}:00Z',
+        }
+        if self.payload_bytes:
+            record['notes'] = ('x' * self.payload_bytes)
+        return record
+
+    def make_page(self, page: int, page_size: int) -> Optional[Dict]:
+        """Return the page body, or None when the page is past the end"""
+        start = (page - 1) * page_size
+        if page < 1 or (start >= self.records and page > 1):
+            return None
+        end = min(self.records, start + page_size)
+        url = f'{self.base_url}/data/eventsparts/usecase/akilimo/?page_size={page_size}&page='
+        return {
+            'count': self.records,
+            'next': f'{url}{page + 1}' if end < self.records else None,
+            'previous': f'{url}{page - 1}' if page > 1 else None,
+            'data': [self.make_record(external_id) for external_id in range(start + 1, end + 1)],
+        }
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass  # one line per page would drown the benchmark output
+
+            def do_GET(self):
+                stub.requests_served += 1
+                parsed = urlparse(self.path)
+                if '/data/eventsparts/usecase/' not in parsed.path:
+                    return self._send(404, {'detail': 'Not found.'})
+
+                if stub.latency:
+                    time.sleep(stub.latency)
+                if stub.error_rate and stub.random.random() < stub.error_rate:
+                    stub.errors_served += 1
+                    return self._send(502, {'detail': 'Bad gateway (stub)'})
+
+                query = parse_qs(parsed.query)
+                try:
+                    page = int(query.get('page', ['1'])[0])
+                    page_size = int(query.get('page_size', ['100'])[0])
+                except ValueError:
+                    return self._send(400, {'detail': 'Invalid page.'})
+
+                if stub.max_page_size and page_size > stub.max_page_size:
+                    stub.errors_served += 1
+                    return self._send(503, {'detail': 'Page too large (stub)'},
+                                      headers={'Retry-After': str(stub.retry_after)})
+
+                body = stub.make_page(page, page_size)
+                if body is None:
+                    return self._send(404, {'detail': 'Invalid page.'})
+                self._send(200, body, conditional=True)
+
+            def _send(self, status_code, body, conditional=False, headers=None):
+                payload = json.dumps(body).encode('utf-8')
+                etag = f'"{hashlib.md5(payload).hexdigest()}"'
+                if conditional and self.headers.get('If-None-Match') == etag:
+                    stub.not_modified_served += 1
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                self.send_response(status_code)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                if conditional:
+                    self.send_header('ETag', etag)
+                self.end_headers()
+                self.wfile.write(payload)
+
+        return Handler
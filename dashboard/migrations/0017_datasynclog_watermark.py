@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-16 23:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0016_alter_userprofile_dashboard_preferences'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datasynclog',
+            name='watermark_created_on',
+            field=models.DateTimeField(blank=True, help_text='Latest api_created_on synced', null=True),
+        ),
+        migrations.AddField(
+            model_name='datasynclog',
+            name='watermark_external_id',
+            field=models.BigIntegerField(blank=True, help_text='Highest external_id synced', null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-16 23:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0017_datasynclog_watermark'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datasynclog',
+            name='checkpoint_page',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='datasynclog',
+            name='checkpoint_page_size',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+    ]
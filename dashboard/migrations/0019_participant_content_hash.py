@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-16 23:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0018_datasynclog_checkpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='akilimoparticipant',
+            name='content_hash',
+            field=models.CharField(blank=True, help_text='SHA-256 of the canonicalized raw data, used to skip unchanged rows', max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='datasynclog',
+            name='records_skipped',
+            field=models.IntegerField(default=0, help_text='Invalid, duplicate or not-updated records'),
+        ),
+        migrations.AddField(
+            model_name='datasynclog',
+            name='records_unchanged',
+            field=models.IntegerField(default=0, help_text='Existing records whose content hash matched'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-16 23:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0020_sync_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datasynclog',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='partitions', to='dashboard.datasynclog'),
+        ),
+        migrations.AddField(
+            model_name='datasynclog',
+            name='partition_end_page',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='datasynclog',
+            name='partition_start_page',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+    ]
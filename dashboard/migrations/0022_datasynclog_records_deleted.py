@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-16 23:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0021_datasynclog_partitions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datasynclog',
+            name='records_deleted',
+            field=models.IntegerField(default=0, help_text='Local records removed because they are gone upstream'),
+        ),
+    ]
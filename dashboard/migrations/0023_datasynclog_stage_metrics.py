@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-16 23:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0022_datasynclog_records_deleted'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datasynclog',
+            name='stage_metrics',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
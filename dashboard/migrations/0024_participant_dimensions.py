@@ -0,0 +1,161 @@
+# Generated by Django 5.2.4 on 2026-10-16 23:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0023_datasynclog_stage_metrics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ParticipantAgeCategory',
+            fields=[
+                ('id', models.SmallAutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100)),
+                ('key', models.CharField(max_length=100, unique=True)),
+            ],
+            options={
+                'verbose_name': 'Participant Age Category',
+                'verbose_name_plural': 'Participant Age Categories',
+                'ordering': ['name'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ParticipantCity',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=500)),
+                ('key', models.CharField(max_length=500, unique=True)),
+            ],
+            options={
+                'verbose_name': 'Participant City',
+                'verbose_name_plural': 'Participant Cities',
+                'ordering': ['name'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ParticipantCrop',
+            fields=[
+                ('id', models.SmallAutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100)),
+                ('key', models.CharField(max_length=100, unique=True)),
+            ],
+            options={
+                'verbose_name': 'Participant Crop',
+                'ordering': ['name'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ParticipantEventType',
+            fields=[
+                ('id', models.SmallAutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100)),
+                ('key', models.CharField(max_length=100, unique=True)),
+            ],
+            options={
+                'verbose_name': 'Participant Event Type',
+                'ordering': ['name'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ParticipantGender',
+            fields=[
+                ('id', models.SmallAutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100)),
+                ('key', models.CharField(max_length=100, unique=True)),
+            ],
+            options={
+                'verbose_name': 'Participant Gender',
+                'ordering': ['name'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ParticipantLGA',
+            fields=[
+                ('id', models.SmallAutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100)),
+                ('key', models.CharField(max_length=100, unique=True)),
+            ],
+            options={
+                'verbose_name': 'Participant LGA',
+                'verbose_name_plural': 'Participant LGAs',
+                'ordering': ['name'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ParticipantPartner',
+            fields=[
+                ('id', models.SmallAutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100)),
+                ('key', models.CharField(max_length=100, unique=True)),
+            ],
+            options={
+                'verbose_name': 'Participant Partner',
+                'ordering': ['name'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ParticipantState',
+            fields=[
+                ('id', models.SmallAutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100)),
+                ('key', models.CharField(max_length=100, unique=True)),
+            ],
+            options={
+                'verbose_name': 'Participant State',
+                'ordering': ['name'],
+                'abstract': False,
+            },
+        ),
+        migrations.AddField(
+            model_name='akilimoparticipant',
+            name='age_category_dim',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='participants', to='dashboard.participantagecategory'),
+        ),
+        migrations.AddField(
+            model_name='akilimoparticipant',
+            name='city_dim',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='participants', to='dashboard.participantcity'),
+        ),
+        migrations.AddField(
+            model_name='akilimoparticipant',
+            name='crop_dim',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='participants', to='dashboard.participantcrop'),
+        ),
+        migrations.AddField(
+            model_name='akilimoparticipant',
+            name='event_type_dim',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='participants', to='dashboard.participanteventtype'),
+        ),
+        migrations.AddField(
+            model_name='akilimoparticipant',
+            name='gender_dim',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='participants', to='dashboard.participantgender'),
+        ),
+        migrations.AddField(
+            model_name='akilimoparticipant',
+            name='lga_dim',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='participants', to='dashboard.participantlga'),
+        ),
+        migrations.AddField(
+            model_name='akilimoparticipant',
+            name='partner_dim',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='participants', to='dashboard.participantpartner'),
+        ),
+        migrations.AddField(
+            model_name='akilimoparticipant',
+            name='state_dim',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='participants', to='dashboard.participantstate'),
+        ),
+    ]
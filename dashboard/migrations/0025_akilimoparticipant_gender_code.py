@@ -0,0 +1,22 @@
+# Generated by Django 5.2.4 on 2026-10-17 00:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0024_participant_dimensions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='akilimoparticipant',
+            name='gender_code',
+            field=models.CharField(blank=True, choices=[('M', 'Male'), ('F', 'Female'), ('O', 'Other'), ('U', 'Unknown')], db_index=True, help_text='Canonical farmer_gender, set at sync time', max_length=1, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='akilimoparticipant',
+            index=models.Index(fields=['country', 'gender_code'], name='dashboard_a_country_e06f91_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.4 on 2026-10-17 00:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0025_akilimoparticipant_gender_code'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrainingEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('event_date', models.DateField(blank=True, db_index=True, null=True)),
+                ('event_venue', models.CharField(blank=True, max_length=500, null=True)),
+                ('event_type', models.CharField(blank=True, max_length=100, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Training Event',
+                'verbose_name_plural': 'Training Events',
+                'ordering': ['-event_date'],
+            },
+        ),
+        migrations.AddField(
+            model_name='akilimoparticipant',
+            name='event',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='participants', to='dashboard.trainingevent'),
+        ),
+    ]
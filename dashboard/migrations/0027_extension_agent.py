@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-17 00:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0026_training_event'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExtensionAgent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('first_name', models.CharField(max_length=100)),
+                ('surname', models.CharField(blank=True, max_length=100, null=True)),
+                ('phone_no', models.CharField(blank=True, max_length=20, null=True)),
+                ('partner', models.CharField(blank=True, db_index=True, max_length=100, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Extension Agent',
+                'verbose_name_plural': 'Extension Agents',
+                'ordering': ['first_name', 'surname'],
+            },
+        ),
+        migrations.AddField(
+            model_name='akilimoparticipant',
+            name='extension_agent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='participants', to='dashboard.extensionagent'),
+        ),
+    ]
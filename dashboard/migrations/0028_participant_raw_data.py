@@ -0,0 +1,48 @@
+# Generated by Django 5.2.4 on 2026-10-17 00:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def copy_raw_data(apps, schema_editor):
+    """Copy every participant's raw_data into the side table in one INSERT ... SELECT"""
+    Participant = apps.get_model('dashboard', 'AkilimoParticipant')
+    RawData = apps.get_model('dashboard', 'ParticipantRawData')
+    quote = schema_editor.quote_name
+    schema_editor.execute(
+        f"INSERT INTO {quote(RawData._meta.db_table)} ({quote('participant_id')}, {quote('data')}, {quote('updated_at')}) "
+        f"SELECT {quote('id')}, {quote('raw_data')}, {quote('updated_at')} FROM {quote(Participant._meta.db_table)}"
+    )
+
+
+def restore_raw_data(apps, schema_editor):
+    Participant = apps.get_model('dashboard', 'AkilimoParticipant')
+    RawData = apps.get_model('dashboard', 'ParticipantRawData')
+    for raw in RawData.objects.iterator(chunk_size=1000):
+        Participant.objects.filter(pk=raw.participant_id).update(raw_data=raw.data)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0027_extension_agent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ParticipantRawData',
+            fields=[
+                ('participant', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='raw', serialize=False, to='dashboard.akilimoparticipant')),
+                ('data', models.JSONField(default=dict, help_text='Complete raw data from API')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Participant raw data',
+                'verbose_name_plural': 'Participant raw data',
+            },
+        ),
+        migrations.RunPython(copy_raw_data, restore_raw_data),
+        migrations.RemoveField(
+            model_name='akilimoparticipant',
+            name='raw_data',
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 5.2.4 on 2026-10-17 00:27
+
+import hashlib
+
+from django.db import migrations, models
+
+DIMENSION_MODELS = [
+    'ParticipantPartner', 'ParticipantState', 'ParticipantLGA', 'ParticipantCity',
+    'ParticipantCrop', 'ParticipantEventType', 'ParticipantAgeCategory', 'ParticipantGender',
+]
+
+
+def hash_keys(apps, schema_editor):
+    """Replace each case-folded key with its SHA-256, as dimensions.dimension_key now builds it"""
+    for name in DIMENSION_MODELS:
+        model = apps.get_model('dashboard', name)
+        for row in model.objects.only('id', 'key').iterator():
+            row.key = hashlib.sha256(row.key.encode('utf-8', 'surrogatepass')).hexdigest()
+            row.save(update_fields=['key'])
+
+
+def unhash_keys(apps, schema_editor):
+    # Digests cannot be reversed; rebuild the old keys from the display names
+    for name in DIMENSION_MODELS:
+        model = apps.get_model('dashboard', name)
+        for row in model.objects.only('id', 'name').iterator():
+            row.key = row.name.strip().casefold()[:100]
+            row.save(update_fields=['key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0029_unique_pending_sync_job'),
+    ]
+
+    operations = [
+        migrations.RunPython(hash_keys, unhash_keys),
+        migrations.AlterField(
+            model_name='participantagecategory',
+            name='key',
+            field=models.CharField(max_length=64, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='participantcity',
+            name='key',
+            field=models.CharField(max_length=64, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='participantcrop',
+            name='key',
+            field=models.CharField(max_length=64, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='participanteventtype',
+            name='key',
+            field=models.CharField(max_length=64, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='participantgender',
+            name='key',
+            field=models.CharField(max_length=64, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='participantlga',
+            name='key',
+            field=models.CharField(max_length=64, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='participantpartner',
+            name='key',
+            field=models.CharField(max_length=64, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='participantstate',
+            name='key',
+            field=models.CharField(max_length=64, unique=True),
+        ),
+    ]
@@ -1,8 +1,9 @@
-from django.db import models
+from django.db import IntegrityError, OperationalError, models, transaction
 from django.contrib.auth.models import User
 from django.utils import timezone
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+import time
 import uuid
 from datetime import timedelta
 
@@ -285,8 +286,135 @@ def save_user_profile(sender, instance, **kwargs):
     if hasattr(instance, 'profile'):
         instance.profile.save()
 
+class ParticipantDimension(models.Model):
+    """
+    One distinct value of a categorical AkilimoParticipant column
+
+    ``key`` is a SHA-256 of the trimmed, case-folded value, so spellings that
+    differ only in case or surrounding spaces share a row (as they already
+    share a group under MySQL's case-insensitive collation), while values
+    that differ only in accents keep their own; ``name`` keeps the first
+    spelling seen.
+    """
+    id = models.SmallAutoField(primary_key=True)
+    name = models.CharField(max_length=100)
+    key = models.CharField(max_length=64, unique=True)
+
+    class Meta:
+        abstract = True
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
+class ParticipantPartner(ParticipantDimension):
+    class Meta(ParticipantDimension.Meta):
+        verbose_name = "Participant Partner"
+
+
+class ParticipantState(ParticipantDimension):
+    class Meta(ParticipantDimension.Meta):
+        verbose_name = "Participant State"
+
+
+class ParticipantLGA(ParticipantDimension):
+    class Meta(ParticipantDimension.Meta):
+        verbose_name = "Participant LGA"
+        verbose_name_plural = "Participant LGAs"
+
+
+class ParticipantCity(ParticipantDimension):
+    # Free-text city names grow without bound, unlike the other dimensions
+    id = models.AutoField(primary_key=True)
+    name = models.CharField(max_length=500)
+
+    class Meta(ParticipantDimension.Meta):
+        verbose_name = "Participant City"
+        verbose_name_plural = "Participant Cities"
+
+
+class ParticipantCrop(ParticipantDimension):
+    class Meta(ParticipantDimension.Meta):
+        verbose_name = "Participant Crop"
+
+
+class ParticipantEventType(ParticipantDimension):
+    class Meta(ParticipantDimension.Meta):
+        verbose_name = "Participant Event Type"
+
+
+class ParticipantAgeCategory(ParticipantDimension):
+    class Meta(ParticipantDimension.Meta):
+        verbose_name = "Participant Age Category"
+        verbose_name_plural = "Participant Age Categories"
+
+
+class ParticipantGender(ParticipantDimension):
+    class Meta(ParticipantDimension.Meta):
+        verbose_name = "Participant Gender"
+
+
+class TrainingEvent(models.Model):
+    """
+    A training event, deduplicated from participants' (date, venue, type)
+
+    ``key`` is a SHA-256 of the date and the trimmed, case-folded venue and
+    type, so the sync can find an event without comparing the wide venue
+    column.
+    """
+    key = models.CharField(max_length=64, unique=True)
+    event_date = models.DateField(null=True, blank=True, db_index=True)
+    event_venue = models.CharField(max_length=500, null=True, blank=True)
+    event_type = models.CharField(max_length=100, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-event_date']
+        verbose_name = "Training Event"
+        verbose_name_plural = "Training Events"
+
+    def __str__(self):
+        parts = [self.event_type, self.event_venue, self.event_date and self.event_date.isoformat()]
+        return " - ".join(str(p) for p in parts if p) or f"Event {self.pk}"
+
+
+class ExtensionAgent(models.Model):
+    """
+    An extension agent, deduplicated from participants' org contact columns
+
+    ``key`` is a SHA-256 of the normalized (first name, surname, phone,
+    partner): names and partner trimmed, case-folded and with inner spaces
+    collapsed, the phone reduced to its last 10 digits so ``080...`` and
+    ``+23480...`` match. The name and contact columns keep the first
+    spelling seen.
+    """
+    key = models.CharField(max_length=64, unique=True)
+    first_name = models.CharField(max_length=100)
+    surname = models.CharField(max_length=100, null=True, blank=True)
+    phone_no = models.CharField(max_length=20, null=True, blank=True)
+    partner = models.CharField(max_length=100, null=True, blank=True, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['first_name', 'surname']
+        verbose_name = "Extension Agent"
+        verbose_name_plural = "Extension Agents"
+
+    def __str__(self):
+        name = f"{self.first_name} {self.surname or ''}".strip()
+        return f"{name} ({self.partner})" if self.partner else name
+
+
 class AkilimoParticipant(models.Model):
     """Updated model based on actual EiA MELIA API data structure"""
+
+    GENDER_CODE_CHOICES = [
+        ('M', 'Male'),
+        ('F', 'Female'),
+        ('O', 'Other'),
+        ('U', 'Unknown'),
+    ]
     
     # Primary identification
     external_id = models.BigIntegerField(unique=True, help_text="ID from EiA MELIA API")
@@ -312,6 +440,8 @@ class AkilimoParticipant(models.Model):
     farmer_first_name = models.CharField(max_length=100, null=True, blank=True)
     farmer_surname = models.CharField(max_length=100, null=True, blank=True)
     farmer_gender = models.CharField(max_length=20, null=True, blank=True)
+    gender_code = models.CharField(max_length=1, choices=GENDER_CODE_CHOICES, null=True, blank=True,
+                                   db_index=True, help_text="Canonical farmer_gender, set at sync time")
     farmer_age = models.CharField(max_length=10, null=True, blank=True)
     age_category = models.CharField(max_length=20, null=True, blank=True)
     farmer_phone_no = models.CharField(max_length=20, null=True, blank=True)
@@ -340,9 +470,32 @@ class AkilimoParticipant(models.Model):
     data_source = models.CharField(max_length=100, null=True, blank=True)
     source_submitted_on = models.DateTimeField(null=True, blank=True)
     api_created_on = models.DateTimeField(null=True, blank=True, help_text="Created timestamp from API")
-    
-    # Metadata
-    raw_data = models.JSONField(default=dict, help_text="Complete raw data from API")
+
+    # Dimension keys for the categorical columns above, filled in at sync time
+    partner_dim = models.ForeignKey(ParticipantPartner, on_delete=models.SET_NULL, null=True, blank=True,
+                                    related_name='participants')
+    state_dim = models.ForeignKey(ParticipantState, on_delete=models.SET_NULL, null=True, blank=True,
+                                  related_name='participants')
+    lga_dim = models.ForeignKey(ParticipantLGA, on_delete=models.SET_NULL, null=True, blank=True,
+                                related_name='participants')
+    city_dim = models.ForeignKey(ParticipantCity, on_delete=models.SET_NULL, null=True, blank=True,
+                                 related_name='participants')
+    crop_dim = models.ForeignKey(ParticipantCrop, on_delete=models.SET_NULL, null=True, blank=True,
+                                 related_name='participants')
+    event_type_dim = models.ForeignKey(ParticipantEventType, on_delete=models.SET_NULL, null=True, blank=True,
+                                       related_name='participants')
+    age_category_dim = models.ForeignKey(ParticipantAgeCategory, on_delete=models.SET_NULL, null=True, blank=True,
+                                         related_name='participants')
+    gender_dim = models.ForeignKey(ParticipantGender, on_delete=models.SET_NULL, null=True, blank=True,
+                                   related_name='participants')
+    event = models.ForeignKey(TrainingEvent, on_delete=models.SET_NULL, null=True, blank=True,
+                              related_name='participants')
+    extension_agent = models.ForeignKey(ExtensionAgent, on_delete=models.SET_NULL, null=True, blank=True,
+                                        related_name='participants')
+
+    # Metadata (the raw API record lives in ParticipantRawData, see raw_data)
+    content_hash = models.CharField(max_length=64, null=True, blank=True,
+                                    help_text="SHA-256 of the canonicalized raw data, used to skip unchanged rows")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -352,6 +505,7 @@ class AkilimoParticipant(models.Model):
             models.Index(fields=['country', 'admin_level1']),
             models.Index(fields=['event_date']),
             models.Index(fields=['farmer_gender']),
+            models.Index(fields=['country', 'gender_code']),
             models.Index(fields=['partner']),
             models.Index(fields=['event_type']),
             models.Index(fields=['age_category']),
@@ -360,7 +514,65 @@ class AkilimoParticipant(models.Model):
     def __str__(self):
         name = f"{self.farmer_first_name} {self.farmer_surname}".strip()
         return f"{name or f'Participant {self.external_id}'} - {self.admin_level1 or 'Unknown'}"
-    
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the columns the keys derive from, so save() only resolves them again when they change
+        from .dimensions import SOURCE_COLUMNS
+        instance._loaded_sources = {
+            name: value for name, value in zip(field_names, values) if name in SOURCE_COLUMNS
+        }
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Keep the dimension keys, event, agent and gender code in step with edits made outside the sync
+        from .dimensions import KEY_FIELDS, SOURCE_COLUMNS, assign_instance_dimensions
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            if SOURCE_COLUMNS.intersection(update_fields):
+                assign_instance_dimensions(self)
+                kwargs['update_fields'] = {*update_fields, *KEY_FIELDS}
+        elif self._sources_changed(SOURCE_COLUMNS):
+            assign_instance_dimensions(self)
+        super().save(*args, **kwargs)
+        self._loaded_sources = {name: getattr(self, name) for name in SOURCE_COLUMNS if name in self.__dict__}
+        pending = self.__dict__.pop('_pending_raw_data', None)
+        if pending is not None:
+            ParticipantRawData.objects.update_or_create(participant=self, defaults={'data': pending})
+            self.__dict__.pop('_raw_data_cache', None)
+
+    def _sources_changed(self, columns) -> bool:
+        """True for a new row, or when any key source column differs from the value loaded"""
+        loaded = self.__dict__.get('_loaded_sources')
+        if self._state.adding or loaded is None:
+            return True
+        for name in columns:
+            if name in loaded:
+                if getattr(self, name) != loaded[name]:
+                    return True
+            elif name in self.__dict__:
+                # Deferred when loaded, assigned since
+                return True
+        return False
+
+    @property
+    def raw_data(self):
+        """Complete raw record from the API, loaded from ParticipantRawData on first access"""
+        if '_pending_raw_data' in self.__dict__:
+            return self._pending_raw_data
+        if '_raw_data_cache' not in self.__dict__:
+            data = None
+            if self.pk is not None:
+                data = ParticipantRawData.objects.filter(participant_id=self.pk).values_list('data', flat=True).first()
+            self._raw_data_cache = data if data is not None else {}
+        return self._raw_data_cache
+
+    @raw_data.setter
+    def raw_data(self, value):
+        # Written to ParticipantRawData on the next save()
+        self._pending_raw_data = value
+
     @property
     def full_name(self):
         """Return farmer's full name"""
@@ -387,6 +599,26 @@ class AkilimoParticipant(models.Model):
                 pass
         return None
 
+class ParticipantRawData(models.Model):
+    """
+    Complete raw API record of an AkilimoParticipant
+
+    Kept off the participant table so list views, exports and aggregate
+    queries do not drag the JSON payload through every row they read.
+    """
+    participant = models.OneToOneField(AkilimoParticipant, on_delete=models.CASCADE, primary_key=True,
+                                       related_name='raw')
+    data = models.JSONField(default=dict, help_text="Complete raw data from API")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Participant raw data'
+        verbose_name_plural = 'Participant raw data'
+
+    def __str__(self):
+        return f"Raw data for participant {self.participant_id}"
+
+
 class DashboardMetrics(models.Model):
     """Store computed dashboard metrics"""
     metric_type = models.CharField(max_length=50)
@@ -422,11 +654,34 @@ class DataSyncLog(models.Model):
     records_processed = models.IntegerField(default=0)
     records_created = models.IntegerField(default=0)
     records_updated = models.IntegerField(default=0)
+    records_unchanged = models.IntegerField(default=0, help_text="Existing records whose content hash matched")
+    records_skipped = models.IntegerField(default=0, help_text="Invalid, duplicate or not-updated records")
+    records_deleted = models.IntegerField(default=0, help_text="Local records removed because they are gone upstream")
+    
+    # High-water mark reached by this sync, used by incremental runs
+    watermark_external_id = models.BigIntegerField(null=True, blank=True,
+                                                   help_text="Highest external_id synced")
+    watermark_created_on = models.DateTimeField(null=True, blank=True,
+                                                help_text="Latest api_created_on synced")
+    
+    # Last page committed, saved in the same transaction as that page's rows
+    checkpoint_page = models.IntegerField(null=True, blank=True)
+    checkpoint_page_size = models.IntegerField(null=True, blank=True)
+    
+    # Partitioned runs (sync_akilimo_data --workers): each worker's page range
+    # gets a child log under the coordinating sync
+    parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True,
+                               related_name='partitions')
+    partition_start_page = models.IntegerField(null=True, blank=True)
+    partition_end_page = models.IntegerField(null=True, blank=True)
     
     # Error details
     error_message = models.TextField(null=True, blank=True)
     error_details = models.JSONField(default=dict)
     
+    # Per-stage busy/wait/blocked time and throughput of the sync pipeline
+    stage_metrics = models.JSONField(default=dict, blank=True)
+    
     # Timing
     started_at = models.DateTimeField(auto_now_add=True)
     completed_at = models.DateTimeField(null=True, blank=True)
@@ -441,6 +696,35 @@ class DataSyncLog(models.Model):
     def __str__(self):
         return f"{self.sync_type} sync - {self.status} ({self.started_at})"
     
+    @classmethod
+    def latest_watermark(cls, sync_type='akilimo_participants'):
+        """Return the most recent successful sync that recorded a watermark"""
+        return cls.objects.filter(
+            sync_type=sync_type,
+            status='success',
+            watermark_external_id__isnull=False
+        ).first()
+    
+    @classmethod
+    def latest_resumable(cls, sync_type='akilimo_participants'):
+        """Return the newest unfinished sync with a checkpoint, unless a later sync succeeded"""
+        logs = cls.objects.filter(sync_type=sync_type)
+        candidates = logs.exclude(status='success').filter(checkpoint_page__isnull=False)
+        last_success = logs.filter(status='success').first()
+        if last_success:
+            candidates = candidates.filter(started_at__gt=last_success.started_at)
+        return candidates.first()
+    
+    def save_checkpoint(self, page, page_size):
+        """Persist progress after a committed page; call inside that page's transaction"""
+        self.checkpoint_page = page
+        self.checkpoint_page_size = page_size
+        self.save(update_fields=[
+            'checkpoint_page', 'checkpoint_page_size',
+            'records_processed', 'records_created', 'records_updated',
+            'records_unchanged', 'records_skipped',
+        ])
+    
     def mark_completed(self, status='success', error_message=None):
         """Mark sync as completed"""
         self.completed_at = timezone.now()
@@ -454,6 +738,158 @@ class DataSyncLog(models.Model):
         
         self.save()
 
+class SyncJob(models.Model):
+    """
+    Queued background sync, executed by the run_worker command
+
+    Workers claim a job by atomically moving it to 'running' with a lease.
+    A worker that dies stops renewing its lease, and once the lease expires
+    the job can be claimed again until max_attempts is used up.
+    """
+    JOB_TYPE_CHOICES = [
+        ('participants', 'Participant records sync'),
+    ]
+    
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('success', 'Success'),
+        ('failed', 'Failed'),
+    ]
+    
+    job_type = models.CharField(max_length=50, choices=JOB_TYPE_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    options = models.JSONField(default=dict, blank=True)
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    sync_log = models.ForeignKey(DataSyncLog, on_delete=models.SET_NULL, null=True, blank=True,
+                                 related_name='jobs')
+    
+    # Claim/lease state
+    worker_id = models.CharField(max_length=100, null=True, blank=True)
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=3)
+    
+    error_message = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+        constraints = [
+            # Enforced where the backend has partial indexes (SQLite, PostgreSQL); see enqueue() for MySQL
+            models.UniqueConstraint(fields=['job_type'], condition=models.Q(status__in=['queued', 'running']),
+                                    name='unique_pending_sync_job'),
+        ]
+    
+    def __str__(self):
+        return f"{self.job_type} job #{self.pk} - {self.status}"
+    
+    @property
+    def is_finished(self):
+        return self.status in ('success', 'failed')
+    
+    @classmethod
+    def enqueue(cls, job_type, options=None, requested_by=None):
+        """
+        Queue a job, or return the one of this type already queued or running
+        
+        When two requests race, only one job is created. The unique_pending_sync_job
+        constraint rejects the second INSERT on SQLite and PostgreSQL. On MySQL
+        the locking read takes a gap lock, so the second INSERT fails as a deadlock.
+        Either way the loser retries. Its locking read then waits for the
+        winner to commit, and it returns the winner's job.
+        """
+        pending = cls.objects.filter(job_type=job_type, status__in=['queued', 'running']).order_by('created_at')
+        attempts = 5
+        for attempt in range(1, attempts + 1):
+            try:
+                with transaction.atomic():
+                    job = pending.select_for_update().first()
+                    if job:
+                        return job, False
+                    job = cls.objects.create(job_type=job_type, options=options or {}, requested_by=requested_by)
+                return job, True
+            except (IntegrityError, OperationalError):
+                if attempt == attempts:
+                    raise
+                time.sleep(0.05 * attempt)
+    
+    @classmethod
+    def claim_next(cls, worker_id, lease_seconds=300, job_types=None):
+        """
+        Claim the oldest runnable job for worker_id
+        
+        Runnable means queued, or running with an expired lease. The claim is a
+        conditional UPDATE on the state that was read, so when two workers race
+        for the same job only one of them gets it.
+        
+        Returns:
+            The claimed SyncJob, or None when nothing is runnable
+        """
+        now = timezone.now()
+        expired = cls.objects.filter(status='running', lease_expires_at__lt=now)
+        expired.filter(attempts__gte=models.F('max_attempts')).update(
+            status='failed', finished_at=now, error_message='Lease expired after the last attempt'
+        )
+        
+        candidates = cls.objects.filter(
+            models.Q(status='queued') | models.Q(status='running', lease_expires_at__lt=now)
+        )
+        if job_types:
+            candidates = candidates.filter(job_type__in=job_types)
+        
+        for job in candidates.order_by('created_at')[:10]:
+            claimed = cls.objects.filter(
+                pk=job.pk,
+                status=job.status,
+                worker_id=job.worker_id,
+                lease_expires_at=job.lease_expires_at,
+            ).update(
+                status='running',
+                worker_id=worker_id,
+                lease_expires_at=now + timedelta(seconds=lease_seconds),
+                attempts=models.F('attempts') + 1,
+                started_at=now,
+            )
+            if claimed:
+                job.refresh_from_db()
+                return job
+        return None
+    
+    def heartbeat(self, lease_seconds=300):
+        """Extend the lease; returns False when another worker has taken the job over"""
+        expires = timezone.now() + timedelta(seconds=lease_seconds)
+        renewed = SyncJob.objects.filter(pk=self.pk, status='running', worker_id=self.worker_id).update(
+            lease_expires_at=expires
+        )
+        if renewed:
+            self.lease_expires_at = expires
+        return bool(renewed)
+    
+    def finish(self, status='success', error_message=None):
+        """Record the outcome, unless the lease has passed to another worker"""
+        now = timezone.now()
+        finished = SyncJob.objects.filter(pk=self.pk, worker_id=self.worker_id).update(
+            status=status, error_message=error_message, finished_at=now, lease_expires_at=None
+        )
+        if finished:
+            self.status = status
+            self.error_message = error_message
+            self.finished_at = now
+            self.lease_expires_at = None
+        return bool(finished)
+    
+    def release(self):
+        """Hand an unfinished job back to the queue, e.g. when a worker shuts down"""
+        SyncJob.objects.filter(pk=self.pk, worker_id=self.worker_id, status='running').update(
+            status='queued', worker_id=None, lease_expires_at=None, attempts=models.F('attempts') - 1
+        )
+
 # Keep the old model for backwards compatibility during migration
 class ParticipantRecord(models.Model):
     """Legacy model - will be migrated to AkilimoParticipant"""
@@ -0,0 +1,216 @@
+import hashlib
+import json
+from datetime import date, datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from django.db import models
+from django.utils.dateparse import parse_datetime, parse_date
+from .models import AkilimoParticipant, ParticipantRecord
+
+# Bump when the field mapping changes so every row is rewritten once
+FINGERPRINT_VERSION = '1'
+
+
+def fingerprint(record: Dict) -> str:
+    """Stable SHA-256 of a raw record: key order and whitespace do not matter"""
+    canonical = json.dumps(record, sort_keys=True, separators=(',', ':'),
+                           ensure_ascii=False, default=str)
+    return hashlib.sha256(f'{FINGERPRINT_VERSION}:{canonical}'.encode('utf-8', 'surrogatepass')).hexdigest()
+
+
+def _clean_text(value: str) -> str:
+    """Drop lone surrogates that MySQL rejects even with utf8mb4"""
+    try:
+        value.encode('utf-8')
+        return value
+    except UnicodeEncodeError:
+        return value.encode('utf-8', errors='ignore').decode('utf-8')
+
+
+def _number_converter(cast: Callable) -> Callable:
+    def convert(value):
+        try:
+            return cast(value)
+        except (TypeError, ValueError):
+            return None
+    return convert
+
+
+def _to_date(value):
+    if isinstance(value, date):
+        return value
+    try:
+        return parse_date(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_datetime(value):
+    if isinstance(value, datetime):
+        return value
+    try:
+        return parse_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _identity(value):
+    return value
+
+
+class RecordNormalizer:
+    """
+    Map raw API records onto a model's fields
+
+    The mapping is compiled once from ``model._meta`` into a list of
+    (target field, source keys, converter, max_length, default) entries, so
+    truncation lengths and type conversions always follow the schema. Text
+    fields (converter ``str``) are handled inline in the loop. ``source_keys``
+    maps a field to the API key (or keys, tried in order) it is read from;
+    fields default to reading the key of the same name. A missing value on a
+    non-null field with a default falls back to that default.
+    """
+
+    def __init__(self, model, source_keys: Optional[Dict] = None,
+                 fields: Optional[Iterable[str]] = None, exclude: Iterable[str] = ()):
+        self.model = model
+        self.plan = self._compile(source_keys or {}, fields, set(exclude))
+
+    def _compile(self, source_keys, fields, exclude) -> List[Tuple]:
+        plan = []
+        for field in self.model._meta.concrete_fields:
+            if field.primary_key or field.is_relation or field.name in exclude:
+                continue
+            if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+                continue
+            if fields is not None and field.name not in fields:
+                continue
+
+            keys = source_keys.get(field.name, field.name)
+            if not isinstance(keys, str):
+                keys = tuple(keys) if len(keys) > 1 else keys[0]
+            default = field.get_default() if not field.null and field.has_default() else None
+            max_length = field.max_length if isinstance(field, models.CharField) else None
+            plan.append((field.name, keys, self._converter_for(field), max_length, default))
+        return plan
+
+    @staticmethod
+    def _converter_for(field) -> Callable:
+        if isinstance(field, (models.CharField, models.TextField)):
+            return str
+        if isinstance(field, models.DateTimeField):
+            return _to_datetime
+        if isinstance(field, models.DateField):
+            return _to_date
+        if isinstance(field, models.BooleanField):
+            return _identity
+        if isinstance(field, models.IntegerField):
+            return _number_converter(int)
+        if isinstance(field, models.FloatField):
+            return _number_converter(float)
+        return _identity
+
+    def normalize(self, record: Dict) -> Dict:
+        """Return model field values for one raw record"""
+        get = record.get
+        data = {}
+        for name, key, convert, max_length, default in self.plan:
+            if key.__class__ is tuple:
+                value = None
+                for candidate in key:
+                    value = get(candidate)
+                    if value is not None:
+                        break
+            else:
+                value = get(key)
+
+            if value is None:
+                data[name] = default
+                continue
+
+            if convert is str:
+                if value.__class__ is not str:
+                    value = str(value)
+                if not value.isascii():
+                    value = _clean_text(value)
+                data[name] = value[:max_length] if max_length else value
+            else:
+                value = convert(value)
+                data[name] = default if value is None else value
+        return data
+
+    def normalize_many(self, records: Iterable[Dict]) -> Iterator[Dict]:
+        normalize = self.normalize
+        for record in records:
+            yield normalize(record)
+
+
+PARTICIPANT_NORMALIZER = RecordNormalizer(
+    AkilimoParticipant,
+    source_keys={'external_id': 'id', 'api_created_on': 'created_on'},
+    exclude=('raw_data', 'content_hash', 'gender_code'),
+)
+
+# Known farmer_gender spellings (trimmed and case-folded); analyze_api_data
+# lists the ones actually in use
+GENDER_CODES = {
+    'm': 'M', 'male': 'M', 'man': 'M', 'men': 'M', 'boy': 'M',
+    'homme': 'M', 'masculin': 'M', 'masculino': 'M',
+    'f': 'F', 'female': 'F', 'woman': 'F', 'women': 'F', 'girl': 'F',
+    'femme': 'F', 'feminin': 'F', 'féminin': 'F', 'feminino': 'F',
+    'o': 'O', 'other': 'O', 'others': 'O', 'non-binary': 'O', 'nonbinary': 'O',
+}
+
+LEGACY_RECORD_NORMALIZER = RecordNormalizer(
+    ParticipantRecord,
+    source_keys={'external_id': ('id', 'participant_id')},
+    fields=(
+        'external_id', 'gender', 'age_group', 'location', 'state', 'lga', 'event_type',
+        'facilitator', 'farm_size', 'previous_yield', 'expected_yield',
+    ),
+)
+
+
+def gender_code(value) -> str:
+    """Map a raw farmer_gender onto AkilimoParticipant.GENDER_CODE_CHOICES"""
+    if value is None:
+        return 'U'
+    text = str(value).strip().casefold()
+    code = GENDER_CODES.get(text)
+    if code:
+        return code
+    # Unlisted spellings fall back on the substring test the dashboards used to run
+    if 'female' in text:
+        return 'F'
+    if 'male' in text:
+        return 'M'
+    return 'U'
+
+
+def normalize_participant(participant_data: Dict) -> Optional[Dict]:
+    """
+    Map a raw MELIA participant record onto AkilimoParticipant fields
+
+    Returns:
+        Dict of model field values, or None when the record has no id
+    """
+    model_data = PARTICIPANT_NORMALIZER.normalize(participant_data)
+    if not model_data['external_id']:
+        return None
+    model_data['gender_code'] = gender_code(model_data['farmer_gender'])
+    model_data['raw_data'] = participant_data
+    model_data['content_hash'] = fingerprint(participant_data)
+    return model_data
+
+
+def normalize_legacy_record(participant_data: Dict) -> Optional[Dict]:
+    """
+    Map a raw MELIA participant record onto legacy ParticipantRecord fields
+
+    Returns:
+        Dict of model field values, or None when the record has no id
+    """
+    model_data = LEGACY_RECORD_NORMALIZER.normalize(participant_data)
+    if not model_data['external_id']:
+        return None
+    model_data['raw_data'] = participant_data
+    return model_data
@@ -0,0 +1,205 @@
+import gzip
+import json
+import os
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+from django.utils import timezone
+import logging
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_VERSION = 1
+MANIFEST_NAME = 'manifest.json'
+
+
+class PageArchiveError(Exception):
+    """Raised when an archive directory is missing, incomplete or inconsistent"""
+
+
+def _page_file(page: int) -> str:
+    return f'page-{page:06d}.ndjson.gz'
+
+
+class PageArchiveWriter:
+    """
+    Record fetched MELIA pages to a directory for later replay
+
+    Every page is written as gzip-compressed NDJSON (one raw record per line)
+    next to a ``manifest.json`` holding the page size and each page's
+    metadata (``count``, ``next``, ``previous``). A page file is moved into
+    place and listed in the manifest only once complete, so an interrupted
+    recording still leaves a readable archive. Recording into an existing
+    archive adds or replaces pages, which lets ``--resume`` runs extend it.
+    """
+
+    def __init__(self, directory: str, page_size: int, usecase_ref: str = 'akilimo',
+                 source_url: Optional[str] = None, compresslevel: int = 6):
+        self.directory = directory
+        self.compresslevel = compresslevel
+        os.makedirs(directory, exist_ok=True)
+
+        manifest_path = os.path.join(directory, MANIFEST_NAME)
+        if os.path.exists(manifest_path):
+            self.manifest = _load_manifest(directory)
+            if self.manifest['page_size'] != page_size:
+                raise PageArchiveError(
+                    f"{directory} holds pages of {self.manifest['page_size']} records, not {page_size}"
+                )
+        else:
+            self.manifest = {
+                'version': ARCHIVE_VERSION,
+                'usecase': usecase_ref,
+                'source_url': source_url,
+                'page_size': page_size,
+                'recorded_at': None,
+                'pages': {},
+            }
+
+    def tee(self, page: int, records: Iterable[Dict]) -> 'RecordingIterator':
+        """Wrap a page's records so each one is archived as it is consumed"""
+        return RecordingIterator(self, page, records)
+
+    def write_page(self, page: int, records: Iterable[Dict], meta: Dict) -> int:
+        """
+        Archive a whole page at once
+
+        Returns:
+            Number of records written
+        """
+        return self.tee(page, records).finish(meta)
+
+    def _commit_page(self, page: int, tmp_path: str, record_count: int, meta: Dict):
+        filename = _page_file(page)
+        os.replace(tmp_path, os.path.join(self.directory, filename))
+        self.manifest['pages'][str(page)] = {
+            'file': filename,
+            'records': record_count,
+            'meta': meta,
+        }
+        self.manifest['recorded_at'] = timezone.now().isoformat()
+        self._save_manifest()
+
+    def _save_manifest(self):
+        path = os.path.join(self.directory, MANIFEST_NAME)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=2, default=str)
+        os.replace(tmp_path, path)
+
+
+class RecordingIterator:
+    """Pass records through while writing them to a temporary page file"""
+
+    def __init__(self, archive: PageArchiveWriter, page: int, records: Iterable[Dict]):
+        self.archive = archive
+        self.page = page
+        self.records = iter(records)
+        self.count = 0
+        self.tmp_path = os.path.join(archive.directory, f'{_page_file(page)}.tmp')
+        self._file = gzip.open(self.tmp_path, 'wt', encoding='utf-8', errors='surrogatepass',
+                               compresslevel=archive.compresslevel)
+
+    def __iter__(self) -> Iterator[Dict]:
+        return self
+
+    def __next__(self) -> Dict:
+        record = next(self.records)
+        self._file.write(json.dumps(record, ensure_ascii=False, separators=(',', ':'), default=str))
+        self._file.write('\n')
+        self.count += 1
+        return record
+
+    def finish(self, meta: Dict) -> int:
+        """
+        Drain whatever the consumer left unread and commit the page file
+
+        Returns:
+            Number of records written
+        """
+        try:
+            for _ in self:
+                pass
+        except Exception:
+            self.discard()
+            raise
+        self._file.close()
+        self.archive._commit_page(self.page, self.tmp_path, self.count, meta)
+        return self.count
+
+    def discard(self):
+        """Drop the partial page file, e.g. after a failed download"""
+        self._file.close()
+        try:
+            os.remove(self.tmp_path)
+        except OSError:
+            pass
+
+
+def _load_manifest(directory: str) -> Dict:
+    path = os.path.join(directory, MANIFEST_NAME)
+    try:
+        with open(path, encoding='utf-8') as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        raise PageArchiveError(f'No {MANIFEST_NAME} in {directory}')
+    except ValueError as e:
+        raise PageArchiveError(f'Unreadable {path}: {e}')
+
+    if manifest.get('version') != ARCHIVE_VERSION:
+        raise PageArchiveError(f"Unsupported archive version {manifest.get('version')!r} in {path}")
+    return manifest
+
+
+class PageArchiveReader:
+    """
+    Replay pages recorded by PageArchiveWriter without touching the network
+
+    ``iter_pages`` yields ``(page, response)`` pairs shaped like
+    ``EiAMeliaAPIService.iter_participant_pages``, except that
+    ``response['data']`` is a lazy iterator over the page file.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.manifest = _load_manifest(directory)
+        self.page_size = self.manifest['page_size']
+        self.pages = sorted(int(page) for page in self.manifest['pages'])
+
+    @property
+    def record_count(self) -> int:
+        return sum(entry['records'] for entry in self.manifest['pages'].values())
+
+    def page_meta(self, page: int) -> Dict:
+        return dict(self.manifest['pages'][str(page)]['meta'])
+
+    def iter_records(self, page: int) -> Iterator[Dict]:
+        path = os.path.join(self.directory, self.manifest['pages'][str(page)]['file'])
+        with gzip.open(path, 'rt', encoding='utf-8', errors='surrogatepass') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def iter_pages(self, start_page: int = 1,
+                   end_page: Optional[int] = None) -> Iterator[Tuple[int, Dict]]:
+        """
+        Yield archived pages in order
+
+        Args:
+            start_page: First page to replay
+            end_page: Last page to replay (inclusive); None replays to the end
+
+        Yields:
+            Tuples of (page number, response dict with a lazy ``data`` iterator)
+        """
+        expected = start_page
+        for page in self.pages:
+            if page < start_page:
+                continue
+            if end_page is not None and page > end_page:
+                break
+            if page != expected:
+                logger.warning(f'Archive {self.directory} has no page {expected}; jumping to page {page}')
+            expected = page + 1
+
+            response = self.page_meta(page)
+            response['data'] = self.iter_records(page)
+            yield page, response
@@ -0,0 +1,222 @@
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+from typing import Callable, Dict, List, Optional, Tuple
+import django
+from django.db import close_old_connections, connections, transaction
+import logging
+
+logger = logging.getLogger(__name__)
+
+PARTITION_SYNC_TYPE = 'akilimo_participants_partition'
+COUNTER_FIELDS = ('records_processed', 'records_created', 'records_updated', 'records_unchanged', 'records_skipped')
+
+
+def plan_partitions(start_page: int, end_page: int, partitions: int) -> List[Tuple[int, int]]:
+    """Split pages start_page..end_page into up to `partitions` contiguous, near-equal ranges"""
+    pages = end_page - start_page + 1
+    partitions = max(1, min(partitions, pages))
+    size, extra = divmod(pages, partitions)
+    ranges = []
+    first = start_page
+    for i in range(partitions):
+        last = first + size - 1 + (1 if i < extra else 0)
+        ranges.append((first, last))
+        first = last + 1
+    return ranges
+
+
+def _init_worker():
+    # Spawned workers start from a bare interpreter
+    django.setup()
+
+
+def sync_partition(child_log_id: int, options: Dict) -> Dict:
+    """
+    Sync one page range into AkilimoParticipant; runs in a worker process
+
+    Picks up from the child log's checkpoint, so a retried partition skips
+    the pages it already committed. Every page is written together with the
+    checkpoint and counters in one transaction, as in the single-process
+    sync.
+
+    Returns:
+        Dict with the child log id, final status and error (if any)
+    """
+    from .models import DataSyncLog
+    from .services import EiAMeliaAPIService, PageFetchError
+    from .sync_service import ParticipantBulkWriter
+
+    close_old_connections()
+    child_log = DataSyncLog.objects.get(pk=child_log_id)
+    start_page = (child_log.checkpoint_page + 1) if child_log.checkpoint_page else child_log.partition_start_page
+    end_page = child_log.partition_end_page
+    batch_size = options['batch_size']
+
+    child_log.status = 'started'
+    child_log.error_message = None
+    child_log.completed_at = None
+    child_log.save(update_fields=['status', 'error_message', 'completed_at'])
+
+    if start_page > end_page:
+        child_log.mark_completed('success')
+        return {'log_id': child_log_id, 'status': 'success', 'error': None}
+
+    api_service = EiAMeliaAPIService(options['token'], base_url=options['base_url'])
+    writer = ParticipantBulkWriter(force_update=options['force'])
+    record_limit = options.get('record_limit')
+
+    try:
+        if options['stream']:
+            pages = api_service.iter_streamed_pages(
+                'akilimo', page_size=batch_size, start_page=start_page, end_page=end_page
+            )
+        else:
+            pages = api_service.iter_participant_pages(
+                'akilimo', page_size=batch_size, start_page=start_page, end_page=end_page,
+                workers=options['fetch_workers'], use_cache=options['use_cache']
+            )
+
+        try:
+            for page, response in pages:
+                participants_data = iter(response) if options['stream'] else response.get('data', [])
+                if record_limit is not None:
+                    # Only the partition holding the --max-records cut-off has a limit
+                    remaining = record_limit - (page - 1) * batch_size
+                    participants_data = islice(participants_data, max(remaining, 0))
+
+                with transaction.atomic():
+                    counts = writer.write_page(participants_data)
+                    batch_processed = sum(counts.values())
+                    if not batch_processed:
+                        break
+                    child_log.records_processed += batch_processed
+                    child_log.records_created += counts['created']
+                    child_log.records_updated += counts['updated']
+                    child_log.records_unchanged += counts['unchanged']
+                    child_log.records_skipped += counts['skipped']
+                    child_log.save_checkpoint(page, batch_size)
+        finally:
+            pages.close()
+
+        child_log.mark_completed('success')
+        return {'log_id': child_log_id, 'status': 'success', 'error': None}
+    except Exception as e:
+        partition = f'Partition {child_log.partition_start_page}-{end_page}'
+        if isinstance(e, PageFetchError):
+            response = getattr(e.error, 'response', None)
+            status = f' (HTTP {response.status_code})' if response is not None else ''
+            logger.error(f'{partition} stopped at page {e.page}{status}: {e}')
+        else:
+            logger.exception(f'{partition} failed: {e}')
+        child_log.mark_completed('partial' if child_log.checkpoint_page else 'failed', str(e))
+        return {'log_id': child_log_id, 'status': child_log.status, 'error': str(e)}
+    finally:
+        connections.close_all()
+
+
+class PartitionedSync:
+    """
+    Coordinate a full sync split across worker processes
+
+    The page range is cut into partitions, each with a child DataSyncLog under
+    parent_log, and handed to a pool of `workers` spawned processes with
+    their own DB connections and HTTP sessions. A partition that fails is
+    resubmitted from its checkpoint up to `retries` times. The parent log
+    ends up with the summed counters of its children.
+    """
+
+    def __init__(self, parent_log, options: Dict, workers: int, retries: int = 2,
+                 partitions: Optional[int] = None):
+        self.parent_log = parent_log
+        self.options = options
+        self.workers = workers
+        self.retries = retries
+        self.partitions = partitions or workers * 4
+        self.record_limit = None
+
+    def create_partitions(self, start_page: int, end_page: int, record_limit: Optional[int] = None):
+        """
+        Create one child log per page range
+
+        Args:
+            record_limit: Total records to sync (--max-records); applied to the last partition
+        """
+        from .models import DataSyncLog
+
+        children = []
+        for first, last in plan_partitions(start_page, end_page, self.partitions):
+            children.append(DataSyncLog.objects.create(
+                sync_type=PARTITION_SYNC_TYPE,
+                status='started',
+                parent=self.parent_log,
+                partition_start_page=first,
+                partition_end_page=last,
+            ))
+        self.record_limit = record_limit
+        return children
+
+    def run(self, children, on_result: Optional[Callable[[Dict, int], None]] = None) -> Dict:
+        """
+        Run every partition to completion (or until its retries run out)
+
+        Args:
+            children: Child logs from create_partitions
+            on_result: Called with each worker result and the attempt number
+
+        Returns:
+            Dict with the summed counters and the list of failed child log ids
+        """
+        attempts = {child.pk: 0 for child in children}
+        failed = []
+
+        # Workers must not inherit this process's open DB connection
+        connections.close_all()
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+        )
+        try:
+            pending = {}
+
+            def submit(child_id):
+                attempts[child_id] += 1
+                options = dict(self.options)
+                if self.record_limit is not None and child_id == children[-1].pk:
+                    options['record_limit'] = self.record_limit
+                pending[executor.submit(sync_partition, child_id, options)] = child_id
+
+            for child in children:
+                submit(child.pk)
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    child_id = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:  # the worker process itself died
+                        result = {'log_id': child_id, 'status': 'failed', 'error': str(e)}
+                    if on_result:
+                        on_result(result, attempts[child_id])
+                    if result['status'] == 'success':
+                        continue
+                    if attempts[child_id] <= self.retries:
+                        submit(child_id)
+                    else:
+                        failed.append(child_id)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        return {'totals': self.aggregate(), 'failed': failed}
+
+    def aggregate(self) -> Dict[str, int]:
+        """Sum child counters onto the parent log (not saved)"""
+        totals = {field: 0 for field in COUNTER_FIELDS}
+        for values in self.parent_log.partitions.values(*COUNTER_FIELDS):
+            for field in COUNTER_FIELDS:
+                totals[field] += values[field]
+        for field, value in totals.items():
+            setattr(self.parent_log, field, value)
+        return totals
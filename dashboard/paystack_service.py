@@ -4,6 +4,7 @@ import logging
 from django.conf import settings
 from django.utils import timezone
 from decimal import Decimal
+from .http_client import get_session
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +17,9 @@ class PaystackService:
         self.secret_key = getattr(settings, 'PAYSTACK_SECRET_KEY', 'sk_test_1ccdb1ad0a8a19c53492781336ad15390760afd8')
         self.public_key = getattr(settings, 'PAYSTACK_PUBLIC_KEY', 'pk_test_96b9995fbf552beec8da11acbb821aa5c1d06341')
         self.base_url = 'https://api.paystack.co'
+        # Shared keep-alive session; its retries never repeat a POST
+        self.session = get_session()
+        self.timeout = 30
         
         self.headers = {
             'Authorization': f'Bearer {self.secret_key}',
@@ -47,7 +51,7 @@ class PaystackService:
         }
         
         try:
-            response = requests.post(url, headers=self.headers, json=data, timeout=30)
+            response = self.session.post(url, headers=self.headers, json=data, timeout=self.timeout)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
@@ -76,7 +80,7 @@ class PaystackService:
         url = f'{self.base_url}/transaction/verify/{reference}'
         
         try:
-            response = requests.get(url, headers=self.headers, timeout=30)
+            response = self.session.get(url, headers=self.headers, timeout=self.timeout)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
@@ -110,7 +114,7 @@ class PaystackService:
         }
         
         try:
-            response = requests.get(url, headers=self.headers, params=params, timeout=30)
+            response = self.session.get(url, headers=self.headers, params=params, timeout=self.timeout)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
@@ -145,7 +149,7 @@ class PaystackService:
             data['phone'] = phone
         
         try:
-            response = requests.post(url, headers=self.headers, json=data, timeout=30)
+            response = self.session.post(url, headers=self.headers, json=data, timeout=self.timeout)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
@@ -165,7 +169,7 @@ class PaystackService:
         url = f'{self.base_url}/bank'
         
         try:
-            response = requests.get(url, headers=self.headers, timeout=30)
+            response = self.session.get(url, headers=self.headers, timeout=self.timeout)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
@@ -0,0 +1,165 @@
+import heapq
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterator, List, Tuple
+from .models import AkilimoParticipant
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Unsorted ids are sorted in runs of this many before merging, which bounds
+# the temporary Python list a sort needs
+SORT_RUN = 1 << 18
+
+
+class ExternalIdSet:
+    """
+    Compact set of upstream external_ids, 8 bytes per id
+
+    Ids are appended to an ``array('q')`` as pages arrive. The API lists
+    records in id order, so the array is normally already sorted; otherwise
+    freeze() sorts it in bounded runs and merges them. Membership is a binary
+    search over the sorted array.
+    """
+
+    def __init__(self):
+        self._ids = array('q')
+        self._sorted = True
+        self._frozen = False
+
+    def add(self, external_id) -> bool:
+        """Record an upstream id; ids that are not integers are ignored"""
+        try:
+            external_id = int(external_id)
+        except (TypeError, ValueError):
+            return False
+        ids = self._ids
+        if ids and external_id <= ids[-1]:
+            if external_id == ids[-1]:
+                return True
+            self._sorted = False
+        ids.append(external_id)
+        self._frozen = False
+        return True
+
+    def freeze(self) -> 'ExternalIdSet':
+        """Sort and de-duplicate the ids collected so far"""
+        if self._frozen:
+            return self
+        ids = self._ids
+        if not self._sorted:
+            view = memoryview(ids)
+            runs = []
+            for start in range(0, len(ids), SORT_RUN):
+                ids[start:start + SORT_RUN] = array('q', sorted(view[start:start + SORT_RUN]))
+                runs.append(view[start:start + SORT_RUN])
+            merged = array('q')
+            for external_id in heapq.merge(*runs):
+                if not merged or merged[-1] != external_id:
+                    merged.append(external_id)
+            view.release()
+            for run in runs:
+                run.release()
+            self._ids = merged
+            self._sorted = True
+        self._frozen = True
+        return self
+
+    def __len__(self) -> int:
+        return len(self.freeze()._ids)
+
+    def __contains__(self, external_id) -> bool:
+        ids = self.freeze()._ids
+        i = bisect_left(ids, external_id)
+        return i < len(ids) and ids[i] == external_id
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.freeze()._ids)
+
+    @property
+    def nbytes(self) -> int:
+        return self._ids.itemsize * len(self._ids)
+
+
+class DeletionReconciler:
+    """
+    Remove AkilimoParticipant rows whose external_id is gone upstream
+
+    The table is walked in external_id order in chunks of chunk_size (keyset
+    pagination on the unique index), and each chunk is diffed against the
+    sorted upstream ids with a moving binary search. Orphan primary keys are
+    collected in an array and purged in chunks once the walk is done. If the
+    orphans exceed max_delete_ratio of the table, nothing is deleted: a
+    truncated upstream listing looks exactly like a mass deletion.
+    """
+
+    def __init__(self, upstream_ids: ExternalIdSet, chunk_size: int = 5000, max_delete_ratio: float = 0.05):
+        self.upstream_ids = upstream_ids.freeze()
+        self.chunk_size = chunk_size
+        self.max_delete_ratio = max_delete_ratio
+
+    def find_orphans(self) -> Tuple[int, array]:
+        """
+        Returns:
+            Tuple of (rows checked, primary keys of rows missing upstream)
+        """
+        upstream = self.upstream_ids._ids
+        orphans = array('q')
+        checked = 0
+        position = 0
+        last_external_id = None
+
+        while True:
+            queryset = AkilimoParticipant.objects.order_by('external_id')
+            if last_external_id is not None:
+                queryset = queryset.filter(external_id__gt=last_external_id)
+            rows = list(queryset.values_list('external_id', 'id')[:self.chunk_size])
+            if not rows:
+                break
+
+            for external_id, pk in rows:
+                position = bisect_left(upstream, external_id, position)
+                if position >= len(upstream) or upstream[position] != external_id:
+                    orphans.append(pk)
+
+            checked += len(rows)
+            last_external_id = rows[-1][0]
+
+        return checked, orphans
+
+    def run(self, dry_run: bool = False) -> Dict:
+        """
+        Diff the table against the upstream ids and purge the orphans
+
+        Returns:
+            Dict with upstream, checked, orphans and deleted counts, plus a
+            refused message when the deletion guard tripped
+        """
+        checked, orphans = self.find_orphans()
+        result = {
+            'upstream': len(self.upstream_ids),
+            'checked': checked,
+            'orphans': len(orphans),
+            'deleted': 0,
+            'refused': None,
+        }
+
+        if not orphans or dry_run:
+            return result
+
+        if len(orphans) > checked * self.max_delete_ratio:
+            result['refused'] = (
+                f'{len(orphans):,} of {checked:,} participants are missing upstream, above the '
+                f'{self.max_delete_ratio:.0%} limit — nothing deleted'
+            )
+            logger.warning(f"Deletion reconciliation refused: {result['refused']}")
+            return result
+
+        for pks in self._chunks(orphans):
+            _, deleted = AkilimoParticipant.objects.filter(pk__in=pks).delete()
+            result['deleted'] += deleted.get(AkilimoParticipant._meta.label, 0)
+        return result
+
+    def _chunks(self, pks: array) -> Iterator[List[int]]:
+        for start in range(0, len(pks), self.chunk_size):
+            yield pks[start:start + self.chunk_size].tolist()
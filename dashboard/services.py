@@ -1,11 +1,174 @@
 import requests
-from typing import Dict, List, Optional
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 from django.conf import settings
-from django.core.cache import cache
+from .http_cache import get_http_cache
+from .http_client import get_session, max_attempts
+from .json_stream import StreamedPage
 import logging
 
 logger = logging.getLogger(__name__)
 
+
+class PageFetchError(Exception):
+    """Raised when a page could not be fetched after all retries"""
+
+    def __init__(self, page: int, attempts: int, error: Exception):
+        self.page = page
+        self.attempts = attempts
+        self.error = error
+        super().__init__(f"Page {page} failed after {attempts} attempts: {error}")
+
+
+class AdaptivePageSize:
+    """
+    Pick MELIA page sizes from observed latency, errors and Retry-After
+
+    Sizes sit on a ladder of doublings and halvings of the starting size,
+    between MIN_PAGE_SIZE and the API's 2000-record cap. Any record offset
+    reached so far is a multiple of the smallest rung, so a page number can
+    always be found for it; size_for() picks the largest aligned rung up to
+    the current target. The target grows one rung after grow_after healthy
+    pages in a row (no retries, faster than target_latency), unless the
+    bigger size has already proved slower per record. It shrinks one rung
+    on a timeout, a 429/5xx, a connection error the HTTP client retried
+    away or a page slower than target_latency; a size that failed is then off limits
+    for cooldown pages, doubling with each repeat failure. Retry-After on a failed response pauses the next
+    request for that long.
+    """
+
+    MAX_PAGE_SIZE = 2000
+    MIN_PAGE_SIZE = 25
+
+    def __init__(self, initial_size: int = 100, target_latency: float = 10.0, grow_after: int = 3,
+                 cooldown: int = 20, min_size: int = MIN_PAGE_SIZE, max_size: int = MAX_PAGE_SIZE):
+        initial_size = max(1, min(initial_size, max_size))
+        sizes = [initial_size]
+        while sizes[-1] * 2 <= max_size:
+            sizes.append(sizes[-1] * 2)
+        while sizes[0] % 2 == 0 and sizes[0] // 2 >= min_size:
+            sizes.insert(0, sizes[0] // 2)
+        self.sizes = sizes
+        self.index = sizes.index(initial_size)
+        self.target_latency = target_latency
+        self.grow_after = grow_after
+        self.cooldown = cooldown
+        self.pages = 0
+        self.healthy_streak = 0
+        self.ceiling = len(sizes) - 1
+        self.ceiling_until = 0
+        self.paused_until = 0.0
+        self.rates: Dict[int, float] = {}
+        self.stats: Dict[int, Dict] = {}
+        self.changes: List[Dict] = []
+
+    @property
+    def page_size(self) -> int:
+        return self.sizes[self.index]
+
+    def size_for(self, offset: int) -> int:
+        """Largest size up to the current target that starts a page at offset"""
+        i = self.index
+        while i > 0 and offset % self.sizes[i]:
+            i -= 1
+        return self.sizes[i]
+
+    def wait(self):
+        """Sleep out a pause requested by Retry-After"""
+        delay = self.paused_until - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def record(self, size: int, seconds: float, error: Optional[Exception] = None, retries: int = 0,
+               retry_after: Optional[float] = None):
+        """Feed back the outcome of one page request"""
+        self.pages += 1
+        stats = self.stats.setdefault(size, {'pages': 0, 'errors': 0, 'retries': 0, 'seconds': 0.0})
+        stats['pages'] += 1
+        stats['seconds'] += seconds
+        stats['retries'] += retries
+
+        if retry_after:
+            self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+            logger.info(f'MELIA asked to retry after {retry_after:.0f}s; pausing')
+
+        if error is not None:
+            stats['errors'] += 1
+            self._shrink(size, f'{error.__class__.__name__} after {seconds:.1f}s', avoid=True)
+        elif retries:
+            self._shrink(size, f'{retries} retried error(s)', avoid=True)
+        elif seconds > self.target_latency:
+            self._shrink(size, f'{seconds:.1f}s page, over the {self.target_latency:.0f}s target')
+        else:
+            rate = size / seconds if seconds else float('inf')
+            previous = self.rates.get(size)
+            self.rates[size] = rate if previous is None else previous * 0.7 + rate * 0.3
+            self.healthy_streak += 1
+            if self.healthy_streak >= self.grow_after and size == self.page_size:
+                self._grow()
+
+    def report(self) -> Dict:
+        """Per-size page counts, errors, latency and throughput, plus the size changes made"""
+        return {
+            'final_size': self.page_size,
+            'sizes': {
+                size: {
+                    'pages': stats['pages'],
+                    'errors': stats['errors'],
+                    'retries': stats['retries'],
+                    'mean_latency': round(stats['seconds'] / stats['pages'], 3),
+                    'records_per_second': round(self.rates[size], 1) if size in self.rates else None,
+                }
+                for size, stats in sorted(self.stats.items())
+            },
+            'changes': self.changes[-50:],
+        }
+
+    def _grow(self):
+        if self.index >= self.ceiling and self.pages < self.ceiling_until:
+            return
+        if self.index + 1 >= len(self.sizes):
+            return
+        current, bigger = self.sizes[self.index], self.sizes[self.index + 1]
+        if bigger in self.rates and self.rates[bigger] <= self.rates.get(current, 0):
+            return  # tried already and it was no faster per record
+        self._change(self.index + 1, f'{self.healthy_streak} healthy pages')
+
+    def _shrink(self, size: int, reason: str, avoid: bool = False):
+        failed_index = self.sizes.index(size)
+        if avoid:
+            failures = self.stats[size]['errors'] + self.stats[size]['retries']
+            self.ceiling = max(failed_index - 1, 0)
+            self.ceiling_until = self.pages + self.cooldown * 2 ** min(max(failures - 1, 0), 6)
+        self._change(max(min(self.index, failed_index) - 1, 0), reason)
+
+    def _change(self, index: int, reason: str):
+        self.healthy_streak = 0
+        if index == self.index:
+            return
+        old, new = self.sizes[self.index], self.sizes[index]
+        self.index = index
+        self.changes.append({'page': self.pages, 'from': old, 'to': new, 'reason': reason})
+        logger.info(f'MELIA page size {old} -> {new} ({reason})')
+
+
+def _retry_after(response: Optional[requests.Response]) -> Optional[float]:
+    """Seconds asked for by a Retry-After header (delta-seconds or HTTP date)"""
+    value = response.headers.get('Retry-After') if response is not None else None
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0)
+    except (TypeError, ValueError):
+        return None
+
+
 class EiAMeliaAPIService:
     """Service class to interact with EiA MELIA API"""
 
@@ -21,19 +184,29 @@ class EiAMeliaAPIService:
             'Content-Type': 'application/json'
         }
     
-    def _make_request(self, endpoint: str, params: Optional[Dict] = None) -> Dict:
-        """Make authenticated request to EiA MELIA API"""
+    def _make_request(self, endpoint: str, params: Optional[Dict] = None, use_cache: bool = False) -> Dict:
+        """
+        Make authenticated request to EiA MELIA API
+
+        With use_cache, the response goes through the on-disk HTTP cache (when
+        one is configured) and is revalidated with ETag/Last-Modified.
+        """
         url = f"{self.BASE_URL}/{endpoint.lstrip('/')}"
+        http_cache = get_http_cache() if use_cache else None
         
         try:
-            response = requests.get(url, headers=self.headers, params=params, timeout=120)
+            # Pooled keep-alive session; retries and timeouts come from settings.HTTP_CLIENT
+            if http_cache:
+                return http_cache.get_json(get_session(), url, params=params, headers=self.headers)
+            response = get_session().get(url, headers=self.headers, params=params)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
             logger.error(f"API request failed: {e}")
             raise
     
-    def get_participants_by_usecase(self, usecase_ref: str, page: int = 1, page_size: int = 100) -> Dict:
+    def get_participants_by_usecase(self, usecase_ref: str, page: int = 1, page_size: int = 100,
+                                    use_cache: bool = True) -> Dict:
         """
         Get event participants by use case
         
@@ -41,6 +214,7 @@ class EiAMeliaAPIService:
             usecase_ref: Reference for the use case (e.g., 'akilimo')
             page: Page number for pagination
             page_size: Number of records per page (max 1000)
+            use_cache: Go through the revalidating HTTP cache; False always refetches
         
         Returns:
             Dict containing count, next, previous, and data
@@ -51,91 +225,293 @@ class EiAMeliaAPIService:
             'page_size': min(page_size, 2000)  # Ensure max limit
         }
         
-        cache_key = f"participants_{usecase_ref}_{page}_{page_size}"
-        cached_data = cache.get(cache_key)
-        
-        if cached_data:
-            return cached_data
-        
-        data = self._make_request(endpoint, params)
-        
-        # Cache for 15 minutes
-        cache.set(cache_key, data, 900)
-        
-        return data
+        return self._make_request(endpoint, params, use_cache=use_cache)
     
-    def get_all_participants_by_usecase(self, usecase_ref: str, max_pages: int = 10) -> List[Dict]:
+    def fetch_participants_page(self, usecase_ref: str, page: int, page_size: int,
+                                use_cache: bool = False) -> Dict:
         """
-        Get all participants for a use case across multiple pages
-        
-        Args:
-            usecase_ref: Reference for the use case
-            max_pages: Maximum number of pages to fetch
-        
-        Returns:
-            List of all participant records
+        Fetch a single page, straight from the API unless use_cache is set
+
+        Transient errors (429, 502, 503, 504, dropped connections) are retried
+        with exponential back-off by the shared HTTP client; PageFetchError is
+        raised once those retries are exhausted.
         """
-        all_participants = []
-        page = 1
-        
-        while page <= max_pages:
-            try:
-                response = self.get_participants_by_usecase(usecase_ref, page=page, page_size=1000)
-                participants = response.get('data', [])
-                
-                if not participants:
-                    break
-                
-                all_participants.extend(participants)
-                
-                # Check if there's a next page
-                if not response.get('next'):
+        endpoint = f"data/eventsparts/usecase/{usecase_ref}/"
+        params = {
+            'page': page,
+            'page_size': min(page_size, 2000)
+        }
+
+        try:
+            return self._make_request(endpoint, params, use_cache=use_cache)
+        except Exception as e:
+            raise PageFetchError(page, max_attempts(self.BASE_URL), e)
+
+    def iter_participant_pages(self, usecase_ref: str, page_size: int = 100, start_page: int = 1,
+                               end_page: Optional[int] = None, workers: int = 1,
+                               descending: bool = False, use_cache: bool = False) -> Iterator[Tuple[int, Dict]]:
+        """
+        Yield (page, response) in page order while prefetching pages ahead
+
+        Up to ``workers`` pages are downloaded concurrently on a bounded thread
+        pool and at most ``workers * 2`` pages are held in flight, so the caller
+        can write page N while pages N+1.. are still on the wire. Iteration stops
+        after the first empty page, the first page without ``next``, or
+        ``end_page``. With ``descending`` the walk goes from ``start_page`` down
+        to ``end_page`` (default 1) instead. Worker threads only do HTTP, never
+        database access. ``use_cache`` fetches pages through the revalidating
+        HTTP cache.
+
+        Raises:
+            PageFetchError: when a page still fails after its retries
+        """
+        workers = max(1, workers)
+        max_ahead = workers * 2
+        step = -1 if descending else 1
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='melia-fetch')
+        pending = {}
+        next_page = start_page
+        last_page = 1 if descending and end_page is None else end_page
+
+        def in_range(p):
+            if last_page is None:
+                return True
+            return p >= last_page if descending else p <= last_page
+
+        def schedule(limit):
+            nonlocal next_page
+            while len(pending) < limit and next_page >= 1 and in_range(next_page):
+                pending[next_page] = executor.submit(
+                    self.fetch_participants_page, usecase_ref, next_page, page_size, use_cache
+                )
+                next_page += step
+
+        try:
+            page = start_page
+            # Fetch the first page alone so its count bounds the look-ahead
+            schedule(1)
+            while page in pending:
+                response = pending.pop(page).result()
+                if not descending and page == start_page and response.get('count') is not None:
+                    count_pages = max(1, -(-response['count'] // min(page_size, 2000)))
+                    last_page = count_pages if last_page is None else min(last_page, count_pages)
+                has_more = bool(response.get('data')) and page + step >= 1 and in_range(page + step)
+                if not descending:
+                    has_more = has_more and bool(response.get('next'))
+                if has_more:
+                    schedule(max_ahead)
+                yield page, response
+                if not has_more:
                     break
-                
-                page += 1
-                
-            except Exception as e:
-                logger.error(f"Error fetching page {page}: {e}")
+                page += step
+        finally:
+            # Drop look-ahead pages past the end (or after an error) without waiting on them
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def fetch_participants_page_body(self, usecase_ref: str, page: int, page_size: int,
+                                     use_cache: bool = False) -> bytes:
+        """
+        Fetch a single page as raw JSON bytes, leaving decoding to the caller
+
+        Raises:
+            PageFetchError: when the page still fails after its retries
+        """
+        url = f"{self.BASE_URL}/data/eventsparts/usecase/{usecase_ref}/"
+        params = {
+            'page': page,
+            'page_size': min(page_size, 2000)
+        }
+        http_cache = get_http_cache() if use_cache else None
+
+        try:
+            if http_cache:
+                return http_cache.get_bytes(get_session(), url, params=params, headers=self.headers)
+            response = get_session().get(url, headers=self.headers, params=params)
+            response.raise_for_status()
+            return response.content
+        except requests.exceptions.RequestException as e:
+            logger.error(f"API request failed: {e}")
+            raise PageFetchError(page, max_attempts(url), e)
+
+    def iter_page_bodies(self, usecase_ref: str, pages: Iterable[int], page_size: int = 100,
+                         workers: int = 1, use_cache: bool = False) -> Iterator[Tuple[int, bytes]]:
+        """
+        Yield (page, raw body) for the given pages, in order, prefetching ahead
+
+        Unlike iter_participant_pages nothing is decoded, so the caller decides
+        where JSON parsing happens and when to stop; at most ``workers * 2``
+        pages are in flight.
+
+        Raises:
+            PageFetchError: when a page still fails after its retries
+        """
+        workers = max(1, workers)
+        pages = iter(pages)
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='melia-fetch')
+        pending = deque()
+
+        try:
+            for page in islice(pages, workers * 2):
+                pending.append((page, executor.submit(
+                    self.fetch_participants_page_body, usecase_ref, page, page_size, use_cache
+                )))
+            while pending:
+                page, future = pending.popleft()
+                body = future.result()
+                for next_page in islice(pages, 1):
+                    pending.append((next_page, executor.submit(
+                        self.fetch_participants_page_body, usecase_ref, next_page, page_size, use_cache
+                    )))
+                yield page, body
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def iter_adaptive_pages(self, usecase_ref: str, controller: AdaptivePageSize, end_record: int,
+                            start_record: int = 0) -> Iterator[Tuple[int, bytes, int]]:
+        """
+        Yield (page, raw body, page size) from start_record to end_record, sizing each page with controller
+
+        Pages are requested one at a time so every response can steer the
+        next size. 429 and 5xx responses are not retried by the HTTP client
+        here, so the first one shrinks the page and honours its Retry-After;
+        the failed page is requested again at a smaller size, and
+        PageFetchError is raised once it fails at the smallest size.
+        """
+        url = f"{self.BASE_URL}/data/eventsparts/usecase/{usecase_ref}/"
+        offset = start_record
+
+        while offset < end_record:
+            size = controller.size_for(offset)
+            page = offset // size + 1
+            controller.wait()
+            started = time.monotonic()
+            try:
+                # No status retries in the session: the first 429/5xx goes straight to the controller
+                response = get_session(status_retries=False).get(
+                    url, headers=self.headers, params={'page': page, 'page_size': size}
+                )
+                retries = response.raw.retries.history if getattr(response.raw, 'retries', None) else ()
+                response.raise_for_status()
+                body = response.content
+            except requests.exceptions.RequestException as e:
+                logger.error(f"API request failed: {e}")
+                controller.record(size, time.monotonic() - started, error=e,
+                                  retry_after=_retry_after(getattr(e, 'response', None)))
+                if size == controller.sizes[0]:
+                    raise PageFetchError(page, max_attempts(url), e)
+                continue
+
+            controller.record(size, time.monotonic() - started, retries=len(retries))
+            yield page, body, size
+            offset += size
+
+    def stream_participants_page(self, usecase_ref: str, page: int, page_size: int) -> StreamedPage:
+        """
+        Open a page and decode its records incrementally as they are iterated
+
+        The body is read with ``stream=True``, so memory stays bounded by one
+        record rather than the whole page. Connection and HTTP status errors
+        raise PageFetchError here; failures while reading the body raise it
+        during iteration.
+        """
+        url = f"{self.BASE_URL}/data/eventsparts/usecase/{usecase_ref}/"
+        params = {
+            'page': page,
+            'page_size': min(page_size, 2000)
+        }
+
+        try:
+            response = get_session().get(url, headers=self.headers, params=params, stream=True)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            logger.error(f"API request failed: {e}")
+            raise PageFetchError(page, max_attempts(url), e)
+
+        def chunks():
+            try:
+                yield from response.iter_content(chunk_size=64 * 1024)
+            except requests.exceptions.RequestException as e:
+                raise PageFetchError(page, 1, e)
+            finally:
+                response.close()
+
+        return StreamedPage(chunks())
+
+    def iter_streamed_pages(self, usecase_ref: str, page_size: int = 100, start_page: int = 1,
+                            end_page: Optional[int] = None,
+                            descending: bool = False) -> Iterator[Tuple[int, StreamedPage]]:
+        """
+        Yield (page, StreamedPage) one page at a time, in page order
+
+        Pages are opened sequentially once the caller has consumed the previous
+        one, so no page is ever fully materialised. Iteration ends after an
+        empty page, a page without ``next``, or ``end_page``; with
+        ``descending`` it walks from ``start_page`` down to ``end_page``
+        (default 1) instead.
+        """
+        step = -1 if descending else 1
+        last_page = 1 if descending and end_page is None else end_page
+        page = start_page
+
+        while page >= 1 and (last_page is None or (page >= last_page if descending else page <= last_page)):
+            streamed = self.stream_participants_page(usecase_ref, page, page_size)
+            try:
+                yield page, streamed
+            finally:
+                streamed.close()
+            if not streamed.records_seen:
                 break
-        
-        return all_participants
+            if not descending and streamed.finished and not streamed.meta.get('next'):
+                break
+            page += step
+
+    def iter_participants(self, usecase_ref: str, page_size: int = 1000, start_page: int = 1) -> Iterator[Dict]:
+        """
+        Yield every participant record for a use case, page by page
+
+        Only the page being consumed (plus one prefetched page) is held in
+        memory, and there is no page cap: iteration ends when the API reports
+        no further pages.
+
+        Raises:
+            PageFetchError: when a page still fails after its retries
+        """
+        for page, response in self.iter_participant_pages(usecase_ref, page_size=page_size, start_page=start_page):
+            yield from response.get('data', [])
 
 class AkilimoDataService:
     """Service specifically for Akilimo data processing"""
     
-    def __init__(self, token: str):
-        self.api_service = EiAMeliaAPIService(token)
+    def __init__(self, token: str, base_url: str = None):
+        self.api_service = EiAMeliaAPIService(token, base_url=base_url)
     
     def get_akilimo_participants(self, page: int = 1, page_size: int = 100) -> Dict:
         """Get Akilimo participants data"""
         return self.api_service.get_participants_by_usecase('akilimo', page, page_size)
     
-    def get_all_akilimo_participants(self) -> List[Dict]:
-        """Get all Akilimo participants data"""
-        return self.api_service.get_all_participants_by_usecase('akilimo')
+    def iter_akilimo_participants(self, page_size: int = 1000) -> Iterator[Dict]:
+        """Yield all Akilimo participants, one page in memory at a time"""
+        return self.api_service.iter_participants('akilimo', page_size=page_size)
     
-    def process_participant_data(self, participants: List[Dict]) -> Dict:
+    def process_participant_data(self, participants: Iterable[Dict]) -> Dict:
         """
         Process and analyze participant data for dashboard metrics
         
+        Records are counted as they are consumed, so this works on
+        iter_akilimo_participants() without materialising the dataset.
+        When a list is passed in, it is also returned under 'raw_data';
+        records from any other iterable are not kept.
+        
         Returns:
             Dict containing processed metrics
         """
-        if not participants:
-            return {
-                'total_participants': 0,
-                'gender_distribution': {},
-                'location_distribution': {},
-                'training_events': 0,
-                'adoption_metrics': {}
-            }
-        
-        # Process data for dashboard metrics
-        total_participants = len(participants)
+        total_participants = 0
         gender_distribution = {}
         location_distribution = {}
         
         for participant in participants:
+            total_participants += 1
+            
             # Gender analysis
             gender = participant.get('gender', 'Unknown')
             gender_distribution[gender] = gender_distribution.get(gender, 0) + 1
@@ -144,9 +520,20 @@ class AkilimoDataService:
             location = participant.get('location', 'Unknown')
             location_distribution[location] = location_distribution.get(location, 0) + 1
         
-        return {
+        if not total_participants:
+            return {
+                'total_participants': 0,
+                'gender_distribution': {},
+                'location_distribution': {},
+                'training_events': 0,
+                'adoption_metrics': {}
+            }
+        
+        metrics = {
             'total_participants': total_participants,
             'gender_distribution': gender_distribution,
             'location_distribution': location_distribution,
-            'raw_data': participants
-        }
\ No newline at end of file
+        }
+        if isinstance(participants, list):
+            metrics['raw_data'] = participants
+        return metrics
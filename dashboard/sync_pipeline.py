@@ -0,0 +1,248 @@
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+class _Failure:
+    """Carries a stage's exception downstream so it surfaces in page order"""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+class StageMetrics:
+    """
+    Time accounting for one pipeline stage
+
+    ``busy`` is time spent doing the stage's own work, ``waiting`` is time
+    starved for input and ``blocked`` is time stuck on a full output queue.
+    A stage that is mostly busy is the bottleneck; the stages around it
+    will show the waiting (downstream) or blocked (upstream) time.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.busy = 0.0
+        self.waiting = 0.0
+        self.blocked = 0.0
+        self.pages = 0
+        self.records = 0
+
+    def as_dict(self) -> Dict:
+        return {
+            'busy_seconds': round(self.busy, 3),
+            'wait_seconds': round(self.waiting, 3),
+            'blocked_seconds': round(self.blocked, 3),
+            'pages': self.pages,
+            'records': self.records,
+            'records_per_second': round(self.records / self.busy, 1) if self.busy else None,
+        }
+
+
+class SyncPipeline:
+    """
+    Run the page-level sync stages concurrently, connected by bounded queues
+
+    ``source`` is iterated on its own thread as the first stage, each
+    ``(name, func)`` in ``stages`` runs on a thread of its own, and the
+    caller iterating the pipeline is the last stage (``sink``). Every queue
+    holds at most ``queue_size`` pages, so a slow stage throttles the ones
+    before it instead of buffering the whole sync. Pages come out in source
+    order; an exception raised in any stage is re-raised to the caller in
+    place of the page that caused it. Items produced but never consumed
+    (the caller stopped early or a later page failed) are handed to
+    ``on_discard``. With ``concurrent=False`` every stage runs inline on the
+    caller's thread, still with per-stage timing.
+
+    Items may expose ``record_count`` to have records counted per stage.
+    """
+
+    def __init__(self, source: Iterable, stages: List[Tuple[str, Callable]], source_name: str = 'fetch',
+                 sink_name: str = 'write', queue_size: int = 2, concurrent: bool = True,
+                 on_discard: Optional[Callable] = None):
+        self.source = source
+        self.stages = stages
+        self.source_name = source_name
+        self.sink_name = sink_name
+        self.queue_size = max(1, queue_size)
+        self.concurrent = concurrent
+        self.on_discard = on_discard
+        self.metrics = {name: StageMetrics(name) for name in [source_name, *(n for n, _ in stages), sink_name]}
+        self.started = None
+        self.finished = None
+        self._stop = threading.Event()
+
+    def __iter__(self) -> Iterator:
+        self.started = time.monotonic()
+        try:
+            if self.concurrent:
+                yield from self._run_threaded()
+            else:
+                yield from self._run_inline()
+        finally:
+            self.finished = time.monotonic()
+
+    def report(self) -> Dict:
+        """Per-stage metrics plus the wall-clock time and the busiest stage"""
+        stages = {name: metrics.as_dict() for name, metrics in self.metrics.items()}
+        bottleneck = max(self.metrics.values(), key=lambda m: m.busy)
+        wall = ((self.finished or time.monotonic()) - self.started) if self.started else 0
+        return {
+            'concurrent': self.concurrent,
+            'queue_size': self.queue_size,
+            'wall_seconds': round(wall, 3),
+            'bottleneck': bottleneck.name if bottleneck.busy else None,
+            'stages': stages,
+        }
+
+    def _count(self, metrics: StageMetrics, item):
+        metrics.pages += 1
+        metrics.records += getattr(item, 'record_count', 0) or 0
+
+    def _consume(self, item) -> Iterator:
+        """Yield to the caller, charging the time until it asks again to the sink"""
+        sink = self.metrics[self.sink_name]
+        started = time.monotonic()
+        yield item
+        sink.busy += time.monotonic() - started
+        self._count(sink, item)
+
+    def _run_inline(self) -> Iterator:
+        source_metrics = self.metrics[self.source_name]
+        items = iter(self.source)
+        try:
+            while True:
+                started = time.monotonic()
+                try:
+                    item = next(items)
+                except StopIteration:
+                    break
+                finally:
+                    source_metrics.busy += time.monotonic() - started
+                self._count(source_metrics, item)
+
+                for name, func in self.stages:
+                    started = time.monotonic()
+                    item = func(item)
+                    self.metrics[name].busy += time.monotonic() - started
+                    self._count(self.metrics[name], item)
+
+                yield from self._consume(item)
+        finally:
+            close = getattr(items, 'close', None)
+            if close:
+                close()
+
+    def _run_threaded(self) -> Iterator:
+        queues = [queue.Queue(self.queue_size) for _ in range(len(self.stages) + 1)]
+        threads = [threading.Thread(target=self._feed, args=(queues[0],), name=f'sync-{self.source_name}',
+                                    daemon=True)]
+        for i, (name, func) in enumerate(self.stages):
+            threads.append(threading.Thread(target=self._work, args=(name, func, queues[i], queues[i + 1]),
+                                            name=f'sync-{name}', daemon=True))
+        for thread in threads:
+            thread.start()
+
+        sink = self.metrics[self.sink_name]
+        try:
+            while True:
+                item = self._get(queues[-1], sink)
+                if item is _DONE:
+                    break
+                if isinstance(item, _Failure):
+                    raise item.error
+                yield from self._consume(item)
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join(timeout=30)
+            for q in queues:
+                self._drain(q)
+
+    def _feed(self, out_queue: queue.Queue):
+        metrics = self.metrics[self.source_name]
+        items = iter(self.source)
+        try:
+            while not self._stop.is_set():
+                started = time.monotonic()
+                try:
+                    item = next(items)
+                except StopIteration:
+                    break
+                finally:
+                    metrics.busy += time.monotonic() - started
+                self._count(metrics, item)
+                self._put(out_queue, item, metrics)
+        except BaseException as e:
+            self._put(out_queue, _Failure(e), metrics)
+            return
+        finally:
+            close = getattr(items, 'close', None)
+            if close:
+                close()
+        self._put(out_queue, _DONE, metrics)
+
+    def _work(self, name: str, func: Callable, in_queue: queue.Queue, out_queue: queue.Queue):
+        metrics = self.metrics[name]
+        while True:
+            item = self._get(in_queue, metrics)
+            if item is None:
+                return
+            if item is not _DONE and not isinstance(item, _Failure):
+                started = time.monotonic()
+                try:
+                    item = func(item)
+                except BaseException as e:
+                    item = _Failure(e)
+                metrics.busy += time.monotonic() - started
+                if not isinstance(item, _Failure):
+                    self._count(metrics, item)
+            self._put(out_queue, item, metrics)
+            if item is _DONE or isinstance(item, _Failure):
+                return
+
+    def _get(self, in_queue: queue.Queue, metrics: StageMetrics):
+        """Next item, or None once the pipeline is stopping"""
+        started = time.monotonic()
+        try:
+            while not self._stop.is_set():
+                try:
+                    return in_queue.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+            return None
+        finally:
+            metrics.waiting += time.monotonic() - started
+
+    def _put(self, out_queue: queue.Queue, item, metrics: StageMetrics):
+        started = time.monotonic()
+        try:
+            while not self._stop.is_set():
+                try:
+                    out_queue.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+            self._discard(item)
+        finally:
+            metrics.blocked += time.monotonic() - started
+
+    def _drain(self, q: queue.Queue):
+        while True:
+            try:
+                self._discard(q.get_nowait())
+            except queue.Empty:
+                return
+
+    def _discard(self, item):
+        if self.on_discard and item is not _DONE and not isinstance(item, _Failure):
+            try:
+                self.on_discard(item)
+            except Exception as e:
+                logger.warning(f'Could not discard pipeline item: {e}')
@@ -0,0 +1,369 @@
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.utils import timezone
+from itertools import islice
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from .dimensions import DimensionResolver
+from .models import AkilimoParticipant, DataSyncLog, ParticipantRawData, ParticipantRecord
+from .normalizers import normalize_legacy_record, normalize_participant
+from .services import AkilimoDataService
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def upsert_existing(model, objs: List, key_field: str, update_fields: List[str], batch_size: int = 1000):
+    """
+    Rewrite rows that are known to exist, using a native upsert where the backend has one
+
+    Args:
+        objs: Unsaved instances carrying the key_field of existing rows
+        update_fields: Fields to overwrite
+    """
+    features = connection.features
+    if features.supports_update_conflicts:
+        # MySQL: INSERT ... ON DUPLICATE KEY UPDATE; SQLite/PostgreSQL: ON CONFLICT
+        kwargs = {}
+        if features.supports_update_conflicts_with_target:
+            kwargs['unique_fields'] = [key_field]
+        model.objects.bulk_create(
+            objs,
+            batch_size=batch_size,
+            update_conflicts=True,
+            update_fields=update_fields,
+            **kwargs
+        )
+    else:
+        # bulk_update skips auto_now, so stamp it here
+        now = timezone.now()
+        for field in model._meta.concrete_fields:
+            if getattr(field, 'auto_now', False):
+                for obj in objs:
+                    setattr(obj, field.attname, now)
+        model.objects.bulk_update(objs, update_fields, batch_size=batch_size)
+
+
+def bulk_upsert(model, rows: Dict, key_field: str = 'external_id') -> Dict[str, int]:
+    """
+    Insert or update a chunk of rows keyed by a unique field, in one transaction
+
+    One SELECT finds which keys already exist; new rows go through bulk_create
+    and existing ones through upsert_existing, so a chunk costs a handful of
+    queries instead of two per row.
+
+    Args:
+        rows: Field values by key (each dict holds every field except the key)
+
+    Returns:
+        Dict with created and updated counts
+    """
+    if not rows:
+        return {'created': 0, 'updated': 0}
+
+    update_fields = sorted({name for data in rows.values() for name in data} - {key_field})
+    auto_now = [f.name for f in model._meta.concrete_fields if getattr(f, 'auto_now', False)]
+
+    with transaction.atomic():
+        existing = set(
+            model.objects.filter(**{f'{key_field}__in': list(rows)}).values_list(key_field, flat=True)
+        )
+        new_objs = [model(**{key_field: key}, **data) for key, data in rows.items() if key not in existing]
+        if new_objs:
+            model.objects.bulk_create(new_objs)
+        update_objs = [model(**{key_field: key}, **data) for key, data in rows.items() if key in existing]
+        if update_objs:
+            upsert_existing(model, update_objs, key_field, update_fields + auto_now)
+
+    return {'created': len(new_objs), 'updated': len(update_objs)}
+
+
+class ParticipantBulkWriter:
+    """
+    Batch upsert of MELIA participants into AkilimoParticipant
+
+    Each chunk of up to chunk_size records costs one existence lookup plus
+    bulk INSERTs/UPDATEs inside a single transaction, instead of a SELECT and
+    a write per record. With force_update, existing rows are only rewritten
+    when their content hash differs from the incoming record. When seen_ids
+    (an ExternalIdSet) is given, the id of every record passed in is added to
+    it for deletion reconciliation. Dimension keys (partner_dim, state_dim,
+    ...) are resolved for every row just before it is written, and the raw
+    record of every written row goes to ParticipantRawData.
+    """
+
+    # Fields never rewritten on update
+    PROTECTED_FIELDS = ('id', 'external_id', 'created_at')
+
+    def __init__(self, force_update: bool = False, chunk_size: int = 1000, seen_ids=None):
+        self.force_update = force_update
+        self.chunk_size = chunk_size
+        self.seen_ids = seen_ids
+        self.dimensions = DimensionResolver()
+        self.update_fields = [
+            f.name for f in AkilimoParticipant._meta.concrete_fields
+            if f.name not in self.PROTECTED_FIELDS
+        ]
+
+    def write_page(self, participants_data: Iterable[Dict]) -> Dict[str, int]:
+        """
+        Upsert one page of raw participant records
+
+        Records are consumed lazily in chunks of chunk_size, so a streamed page
+        never has to be held in memory as a whole. Each chunk costs one
+        existence lookup and runs in its own transaction (a savepoint when the
+        caller already holds one for the page).
+
+        Returns:
+            Dict with created, updated, unchanged and skipped counts
+        """
+        counts = {'created': 0, 'updated': 0, 'unchanged': 0, 'skipped': 0}
+        records = iter(participants_data)
+
+        while True:
+            chunk = list(islice(records, self.chunk_size))
+            if not chunk:
+                break
+            for key, value in self.write_rows(*self.normalize_chunk(chunk)).items():
+                counts[key] += value
+
+        return counts
+
+    def normalize_page(self, participants_data: Iterable[Dict]) -> List[Tuple[Dict[int, Dict], int]]:
+        """
+        Normalize a whole page up front, without touching the database
+
+        Lets a pipeline normalize the next page on another thread while this
+        one is written; pass the result to write_normalized.
+
+        Returns:
+            List of (rows by external_id, skipped count), one per chunk
+        """
+        records = iter(participants_data)
+        chunks = []
+        while True:
+            chunk = list(islice(records, self.chunk_size))
+            if not chunk:
+                break
+            chunks.append(self.normalize_chunk(chunk))
+        return chunks
+
+    def write_normalized(self, chunks: List[Tuple[Dict[int, Dict], int]]) -> Dict[str, int]:
+        """
+        Write chunks produced by normalize_page
+
+        Returns:
+            Dict with created, updated, unchanged and skipped counts
+        """
+        counts = {'created': 0, 'updated': 0, 'unchanged': 0, 'skipped': 0}
+        for rows, skipped in chunks:
+            for key, value in self.write_rows(rows, skipped).items():
+                counts[key] += value
+        return counts
+
+    def normalize_chunk(self, participants_data: List[Dict]) -> Tuple[Dict[int, Dict], int]:
+        """
+        Normalize and de-duplicate records on external_id (last occurrence wins)
+
+        Returns:
+            Tuple of (rows by external_id, skipped count)
+        """
+        skipped = 0
+        rows = {}
+        seen_ids = self.seen_ids
+        for participant_data in participants_data:
+            if seen_ids is not None:
+                # Invalid records still exist upstream, so count them before normalizing
+                seen_ids.add(participant_data.get('id'))
+            try:
+                model_data = normalize_participant(participant_data)
+            except Exception as e:
+                logger.error(f"Error processing participant {participant_data.get('id', 'unknown')}: {e}")
+                model_data = None
+            if model_data is None:
+                skipped += 1
+                continue
+            if model_data['external_id'] in rows:
+                skipped += 1
+            rows[model_data['external_id']] = model_data
+        return rows, skipped
+
+    def write_rows(self, rows: Dict[int, Dict], skipped: int = 0) -> Dict[str, int]:
+        """Upsert one normalized chunk in its own transaction"""
+        counts = {'created': 0, 'updated': 0, 'unchanged': 0, 'skipped': skipped}
+        if not rows:
+            return counts
+
+        self.dimensions.assign(rows.values())
+        try:
+            with transaction.atomic():
+                chunk_counts = self._bulk_write(rows)
+        except OperationalError:
+            # Lock timeouts and deadlocks are not the rows' fault: fail the page so it is retried
+            raise
+        except Exception as e:
+            logger.warning(f"Bulk write of {len(rows)} participants failed ({e}); retrying row by row")
+            chunk_counts = self._row_write(rows)
+
+        for key, value in chunk_counts.items():
+            counts[key] += value
+        return counts
+
+    def _bulk_write(self, rows: Dict[int, Dict]) -> Dict[str, int]:
+        existing = {
+            external_id: (pk, content_hash)
+            for external_id, pk, content_hash in AkilimoParticipant.objects.filter(
+                external_id__in=list(rows)
+            ).values_list('external_id', 'id', 'content_hash')
+        }
+
+        new_objs = [AkilimoParticipant(**data) for eid, data in rows.items() if eid not in existing]
+        if new_objs:
+            AkilimoParticipant.objects.bulk_create(new_objs, batch_size=self.chunk_size)
+            self._write_raw_data(new_objs, created=True)
+
+        if not self.force_update:
+            return {'created': len(new_objs), 'updated': 0, 'unchanged': 0, 'skipped': len(existing)}
+
+        update_objs = [
+            AkilimoParticipant(id=existing[eid][0], **data)
+            for eid, data in rows.items()
+            if eid in existing and existing[eid][1] != data['content_hash']
+        ]
+        if update_objs:
+            self._bulk_update(update_objs)
+            self._write_raw_data(update_objs, created=False)
+
+        return {
+            'created': len(new_objs),
+            'updated': len(update_objs),
+            'unchanged': len(existing) - len(update_objs),
+            'skipped': 0,
+        }
+
+    def _bulk_update(self, objs: List[AkilimoParticipant]):
+        upsert_existing(AkilimoParticipant, objs, 'external_id', self.update_fields, batch_size=self.chunk_size)
+
+    def _write_raw_data(self, objs: List[AkilimoParticipant], created: bool):
+        """Store the raw records held by freshly written participants"""
+        missing = [obj for obj in objs if obj.pk is None]
+        if missing:
+            # MySQL does not return the primary keys of a bulk INSERT
+            ids = dict(AkilimoParticipant.objects.filter(
+                external_id__in=[obj.external_id for obj in missing]
+            ).values_list('external_id', 'id'))
+            for obj in missing:
+                obj.pk = ids[obj.external_id]
+
+        raw_objs = [ParticipantRawData(participant_id=obj.pk, data=obj.__dict__.pop('_pending_raw_data', {}))
+                    for obj in objs]
+        if created:
+            ParticipantRawData.objects.bulk_create(raw_objs, batch_size=self.chunk_size)
+        else:
+            upsert_existing(ParticipantRawData, raw_objs, 'participant', ['data', 'updated_at'],
+                            batch_size=self.chunk_size)
+
+    def _row_write(self, rows: Dict[int, Dict]) -> Dict[str, int]:
+        """Per-row fallback so a single bad record is skipped rather than the whole chunk"""
+        counts = {'created': 0, 'updated': 0, 'unchanged': 0, 'skipped': 0}
+        for external_id, model_data in rows.items():
+            try:
+                with transaction.atomic():
+                    existing = AkilimoParticipant.objects.filter(external_id=external_id).first()
+                    if existing and not self.force_update:
+                        counts['skipped'] += 1
+                    elif existing and existing.content_hash == model_data['content_hash']:
+                        counts['unchanged'] += 1
+                    elif existing:
+                        for key, value in model_data.items():
+                            setattr(existing, key, value)
+                        existing.save()
+                        counts['updated'] += 1
+                    else:
+                        AkilimoParticipant.objects.create(**model_data)
+                        counts['created'] += 1
+            except OperationalError:
+                raise
+            except Exception as e:
+                logger.error(f"Error processing participant {external_id}: {e}")
+                counts['skipped'] += 1
+        return counts
+
+
+class ParticipantRecordSync:
+    """
+    Sync of MELIA participants into the legacy ParticipantRecord table
+
+    Records are upserted in chunks of chunk_size, one transaction per chunk,
+    and the counters are saved to the sync log after every chunk, so a caller
+    polling the log (or the job status endpoint) can follow along.
+    """
+
+    def __init__(self, token: str, sync_log: Optional[DataSyncLog] = None, chunk_size: int = 500,
+                 base_url: Optional[str] = None):
+        self.token = token
+        self.base_url = base_url
+        self.sync_log = sync_log
+        self.chunk_size = chunk_size
+
+    def run(self, on_progress: Optional[Callable[[Dict[str, int]], None]] = None) -> Dict[str, int]:
+        """
+        Stream all AKILIMO participants from the API into the table
+
+        Raises:
+            PageFetchError: when a page still fails after its retries
+        """
+        participants_data = AkilimoDataService(self.token, base_url=self.base_url).iter_akilimo_participants()
+        return self.write(participants_data, on_progress)
+
+    def write(self, participants_data: Iterable[Dict],
+              on_progress: Optional[Callable[[Dict[str, int]], None]] = None) -> Dict[str, int]:
+        """
+        Upsert raw participant records in chunks
+
+        Args:
+            participants_data: Raw MELIA participant records
+            on_progress: Called with the running counts after every chunk
+
+        Returns:
+            Dict with processed, created and updated counts
+        """
+        counts = {'processed': 0, 'created': 0, 'updated': 0}
+        records = iter(participants_data)
+
+        while True:
+            chunk = list(islice(records, self.chunk_size))
+            if not chunk:
+                break
+            counts['processed'] += len(chunk)
+
+            # Last occurrence of an external_id wins, as with successive update_or_create calls
+            rows = {}
+            duplicates = 0
+            for participant_data in chunk:
+                record_data = normalize_legacy_record(participant_data)
+                if record_data:
+                    external_id = record_data.pop('external_id')
+                    duplicates += external_id in rows
+                    rows[external_id] = record_data
+
+            try:
+                chunk_counts = bulk_upsert(ParticipantRecord, rows)
+            except IntegrityError:
+                # Another sync inserted some of these ids since the lookup; look them up again
+                chunk_counts = bulk_upsert(ParticipantRecord, rows)
+            counts['created'] += chunk_counts['created']
+            counts['updated'] += chunk_counts['updated'] + duplicates
+
+            self._save_progress(counts)
+            if on_progress:
+                on_progress(counts)
+
+        self._save_progress(counts)
+        return counts
+
+    def _save_progress(self, counts: Dict[str, int]):
+        if not self.sync_log:
+            return
+        self.sync_log.records_processed = counts['processed']
+        self.sync_log.records_created = counts['created']
+        self.sync_log.records_updated = counts['updated']
+        self.sync_log.save(update_fields=['records_processed', 'records_created', 'records_updated'])
@@ -43,5 +43,6 @@ urlpatterns = [
     path('api/participants/summary/', views.api_participants_summary, name='api_participants_summary'),
     path('api/yield/metrics/', views.api_yield_metrics, name='api_yield_metrics'),
     path('api/sync/data/', views.api_sync_data, name='api_sync_data'),
+    path('api/sync/jobs/<int:job_id>/', views.api_sync_job_status, name='api_sync_job_status'),
     path('api/partner/metrics/', views.api_partner_metrics, name='api_partner_metrics'),
 ]
\ No newline at end of file
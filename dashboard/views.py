@@ -19,10 +19,12 @@ from datetime import datetime, timedelta
 import logging
 
 from .models import (ParticipantRecord, AkilimoParticipant, DashboardMetrics,
-                    DataSyncLog, APIConfiguration, UserProfile, PartnerOrganization, Membership, MembershipPricing)
+                    SyncJob, APIConfiguration, UserProfile, PartnerOrganization, Membership, MembershipPricing)
 from .forms import CustomUserCreationForm, CustomAuthenticationForm, UserProfileForm
-from .services import AkilimoDataService
 from .decorators import require_active_subscription
+from .dimensions import (agent_count, agent_leaderboard, dimension_counts, dimension_values, dimensions_ready,
+                         distinct_count, event_count, filter_gender, gender_counts, gender_distribution,
+                         gender_values, monthly_agent_activity)
 from conference.models import Conference, Registration as ConferenceRegistration, AbstractSubmission
 
 logger = logging.getLogger(__name__)
@@ -57,55 +59,30 @@ class DashboardHomeView(TemplateView):
             total_participants = country_queryset.count()
             
             # Gender distribution
-            gender_stats = country_queryset.values('farmer_gender').annotate(
-                count=Count('id')
-            ).order_by('-count')
+            gender_stats = gender_distribution(country_queryset)
             
             # Calculate male/female counts
-            male_count = country_queryset.filter(farmer_gender__icontains='male').exclude(farmer_gender__icontains='female').count()
-            female_count = country_queryset.filter(farmer_gender__icontains='female').count()
+            genders = gender_counts(country_queryset)
+            male_count = genders['male']
+            female_count = genders['female']
             
             # Geographic distribution (admin_level1 = state)
-            state_stats = country_queryset.exclude(
-                admin_level1__isnull=True
-            ).exclude(admin_level1='').values('admin_level1').annotate(
-                count=Count('id')
-            ).order_by('-count')[:10]
+            state_stats = dimension_counts(country_queryset, 'admin_level1', limit=10)
             
             # City distribution
-            city_stats = country_queryset.exclude(
-                event_city__isnull=True
-            ).exclude(event_city='').values('event_city').annotate(
-                count=Count('id')
-            ).order_by('-count')[:10]
+            city_stats = dimension_counts(country_queryset, 'event_city', limit=10)
             
             # Crop distribution
-            crop_stats = country_queryset.exclude(
-                crop__isnull=True
-            ).exclude(crop='').values('crop').annotate(
-                count=Count('id')
-            ).order_by('-count')[:10]
+            crop_stats = dimension_counts(country_queryset, 'crop', limit=10)
             
             # Partner distribution
-            partner_stats = country_queryset.exclude(
-                partner__isnull=True
-            ).exclude(partner='').values('partner').annotate(
-                count=Count('id')
-            ).order_by('-count')[:10]
+            partner_stats = dimension_counts(country_queryset, 'partner', limit=10)
             
             # Event types distribution
-            event_type_stats = country_queryset.exclude(
-                event_type__isnull=True
-            ).exclude(event_type='').values('event_type').annotate(
-                count=Count('id')
-            ).order_by('-count')[:5]
+            event_type_stats = dimension_counts(country_queryset, 'event_type', limit=5)
             
             # Age category distribution
-            age_category_stats = country_queryset.exclude(
-                age_category__isnull=True
-            ).exclude(age_category='').values('age_category').annotate(
-                count=Count('id')
-            ).order_by('-count')[:5]
+            age_category_stats = dimension_counts(country_queryset, 'age_category', limit=5)
             
             # Monthly participation trends (based on event dates)
             monthly_trend = []
@@ -142,31 +119,19 @@ class DashboardHomeView(TemplateView):
             ).exclude(farmer_phone_no='').count()
             
             # Count unique events
-            unique_events = country_queryset.values(
-                'event_date', 'event_venue', 'event_type'
-            ).distinct().count()
+            unique_events = event_count(country_queryset)
             
             # Count extension agents (organizational contacts)
-            extension_agents = country_queryset.exclude(
-                org_first_name__isnull=True
-            ).exclude(org_first_name='').values(
-                'org_first_name', 'org_surname', 'org_phone_no', 'partner'
-            ).distinct().count()
+            extension_agents = agent_count(country_queryset)
             
             # Count unique partners
-            unique_partners = country_queryset.exclude(
-                partner__isnull=True
-            ).exclude(partner='').values('partner').distinct().count()
+            unique_partners = distinct_count(country_queryset, 'partner')
             
             # Count unique states
-            unique_states = country_queryset.exclude(
-                admin_level1__isnull=True
-            ).exclude(admin_level1='').values('admin_level1').distinct().count()
+            unique_states = distinct_count(country_queryset, 'admin_level1')
             
             # Count unique cities
-            unique_cities = country_queryset.exclude(
-                event_city__isnull=True
-            ).exclude(event_city='').values('event_city').distinct().count()
+            unique_cities = distinct_count(country_queryset, 'event_city')
             
             # Rename for template compatibility
             gender_stats = [{'gender': item['farmer_gender'], 'count': item['count']} for item in gender_stats]
@@ -383,90 +348,54 @@ def api_yield_metrics(request):
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def api_sync_data(request):
-    """API endpoint to sync data from EiA MELIA API"""
+    """Queue a sync from the EiA MELIA API; run_worker executes it in the background"""
     
     try:
-        # Get API configuration
         api_config = APIConfiguration.objects.filter(is_active=True).first()
         if not api_config or not api_config.token:
             return Response({
                 'error': 'API configuration not found or token missing'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Create sync log entry
-        sync_log = DataSyncLog.objects.create(
-            sync_type='participants',
-            status='started',
-            initiated_by=request.user
-        )
+        job, created = SyncJob.enqueue('participants', requested_by=request.user)
+        
+        return Response({
+            'message': 'Data sync queued' if created else 'A data sync is already in progress',
+            'job_id': job.pk,
+            'status': job.status,
+            'status_url': reverse('dashboard:api_sync_job_status', args=[job.pk]),
+        }, status=status.HTTP_202_ACCEPTED)
         
-        try:
-            # Initialize data service
-            data_service = AkilimoDataService(api_config.token)
-            
-            # Get all participants data
-            participants_data = data_service.get_all_akilimo_participants()
-            
-            created_count = 0
-            updated_count = 0
-            
-            for participant_data in participants_data:
-                external_id = participant_data.get('id', str(participant_data.get('participant_id', '')))
-                
-                if not external_id:
-                    continue
-                
-                # Extract relevant fields from API response
-                participant_record, created = ParticipantRecord.objects.update_or_create(
-                    external_id=external_id,
-                    defaults={
-                        'gender': participant_data.get('gender'),
-                        'age_group': participant_data.get('age_group'),
-                        'location': participant_data.get('location'),
-                        'state': participant_data.get('state'),
-                        'lga': participant_data.get('lga'),
-                        'event_type': participant_data.get('event_type'),
-                        'facilitator': participant_data.get('facilitator'),
-                        'farm_size': participant_data.get('farm_size'),
-                        'previous_yield': participant_data.get('previous_yield'),
-                        'expected_yield': participant_data.get('expected_yield'),
-                        'raw_data': participant_data
-                    }
-                )
-                
-                if created:
-                    created_count += 1
-                else:
-                    updated_count += 1
-            
-            # Update sync log
-            sync_log.records_processed = len(participants_data)
-            sync_log.records_created = created_count
-            sync_log.records_updated = updated_count
-            sync_log.mark_completed('success')
-            
-            return Response({
-                'message': 'Data sync completed successfully',
-                'records_processed': len(participants_data),
-                'records_created': created_count,
-                'records_updated': updated_count
-            })
-            
-        except Exception as e:
-            logger.error(f"Data sync failed: {e}")
-            sync_log.mark_completed('failed', str(e))
-            
-            return Response({
-                'error': 'Data sync failed',
-                'details': str(e)
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-            
     except Exception as e:
         logger.error(f"Sync API error: {e}")
         return Response({
             'error': 'Internal server error'
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def api_sync_job_status(request, job_id):
+    """Progress of a queued sync job, read from its DataSyncLog"""
+    
+    job = get_object_or_404(SyncJob.objects.select_related('sync_log'), pk=job_id)
+    sync_log = job.sync_log
+    
+    return Response({
+        'job_id': job.pk,
+        'job_type': job.job_type,
+        'status': job.status,
+        'finished': job.is_finished,
+        'attempts': job.attempts,
+        'error': job.error_message,
+        'created_at': job.created_at,
+        'started_at': job.started_at,
+        'finished_at': job.finished_at,
+        'records_processed': sync_log.records_processed if sync_log else 0,
+        'records_created': sync_log.records_created if sync_log else 0,
+        'records_updated': sync_log.records_updated if sync_log else 0,
+        'sync_log_id': sync_log.pk if sync_log else None,
+    })
+
 @method_decorator(require_active_subscription, name='dispatch')
 class ParticipantsListView(TemplateView):
     """View for participants list page - requires active subscription"""
@@ -489,7 +418,7 @@ class ParticipantsListView(TemplateView):
                 participants = participants.filter(admin_level1__icontains=state_filter)
             
             if gender_filter:
-                participants = participants.filter(farmer_gender__icontains=gender_filter)
+                participants = filter_gender(participants, gender_filter)
             
             if search_query:
                 participants = participants.filter(
@@ -502,8 +431,8 @@ class ParticipantsListView(TemplateView):
                 )
             
             # Get unique values for filters
-            unique_states = AkilimoParticipant.objects.values_list('admin_level1', flat=True).distinct()
-            unique_genders = AkilimoParticipant.objects.values_list('farmer_gender', flat=True).distinct()
+            unique_states = dimension_values(AkilimoParticipant.objects.all(), 'admin_level1')
+            unique_genders = gender_values(AkilimoParticipant.objects.all())
         
         else:
             # Fallback to legacy model
@@ -733,26 +662,16 @@ class PartnerDashboardView(LoginRequiredMixin, TemplateView):
         total_partner_farmers = partner_farmers.count()
         
         # Gender distribution for partner
-        partner_gender_stats = partner_farmers.values('farmer_gender').annotate(
-            count=Count('id')
-        ).order_by('-count')
+        partner_gender_stats = gender_distribution(partner_farmers)
         
         # Geographic distribution for partner
-        partner_state_stats = partner_farmers.values('admin_level1').annotate(
-            count=Count('id')
-        ).order_by('-count')
+        partner_state_stats = dimension_counts(partner_farmers, 'admin_level1', include_empty=True)
         
         # City distribution for partner
-        partner_city_stats = partner_farmers.values('event_city').annotate(
-            count=Count('id')
-        ).order_by('-count')[:10]
+        partner_city_stats = dimension_counts(partner_farmers, 'event_city', limit=10, include_empty=True)
         
         # Crop distribution for partner
-        partner_crop_stats = partner_farmers.exclude(
-            crop__isnull=True
-        ).exclude(crop='').values('crop').annotate(
-            count=Count('id')
-        ).order_by('-count')[:10]
+        partner_crop_stats = dimension_counts(partner_farmers, 'crop', limit=10)
         
         # Recent events for partner
         recent_partner_events = partner_farmers.filter(
@@ -760,11 +679,7 @@ class PartnerDashboardView(LoginRequiredMixin, TemplateView):
         ).order_by('-event_date')[:10]
         
         # Event types for partner
-        partner_event_types = partner_farmers.exclude(
-            event_type__isnull=True
-        ).exclude(event_type='').values('event_type').annotate(
-            count=Count('id')
-        ).order_by('-count')
+        partner_event_types = dimension_counts(partner_farmers, 'event_type')
         
         # Monthly trends for partner (last 12 months)
         monthly_trend = []
@@ -828,34 +743,24 @@ class PartnerDataView(LoginRequiredMixin, TemplateView):
         ).values('event_date', 'event_venue', 'event_type', 'event_city').distinct()
         
         # Cities of influence
-        cities_of_influence = partner_farmers.exclude(
-            event_city__isnull=True
-        ).exclude(event_city='').values('event_city').annotate(
+        cities_of_influence = dimension_counts(
+            partner_farmers, 'event_city', order_by='-farmer_count',
             farmer_count=Count('id'),
             event_count=Count('event_date', distinct=True)
-        ).order_by('-farmer_count')
+        )
         
         # States of influence
-        states_of_influence = partner_farmers.exclude(
-            admin_level1__isnull=True
-        ).exclude(admin_level1='').values('admin_level1').annotate(
+        states_of_influence = dimension_counts(
+            partner_farmers, 'admin_level1', order_by='-farmer_count',
             farmer_count=Count('id'),
             city_count=Count('event_city', distinct=True)
-        ).order_by('-farmer_count')
+        )
         
         # Crops promoted
-        crops_promoted = partner_farmers.exclude(
-            crop__isnull=True
-        ).exclude(crop='').values('crop').annotate(
-            count=Count('id')
-        ).order_by('-count')
+        crops_promoted = dimension_counts(partner_farmers, 'crop')
         
         # Training methods/event types
-        training_methods = partner_farmers.exclude(
-            event_type__isnull=True
-        ).exclude(event_type='').values('event_type').annotate(
-            count=Count('id')
-        ).order_by('-count')
+        training_methods = dimension_counts(partner_farmers, 'event_type')
         
         # Monthly activity (last 12 months)
         monthly_activity = []
@@ -918,33 +823,19 @@ class PartnerFarmersView(LoginRequiredMixin, TemplateView):
         if state_filter:
             partner_farmers = partner_farmers.filter(admin_level1__icontains=state_filter)
         if gender_filter:
-            partner_farmers = partner_farmers.filter(farmer_gender__icontains=gender_filter)
+            partner_farmers = filter_gender(partner_farmers, gender_filter)
         if age_filter:
             partner_farmers = partner_farmers.filter(age_category__icontains=age_filter)
         
         # Demographics
-        gender_distribution = partner_farmers.values('farmer_gender').annotate(
-            count=Count('id')
-        ).order_by('-count')
+        gender_stats = gender_distribution(partner_farmers)
         
-        age_distribution = partner_farmers.exclude(
-            age_category__isnull=True
-        ).exclude(age_category='').values('age_category').annotate(
-            count=Count('id')
-        ).order_by('-count')
+        age_distribution = dimension_counts(partner_farmers, 'age_category')
         
         # Geographic distribution
-        state_distribution = partner_farmers.exclude(
-            admin_level1__isnull=True
-        ).exclude(admin_level1='').values('admin_level1').annotate(
-            count=Count('id')
-        ).order_by('-count')
+        state_distribution = dimension_counts(partner_farmers, 'admin_level1')
         
-        city_distribution = partner_farmers.exclude(
-            event_city__isnull=True
-        ).exclude(event_city='').values('event_city').annotate(
-            count=Count('id')
-        ).order_by('-count')[:20]
+        city_distribution = dimension_counts(partner_farmers, 'event_city', limit=20)
         
         # Phone access
         farmers_with_phones = partner_farmers.exclude(
@@ -962,17 +853,11 @@ class PartnerFarmersView(LoginRequiredMixin, TemplateView):
         page_obj = paginator.get_page(page_number)
         
         # Filter options for dropdowns
-        unique_states = partner_farmers.exclude(
-            admin_level1__isnull=True
-        ).exclude(admin_level1='').values_list('admin_level1', flat=True).distinct()
+        unique_states = dimension_values(partner_farmers, 'admin_level1')
         
-        unique_genders = partner_farmers.exclude(
-            farmer_gender__isnull=True
-        ).exclude(farmer_gender='').values_list('farmer_gender', flat=True).distinct()
+        unique_genders = gender_values(partner_farmers)
         
-        unique_ages = partner_farmers.exclude(
-            age_category__isnull=True
-        ).exclude(age_category='').values_list('age_category', flat=True).distinct()
+        unique_ages = dimension_values(partner_farmers, 'age_category')
         
         # Calculate percentages
         total_count = partner_farmers.count()
@@ -982,7 +867,7 @@ class PartnerFarmersView(LoginRequiredMixin, TemplateView):
         context.update({
             'partner_name': partner_name,
             'total_farmers': total_count,
-            'gender_distribution': list(gender_distribution),
+            'gender_distribution': gender_stats,
             'age_distribution': list(age_distribution),
             'state_distribution': list(state_distribution),
             'city_distribution': list(city_distribution),
@@ -1025,73 +910,36 @@ class PartnerExtensionAgentsView(LoginRequiredMixin, TemplateView):
         partner_data = AkilimoParticipant.objects.filter(partner=partner_name)
         
         # Extension agents (org contacts) with their performance
-        extension_agents = partner_data.exclude(
-            org_first_name__isnull=True
-        ).exclude(org_first_name='').values(
-            'org_first_name', 'org_surname', 'org_phone_no'
-        ).annotate(
-            farmers_reached=Count('id'),
-            events_conducted=Count('event_date', distinct=True),
-            states_covered=Count('admin_level1', distinct=True),
-            cities_covered=Count('event_city', distinct=True)
-        ).order_by('-farmers_reached')
+        extension_agents = agent_leaderboard(partner_data)
+        agent_field = 'extension_agent' if dimensions_ready() else 'org_first_name'
         
         # Extension agent performance by state
-        ea_by_state = partner_data.exclude(
-            org_first_name__isnull=True
-        ).exclude(org_first_name='').exclude(
-            admin_level1__isnull=True
-        ).exclude(admin_level1='').values(
-            'admin_level1'
-        ).annotate(
-            unique_agents=Count('org_first_name', distinct=True),
+        ea_by_state = dimension_counts(
+            partner_data.exclude(org_first_name__isnull=True).exclude(org_first_name=''),
+            'admin_level1', order_by='-farmers_reached',
+            unique_agents=Count(agent_field, distinct=True),
             farmers_reached=Count('id')
-        ).order_by('-farmers_reached')
+        )
         
         # Monthly EA activity
-        monthly_ea_activity = []
-        for i in range(12):
-            month_start = (datetime.now().date().replace(day=1) - timedelta(days=30*i))
-            month_end = month_start.replace(day=28) + timedelta(days=4)
-            month_end = month_end - timedelta(days=month_end.day)
-            
-            agents_active = partner_data.exclude(
-                org_first_name__isnull=True
-            ).exclude(org_first_name='').filter(
-                event_date__gte=month_start,
-                event_date__lte=month_end
-            ).values('org_first_name', 'org_surname').distinct().count()
-            
-            farmers_reached = partner_data.filter(
-                event_date__gte=month_start,
-                event_date__lte=month_end
-            ).count()
-            
-            monthly_ea_activity.append({
-                'month': month_start.strftime('%B %Y'),
-                'agents_active': agents_active,
-                'farmers_reached': farmers_reached
-            })
-        
-        monthly_ea_activity.reverse()
+        monthly_ea_activity = monthly_agent_activity(partner_data)
         
         # Training effectiveness metrics
-        training_effectiveness = partner_data.exclude(
-            event_type__isnull=True
-        ).exclude(event_type='').values('event_type').annotate(
+        training_effectiveness = dimension_counts(
+            partner_data, 'event_type', order_by='-farmers_trained',
             farmers_trained=Count('id'),
-            agents_involved=Count('org_first_name', distinct=True),
-            avg_farmers_per_agent=Count('id') / Count('org_first_name', distinct=True)
-        ).order_by('-farmers_trained')
+            agents_involved=Count(agent_field, distinct=True),
+            avg_farmers_per_agent=Count('id') / Count(agent_field, distinct=True)
+        )
         
         # Calculate average farmers per agent
-        total_agents = extension_agents.count()
+        total_agents = len(extension_agents)
         total_farmers_reached = partner_data.count()
         avg_farmers_per_agent = (total_farmers_reached / total_agents) if total_agents > 0 else 0
         
         context.update({
             'partner_name': partner_name,
-            'extension_agents': list(extension_agents),
+            'extension_agents': extension_agents,
             'total_agents': total_agents,
             'ea_by_state': list(ea_by_state),
             'monthly_ea_activity': monthly_ea_activity,
@@ -1125,24 +973,16 @@ def api_partner_metrics(request):
     # Calculate metrics
     total_count = partner_farmers.count()
     
-    gender_distribution = partner_farmers.values('farmer_gender').annotate(
-        count=Count('id')
-    ).order_by('-count')
+    gender_stats = gender_distribution(partner_farmers)
     
-    location_distribution = partner_farmers.values('admin_level1').annotate(
-        count=Count('id')
-    ).order_by('-count')
+    location_distribution = dimension_counts(partner_farmers, 'admin_level1', include_empty=True)
     
-    crop_distribution = partner_farmers.exclude(
-        crop__isnull=True
-    ).exclude(crop='').values('crop').annotate(
-        count=Count('id')
-    ).order_by('-count')
+    crop_distribution = dimension_counts(partner_farmers, 'crop')
     
     return Response({
         'partner_name': user_profile.partner_organization.name,
         'total_farmers': total_count,
-        'gender_distribution': list(gender_distribution),
+        'gender_distribution': gender_stats,
         'location_distribution': list(location_distribution),
         'crop_distribution': list(crop_distribution),
         'filter_applied': {
@@ -14,6 +14,7 @@ from .models import (
     TrainingProgram, SupportTeam, CallToAction, PageContent, GalleryImage
 )
 from dashboard.models import PartnerOrganization, AkilimoParticipant, ANANigeriaPartner
+from dashboard.dimensions import event_count, gender_counts
 
 
 class HomeView(TemplateView):
@@ -106,9 +107,7 @@ class HomeView(TemplateView):
             # Partners: count from the official ANA Nigeria Partners table
             unique_partners = ANANigeriaPartner.objects.filter(is_active=True).count()
 
-            unique_events = queryset.exclude(
-                event_type__isnull=True
-            ).exclude(event_type='').values('event_date', 'event_type', 'event_venue').distinct().count()
+            unique_events = event_count(queryset, typed_only=True)
 
             unique_cities = queryset.exclude(
                 event_city__isnull=True
@@ -118,8 +117,9 @@ class HomeView(TemplateView):
                 org_first_name__isnull=True
             ).exclude(org_first_name='').values('org_first_name', 'org_surname').distinct().count()
 
-            male_count = queryset.filter(farmer_gender__icontains='male').exclude(farmer_gender__icontains='female').count()
-            female_count = queryset.filter(farmer_gender__icontains='female').count()
+            genders = gender_counts(queryset)
+            male_count = genders['male']
+            female_count = genders['female']
 
             # Format numbers
             def format_number(num):
@@ -643,9 +643,7 @@ def get_live_statistics(request):
         ).exclude(farmer_phone_no='').count()
 
         # Count unique training events
-        unique_events = queryset.exclude(
-            event_type__isnull=True
-        ).exclude(event_type='').values('event_date', 'event_type', 'event_venue').distinct().count()
+        unique_events = event_count(queryset, typed_only=True)
 
         # Count unique cities
         unique_cities = queryset.exclude(
@@ -658,8 +656,9 @@ def get_live_statistics(request):
         ).exclude(org_first_name='').values('org_first_name', 'org_surname').distinct().count()
 
         # Gender breakdown
-        male_count = queryset.filter(farmer_gender__icontains='male').exclude(farmer_gender__icontains='female').count()
-        female_count = queryset.filter(farmer_gender__icontains='female').count()
+        genders = gender_counts(queryset)
+        male_count = genders['male']
+        female_count = genders['female']
 
         # Format numbers for display (e.g., 1500 -> "1k+", 1500000 -> "1M+")
         def format_number(num):